@@ -0,0 +1,76 @@
+import threading
+
+
+class BuscaCancelada(Exception):
+    """Lançada quando a busca é cancelada no meio da varredura"""
+
+
+class Acompanhamento:
+    """
+    Recebe o progresso de uma busca enquanto ela roda.
+    A implementação padrão não faz nada; os jobs da API sobrescrevem os métodos.
+    """
+
+    def __init__(self):
+        self._cancelar = threading.Event()
+
+    def inicia(self, frames_previstos: int):
+        """Chamado antes da varredura com o total de frames que serão analisados"""
+
+    def progresso(self, frames_processados: int):
+        """Chamado sempre que mais frames terminam de ser processados"""
+
+    def nova_deteccao(self, deteccao: dict):
+        """Chamado assim que uma detecção é salva"""
+
+    def inicia_video(self, video: dict):
+        """Busca na biblioteca: o vídeo começou a ser processado"""
+
+    def conclui_video(self, resultado_video: dict):
+        """Busca na biblioteca: o vídeo terminou (com as detecções dele ou o erro)"""
+
+    def cancela(self):
+        self._cancelar.set()
+
+    def cancelado(self) -> bool:
+        return self._cancelar.is_set()
+
+    def verifica_cancelamento(self):
+        """Interrompe a busca se o cancelamento foi pedido"""
+        if self.cancelado():
+            raise BuscaCancelada()
+
+
+class AcompanhamentoPassadas(Acompanhamento):
+    """
+    Repassa a outro acompanhamento o progresso de uma busca feita em várias passadas
+    (amostragem adaptativa): só a primeira passada chama inicia, e os frames de cada
+    passada somam aos das anteriores em vez de recomeçar do zero
+    """
+
+    def __init__(self, acompanhamento: Acompanhamento):
+        super().__init__()
+        self.acompanhamento = acompanhamento
+        self.iniciado = False
+        self.frames_anteriores = 0
+        self.frames_passada = 0
+
+    def inicia(self, frames_previstos: int):
+        self.frames_anteriores += self.frames_passada
+        self.frames_passada = 0
+        if not self.iniciado:
+            self.iniciado = True
+            self.acompanhamento.inicia(frames_previstos)
+
+    def progresso(self, frames_processados: int):
+        self.frames_passada = frames_processados
+        self.acompanhamento.progresso(self.frames_anteriores + frames_processados)
+
+    def nova_deteccao(self, deteccao: dict):
+        self.acompanhamento.nova_deteccao(deteccao)
+
+    def cancela(self):
+        self.acompanhamento.cancela()
+
+    def cancelado(self) -> bool:
+        return self.acompanhamento.cancelado()
@@ -0,0 +1,61 @@
+class AmostragemAdaptativa:
+    """
+    Amostragem do grosso para o fino.
+    A primeira passada lê um frame a cada passo_grosso. Cada passada seguinte volta só aos
+    frames em volta dos "gatilhos" da anterior (moto sem placa confirmada ou texto perto do
+    threshold), com metade do passo e até raio_refino frames para cada lado (nunca mais que o
+    passo anterior), até não sobrar gatilho ou o passo chegar a passo_fino.
+    Uma moto com a placa lida com confiança não volta a ser amostrada: ou a placa já bateu,
+    ou sabemos que não é a procurada.
+    """
+
+    def __init__(self, passo_grosso=60, passo_fino=5, raio_refino=30, margem_threshold=0.15):
+        self.passo_grosso = max(1, int(passo_grosso))
+        self.passo_fino = max(1, min(int(passo_fino), self.passo_grosso))
+        self.raio_refino = max(0, int(raio_refino))
+        self.margem_threshold = margem_threshold
+
+    def descricao(self) -> dict:
+        return {
+            'passo_grosso': self.passo_grosso,
+            'passo_fino': self.passo_fino,
+            'raio_refino': self.raio_refino,
+            'margem_threshold': self.margem_threshold
+        }
+
+    def quase_bateu(self, detector, leitura: dict, placa_alvo, threshold: float) -> bool:
+        """Algum texto da leitura ficou entre threshold - margem_threshold e o threshold"""
+        if placa_alvo is None:
+            return False
+        textos = [texto for texto, _, _ in detector.gera_textos_para_testar(leitura['ocr'])]
+        if not textos:
+            return False
+        resultados, _ = detector.comparador(placa_alvo, threshold - self.margem_threshold).compara_lote(textos)
+        return any(similaridade < threshold for encontrados in resultados for _, similaridade, _ in encontrados)
+
+    def gatilhos(self, detector, leituras: list, placa_alvo=None, threshold=1.0) -> list:
+        """Frames da passada grossa que merecem amostragem densa em volta"""
+        frames = set()
+        for leitura in leituras:
+            if leitura['frame'] in frames:
+                continue
+            if not detector.leitura_confiavel(leitura) or self.quase_bateu(detector, leitura, placa_alvo, threshold):
+                frames.add(leitura['frame'])
+        return sorted(frames)
+
+    def proximo_passo(self, passo: int) -> tuple:
+        """(passo, raio) da passada depois de uma feita com este passo; None se já está no passo_fino"""
+        if passo <= self.passo_fino:
+            return None
+        return max(self.passo_fino, passo // 2), min(self.raio_refino, passo)
+
+    def frames_refino(self, gatilhos: list, passo: int, raio: int, lidos=(), inicio=None, fim=None) -> list:
+        """Múltiplos de passo a até raio frames dos gatilhos, fora os já lidos nas passadas anteriores"""
+        frames = set()
+        for frame_num in gatilhos:
+            primeiro = max(inicio or 1, frame_num - raio)
+            ultimo = frame_num + raio if fim is None else min(fim, frame_num + raio)
+            comeco = -(-primeiro // passo) * passo
+            frames.update(f for f in range(comeco, ultimo + 1, passo)
+                          if f % self.passo_grosso and f not in lidos)
+        return sorted(frames)
@@ -1,9 +1,17 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, stream_with_context
 from flask_cors import CORS
 import os
 import json
+import functools
+import math
+import threading
+import time
 from datetime import datetime
-from placa_detector import PlacaDetector
+from placa_detector import PlacaDetector, MODOS_EXECUCAO, MODOS_CARREGAMENTO, TTL_SAIDA, UNIDADES_TRECHO
+from controle_admissao import ControleAdmissao, Sobrecarga
+from jobs_busca import GerenciadorJobs
+from biblioteca_videos import BibliotecaVideos, BuscaBiblioteca, ORDENS_BIBLIOTECA, RAIZ_BIBLIOTECA
+from monitor_ao_vivo import MonitorAoVivo, le_cameras, resolve_fonte
 
 app = Flask(__name__)
 CORS(app)  # Permite requisições de qualquer origem
@@ -13,66 +21,354 @@ app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 
 # Instância global do detector
-detector = PlacaDetector()
+# Os modelos carregam em segundo plano para o Flask subir na hora; com
+# CARREGAMENTO_MODELOS=pre_fork e "gunicorn --preload" os pesos são carregados
+# uma vez no processo pai e compartilhados pelos workers (copy-on-write)
+carregamento = os.environ.get('CARREGAMENTO_MODELOS', 'segundo_plano')
+if carregamento not in MODOS_CARREGAMENTO:
+    print(f"⚠️  CARREGAMENTO_MODELOS inválido: {carregamento} (usando segundo_plano)")
+    carregamento = 'segundo_plano'
+# BACKEND_DETECCAO escolhe entre ultralytics, onnx e onnx_int8 (ver exporta_modelo.py)
+# Cada busca grava as imagens numa subpasta própria, apagada depois de TTL_IMAGENS_S segundos
+# REGIOES_INFERENCIA aponta para o JSON com resolução e ROIs por vídeo/câmera; RESOLUCAO_INFERENCIA
+# é a resolução padrão do YOLO para os vídeos fora dele
+detector = PlacaDetector(carregamento=carregamento,
+                         backend_deteccao=os.environ.get('BACKEND_DETECCAO', 'ultralytics'),
+                         ttl_saida=int(os.environ.get('TTL_IMAGENS_S', TTL_SAIDA)),
+                         regioes_inferencia=os.environ.get('REGIOES_INFERENCIA') or None,
+                         resolucao_inferencia=int(os.environ.get('RESOLUCAO_INFERENCIA', 0)) or None,
+                         tamanho_lote_ocr=int(os.environ.get('TAMANHO_LOTE_OCR', 1)),
+                         espera_lote_ocr_ms=float(os.environ.get('ESPERA_LOTE_OCR_MS', 50)),
+                         amostragem_adaptativa=os.environ.get('AMOSTRAGEM_ADAPTATIVA', '0') == '1',
+                         passo_grosso=int(os.environ.get('PASSO_GROSSO', 60)),
+                         passo_fino=int(os.environ.get('PASSO_FINO', 5)),
+                         raio_refino=int(os.environ.get('RAIO_REFINO', 30)))
+# Imagens vencidas são apagadas também com o servidor parado (não só quando uma busca começa)
+detector.inicia_limpeza_periodica()
+
+# Admissão: no máximo MAX_BUSCAS_SIMULTANEAS buscas rodando (síncronas e jobs somados);
+# até MAX_FILA_BUSCAS esperam por ESPERA_MAX_FILA_S segundos, as demais recebem 429 na hora
+admissao = ControleAdmissao(int(os.environ.get('MAX_BUSCAS_SIMULTANEAS', 2)),
+                            int(os.environ.get('MAX_FILA_BUSCAS', 8)),
+                            float(os.environ.get('ESPERA_MAX_FILA_S', 30)))
+
+# Buscas em segundo plano (a fila de jobs também é limitada, por MAX_FILA_JOBS)
+jobs = GerenciadorJobs(detector, max_simultaneos=admissao.max_simultaneas, admissao=admissao,
+                       max_fila=int(os.environ.get('MAX_FILA_JOBS', 32)))
+
+# Máximo de placas numa busca por lista (watchlist)
+MAX_PLACAS_LISTA = 1000
+
+# Biblioteca de vídeos: pastas/globs separados por os.pathsep (":" no Linux) em BIBLIOTECA_VIDEOS,
+# todos dentro de RAIZ_BIBLIOTECA (também o limite dos padrões registrados pela API)
+biblioteca = BibliotecaVideos(os.environ.get('RAIZ_BIBLIOTECA', RAIZ_BIBLIOTECA))
+for padrao in filter(None, os.environ.get('BIBLIOTECA_VIDEOS', '').split(os.pathsep)):
+    try:
+        biblioteca.registra(padrao)
+    except ValueError as e:
+        print(f"⚠️  BIBLIOTECA_VIDEOS: {e}")
+# Cada vídeo em paralelo ocupa uma vaga da admissão: nunca mais vídeos que MAX_BUSCAS_SIMULTANEAS
+busca_biblioteca = BuscaBiblioteca(detector, biblioteca, admissao.vagas_para(os.environ.get('MAX_VIDEOS_SIMULTANEOS', 2)))
+
+# Monitores de fontes ao vivo (RTSP, câmera ou arquivo em loop): id -> MonitorAoVivo
+monitores = {}
+# Cada monitor ativo ocupa uma vaga da admissão até parar; no máximo MAX_MONITORES ao mesmo tempo
+MAX_MONITORES = int(os.environ.get('MAX_MONITORES', 1))
+monitores_ativos = set()
+trava_monitores = threading.Lock()
+# Fontes aceitas: câmeras configuradas ("nome=fonte,...") ou URLs RTSP/HTTP dos hosts em HOSTS_AO_VIVO
+cameras_ao_vivo = le_cameras(os.environ.get('CAMERAS_AO_VIVO', ''))
+hosts_ao_vivo = [host.strip() for host in os.environ.get('HOSTS_AO_VIVO', '').split(',') if host.strip()]
+# Monitores parados continuam consultáveis por este tempo (segundos) e depois saem da lista
+TTL_MONITORES = int(os.environ.get('TTL_MONITORES_S', 3600))
+
+def limpa_monitores_antigos():
+    """Tira da lista os monitores parados há mais de TTL_MONITORES (com os alertas guardados neles)"""
+    limite = time.time() - TTL_MONITORES
+    for monitor_id, monitor in list(monitores.items()):
+        if monitor.terminado_em is not None and monitor.terminado_em < limite:
+            monitores.pop(monitor_id, None)
+
+def libera_monitor(monitor):
+    """Devolve a vaga do monitor quando ele para, seja por pedido, fim do arquivo ou erro"""
+    with trava_monitores:
+        if monitor.id not in monitores_ativos:
+            return
+        monitores_ativos.discard(monitor.id)
+    admissao.libera()
+
+def resposta_sobrecarga(erro):
+    """429 com Retry-After para o cliente tentar de novo mais tarde"""
+    detector.metricas.incrementa('buscas_recusadas')
+    print(f"🚦 Busca recusada: {erro} (tente em {erro.retry_after}s)")
+    resposta = jsonify({'erro': str(erro), 'sucesso': False, 'retry_after': erro.retry_after})
+    return resposta, 429, {'Retry-After': str(erro.retry_after)}
+
+def com_admissao(rota, vagas=None):
+    """
+    Roda o endpoint ocupando uma vaga de busca; sem vaga responde 429
+    vagas (opcional) diz, a cada chamada, quantas vagas o endpoint ocupa
+    """
+    @functools.wraps(rota)
+    def envolvida(*args, **kwargs):
+        try:
+            with admissao.vaga(vagas=vagas() if vagas else 1):
+                return rota(*args, **kwargs)
+        except Sobrecarga as e:
+            return resposta_sobrecarga(e)
+    return envolvida
+
+def com_admissao_biblioteca(rota):
+    """Como com_admissao, com uma vaga para cada vídeo que a biblioteca roda ao mesmo tempo"""
+    return com_admissao(rota, lambda: busca_biblioteca.max_videos_simultaneos)
 
 @app.route('/')
 def index():
     """Página principal"""
     return render_template('index.html')
 
+def erro_formato_placas(placas):
+    """Mensagem de erro se alguma placa estiver fora do formato AAA9999/AAA9A99 (None se todas estiverem)"""
+    try:
+        detector.normaliza_placas(placas)
+    except ValueError as e:
+        return str(e)
+    return None
+
+def corpo_json():
+    """Corpo JSON da requisição se for um objeto; None se ausente, inválido ou de outro tipo"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def le_parametros_busca(data):
+    """
+    Valida o JSON de busca e monta os argumentos do detector
+    Retorna (placa, parametros, erro)
+    """
+    if not data or 'placa' not in data:
+        return None, None, 'Placa não fornecida'
+
+    placa = str(data['placa']).strip().upper()
+
+    # Validação básica da placa
+    if len(placa) < 6 or len(placa) > 8:
+        return None, None, 'Placa deve ter entre 6 e 8 caracteres'
+    erro = erro_formato_placas([placa])
+    if erro:
+        return None, None, erro
+
+    parametros, erro = le_opcoes_busca(data)
+    return placa, parametros, erro
+
+def le_lista_placas(data):
+    """
+    Valida o JSON de busca por lista de placas
+    Retorna (placas, parametros, erro)
+    """
+    if not data or not isinstance(data.get('placas'), list) or not data['placas']:
+        return None, None, 'Lista de placas não fornecida'
+
+    if len(data['placas']) > MAX_PLACAS_LISTA:
+        return None, None, f'Máximo de {MAX_PLACAS_LISTA} placas por busca'
+
+    placas = []
+    for placa in data['placas']:
+        placa = str(placa).strip().upper()
+        if len(placa) < 6 or len(placa) > 8:
+            return None, None, f'Placa inválida: {placa} (deve ter entre 6 e 8 caracteres)'
+        placas.append(placa)
+    erro = erro_formato_placas(placas)
+    if erro:
+        return None, None, erro
+
+    parametros, erro = le_opcoes_busca(data)
+    return placas, parametros, erro
+
+def le_parametros_biblioteca(data):
+    """
+    Valida o JSON de busca na biblioteca ("placa" ou "placas", mais "ordem")
+    Retorna (placas, ordem, parametros, erro)
+    """
+    if data and 'placas' in data:
+        placas, parametros, erro = le_lista_placas(data)
+    else:
+        placas, parametros, erro = le_parametros_busca(data)
+    if erro:
+        return None, None, None, erro
+
+    ordem = data.get('ordem', 'prioridade')
+    if ordem not in ORDENS_BIBLIOTECA:
+        return None, None, None, f'Ordem deve ser uma de: {", ".join(ORDENS_BIBLIOTECA)}'
+    if parametros['modo_execucao'] == 'processos':
+        return None, None, None, "Na biblioteca use modo_execucao 'sequencial' ou 'pipeline'"
+
+    return placas, ordem, parametros, None
+
+def le_numero(data, campo, tipo=float, padrao=None, minimo=None, maximo=None):
+    """
+    Campo numérico do JSON (padrao se ausente ou vazio)
+    Levanta ValueError com o nome do campo se não for número ou estiver fora de [minimo, maximo]
+    """
+    valor = data.get(campo)
+    if valor is None or valor == '':
+        return padrao
+    descricao = 'um número inteiro' if tipo is int else 'um número'
+    # true/false passariam por int() e float()
+    if isinstance(valor, bool):
+        raise ValueError(f'"{campo}" deve ser {descricao}')
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'"{campo}" deve ser {descricao}')
+    # int(2.5) viraria 2 sem avisar
+    if not math.isfinite(numero) or (tipo is int and not numero.is_integer()):
+        raise ValueError(f'"{campo}" deve ser {descricao}')
+    numero = tipo(numero)
+    if minimo is not None and numero < minimo:
+        raise ValueError(f'"{campo}" deve ser maior ou igual a {minimo}')
+    if maximo is not None and numero > maximo:
+        raise ValueError(f'"{campo}" deve ser menor ou igual a {maximo}')
+    return numero
+
+def le_opcoes_busca(data):
+    """Parâmetros de busca comuns às buscas por placa e por lista de placas"""
+    modo_execucao = data.get('modo_execucao')
+
+    if modo_execucao is not None and modo_execucao not in MODOS_EXECUCAO:
+        return None, f'Modo de execução deve ser um de: {", ".join(MODOS_EXECUCAO)}'
+
+    # Trecho do vídeo: inicio/fim em segundos (padrão) ou em frames
+    unidade = data.get('unidade', 'segundos')
+    if unidade not in UNIDADES_TRECHO:
+        return None, f'Unidade deve ser uma de: {", ".join(UNIDADES_TRECHO)}'
+    try:
+        converte = int if unidade == 'frames' else float
+        inicio = le_numero(data, 'inicio', converte, minimo=0)
+        fim = le_numero(data, 'fim', converte, minimo=0)
+        parametros = {
+            'threshold': le_numero(data, 'threshold', padrao=0.8, minimo=0, maximo=1),
+            'usar_indice': bool(data.get('usar_indice', True)),
+            # 0 (ou ausente) usa o padrão do detector
+            'intervalo_frames': le_numero(data, 'intervalo_frames', int, minimo=0) or None,
+            'fps_amostragem': le_numero(data, 'fps_amostragem', minimo=0) or None,
+            'tamanho_lote': le_numero(data, 'tamanho_lote', int, minimo=0) or None,
+            'modo_execucao': modo_execucao,
+            'inicio': inicio,
+            'fim': fim,
+            'unidade': unidade,
+            'primeiro_match': bool(data.get('primeiro_match', False))
+        }
+    except ValueError as e:
+        return None, str(e)
+    if inicio is not None and fim is not None and fim < inicio:
+        return None, 'Trecho inválido: inicio deve ser >= 0 e menor ou igual a fim'
+    return parametros, None
+
+def url_imagem(caminho):
+    """URL pública de uma imagem salva em prints_placa (ou numa subpasta dela)"""
+    relativo = os.path.relpath(caminho, detector.save_dir).replace(os.sep, '/')
+    return f"/prints_placa/{relativo}"
+
+def pede_inline():
+    """?inline=1 mantém o formato antigo com as imagens em base64"""
+    return request.args.get('inline') in ('1', 'true')
+
+def pede_tempos():
+    """?tempos=1 inclui na resposta o tempo gasto em cada etapa da busca"""
+    return request.args.get('tempos') in ('1', 'true')
+
+def formata_deteccao(deteccao, inline=False):
+    """Campos de uma detecção enviados para o cliente"""
+    deteccao_processada = {
+        'frame': deteccao['frame'],
+        'placa': deteccao['placa'],
+        'texto_ocr': deteccao['texto_ocr'],
+        'texto_limpo': deteccao['texto_limpo'],
+        'similaridade': deteccao['similaridade'],
+        'confianca': deteccao['confianca'],
+        'timestamp': deteccao['timestamp'],
+        'trilha': deteccao['trilha'],
+        'primeiro_frame': deteccao['primeiro_frame'],
+        'ultimo_frame': deteccao['ultimo_frame'],
+        'frames_com_match': deteccao['frames_com_match'],
+        'frame_url': url_imagem(deteccao['arquivo_frame']),
+        'moto_url': url_imagem(deteccao['arquivo_moto']),
+        'miniatura_frame_url': url_imagem(deteccao['miniatura_frame']),
+        'miniatura_moto_url': url_imagem(deteccao['miniatura_moto'])
+    }
+
+    # Detecções da biblioteca trazem o vídeo e o segundo em que aparecem
+    for campo in ('video_id', 'video', 'segundo'):
+        if campo in deteccao:
+            deteccao_processada[campo] = deteccao[campo]
+
+    if inline:
+        deteccao_processada['frame_base64'] = detector.image_to_base64(deteccao['arquivo_frame'])
+        deteccao_processada['moto_base64'] = detector.image_to_base64(deteccao['arquivo_moto'])
+
+    return deteccao_processada
+
+def formata_resultado(resultado, inline=False, tempos=False):
+    """Monta a resposta da busca a partir do resultado do detector"""
+    resposta = {
+        'sucesso': resultado['sucesso'],
+        'placa_pesquisada': resultado['placa_pesquisada'],
+        'total_deteccoes': resultado['total_deteccoes'],
+        'variacoes_buscadas': resultado['variacoes_buscadas'],
+        'origem': resultado['origem'],
+        'intervalo_frames': resultado['intervalo_frames'],
+        'trecho': resultado['trecho'],
+        'estatisticas': resultado['estatisticas'],
+        'deteccoes': [formata_deteccao(deteccao, inline) for deteccao in resultado['deteccoes']]
+    }
+    if tempos:
+        resposta['tempos'] = resultado['tempos']
+    return resposta
+
+def formata_video(resultado_video, inline=False):
+    """Resultado de um vídeo da biblioteca"""
+    video = {campo: valor for campo, valor in resultado_video.items() if campo != 'deteccoes'}
+    video['deteccoes'] = [formata_deteccao(deteccao, inline) for deteccao in resultado_video['deteccoes']]
+    return video
+
+def formata_resultado_biblioteca(resultado, inline=False):
+    """Monta a resposta da busca na biblioteca"""
+    resposta = {campo: valor for campo, valor in resultado.items() if campo != 'videos'}
+    resposta['videos'] = [formata_video(video, inline) for video in resultado['videos']]
+    return resposta
+
 @app.route('/api/buscar-placa', methods=['POST'])
+@com_admissao
 def buscar_placa():
     """
     Endpoint para buscar placa no vídeo
-    Recebe JSON: {"placa": "ABC1234", "threshold": 0.8}
+    Recebe JSON: {"placa": "ABC1234", "threshold": 0.8, "usar_indice": true}
+    Opcional: "intervalo_frames" (analisa 1 a cada N frames) ou "fps_amostragem"
+    e "tamanho_lote" (frames por chamada do YOLO)
+    e "modo_execucao" ("sequencial", "pipeline" ou "processos")
+    e "inicio" / "fim" com "unidade" ("segundos" ou "frames") para buscar só num trecho
+    e "primeiro_match": true para parar na primeira detecção
+    As imagens voltam como URLs; use ?inline=1 para recebê-las em base64
+    e ?tempos=1 para receber o tempo gasto em cada etapa
+    Com o servidor lotado responde 429 e o cabeçalho Retry-After
     """
     try:
-        data = request.get_json()
+        placa, parametros, erro = le_parametros_busca(corpo_json())
         
-        if not data or 'placa' not in data:
+        if erro:
             return jsonify({
-                'erro': 'Placa não fornecida',
-                'sucesso': False
-            }), 400
-        
-        placa = data['placa'].strip().upper()
-        threshold = float(data.get('threshold', 0.8))
-        
-        # Validação básica da placa
-        if len(placa) < 6 or len(placa) > 8:
-            return jsonify({
-                'erro': 'Placa deve ter entre 6 e 8 caracteres',
+                'erro': erro,
                 'sucesso': False
             }), 400
         
         print(f"🔍 Iniciando busca por placa: {placa}")
-        print(f"📊 Threshold de similaridade: {threshold}")
+        print(f"📊 Threshold de similaridade: {parametros['threshold']}")
         
         # Executa a busca
-        resultado = detector.buscar_placa(placa, threshold)
+        resultado = detector.buscar_placa(placa, **parametros)
         
         # Prepara resposta
-        resposta = {
-            'sucesso': resultado['sucesso'],
-            'placa_pesquisada': resultado['placa_pesquisada'],
-            'total_deteccoes': resultado['total_deteccoes'],
-            'variacoes_buscadas': resultado['variacoes_buscadas'],
-            'deteccoes': []
-        }
-        
-        # Processa detecções para envio
-        for deteccao in resultado['deteccoes']:
-            deteccao_processada = {
-                'frame': deteccao['frame'],
-                'texto_ocr': deteccao['texto_ocr'],
-                'texto_limpo': deteccao['texto_limpo'],
-                'similaridade': deteccao['similaridade'],
-                'confianca': deteccao['confianca'],
-                'timestamp': deteccao['timestamp'],
-                'frame_base64': deteccao['frame_base64'],
-                'moto_base64': deteccao['moto_base64']
-            }
-            resposta['deteccoes'].append(deteccao_processada)
+        resposta = formata_resultado(resultado, pede_inline(), pede_tempos())
         
         # Log do resultado
         if resultado['sucesso']:
@@ -89,16 +385,456 @@ def buscar_placa():
             'sucesso': False
         }), 500
 
+@app.route('/api/buscar-placas', methods=['POST'])
+@com_admissao
+def buscar_placas():
+    """
+    Endpoint para buscar uma lista de placas (watchlist) numa única passada pelo vídeo
+    Recebe JSON: {"placas": ["ABC1234", "TAT9G95"], "threshold": 0.8}
+    Aceita as mesmas opções de /api/buscar-placa
+    Retorna as detecções agrupadas por placa
+    """
+    try:
+        placas, parametros, erro = le_lista_placas(corpo_json())
+
+        if erro:
+            return jsonify({
+                'erro': erro,
+                'sucesso': False
+            }), 400
+
+        print(f"🔍 Iniciando busca por {len(placas)} placa(s)")
+        resultado = detector.buscar_placas(placas, **parametros)
+
+        inline = pede_inline()
+        resposta = {
+            'sucesso': resultado['sucesso'],
+            'placas_pesquisadas': resultado['placas_pesquisadas'],
+            'placas_encontradas': resultado['placas_encontradas'],
+            'total_deteccoes': resultado['total_deteccoes'],
+            'origem': resultado['origem'],
+            'intervalo_frames': resultado['intervalo_frames'],
+            'trecho': resultado['trecho'],
+            'estatisticas': resultado['estatisticas'],
+            'deteccoes_por_placa': {
+                placa: [formata_deteccao(deteccao, inline) for deteccao in deteccoes]
+                for placa, deteccoes in resultado['deteccoes_por_placa'].items()
+            }
+        }
+        if pede_tempos():
+            resposta['tempos'] = resultado['tempos']
+
+        print(f"✅ Busca concluída: {len(resultado['placas_encontradas'])} de "
+              f"{len(placas)} placa(s) encontrada(s)")
+
+        return jsonify(resposta)
+
+    except Exception as e:
+        print(f"❌ Erro na busca: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def criar_job():
+    """
+    Inicia uma busca em segundo plano e retorna o id do job
+    Recebe o mesmo JSON de /api/buscar-placa
+    """
+    try:
+        placa, parametros, erro = le_parametros_busca(corpo_json())
+
+        if erro:
+            return jsonify({
+                'erro': erro,
+                'sucesso': False
+            }), 400
+
+        job = jobs.submete(placa, **parametros)
+        print(f"📥 Job {job.id} criado para a placa {placa}")
+
+        return jsonify({
+            'sucesso': True,
+            'job_id': job.id,
+            'progresso': f'/api/jobs/{job.id}',
+            'eventos': f'/api/jobs/{job.id}/eventos'
+        }), 202
+
+    except Sobrecarga as e:
+        return resposta_sobrecarga(e)
+    except Exception as e:
+        print(f"❌ Erro ao criar job: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def status_job(job_id):
+    """Progresso do job (frames, detecções até agora, ETA) e resultado quando concluído"""
+    job = jobs.obtem(job_id)
+    if job is None:
+        return jsonify({'erro': 'Job não encontrado', 'sucesso': False}), 404
+
+    inline = pede_inline()
+    resposta = job.progresso_atual()
+    resposta['deteccoes'] = [formata_deteccao(deteccao, inline) for deteccao in job.deteccoes]
+    if job.resultado is not None and job.tipo == 'biblioteca':
+        resposta['resultado'] = formata_resultado_biblioteca(job.resultado, inline)
+    elif job.resultado is not None:
+        resposta['resultado'] = formata_resultado(job.resultado, inline, pede_tempos())
+
+    return jsonify(resposta)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancelar_job(job_id):
+    """Cancela um job na fila ou em execução"""
+    job = jobs.cancela(job_id)
+    if job is None:
+        return jsonify({'erro': 'Job não encontrado', 'sucesso': False}), 404
+
+    return jsonify(job.progresso_atual())
+
+@app.route('/api/jobs/<job_id>/eventos', methods=['GET'])
+def eventos_job(job_id):
+    """
+    Stream dos eventos do job
+    Padrão: Server-Sent Events; com ?formato=ndjson envia um JSON por linha
+    """
+    job = jobs.obtem(job_id)
+    if job is None:
+        return jsonify({'erro': 'Job não encontrado', 'sucesso': False}), 404
+
+    ndjson = request.args.get('formato') == 'ndjson'
+    inline = pede_inline()
+
+    def gera():
+        posicao = 0
+        while True:
+            eventos = job.eventos_desde(posicao)
+            if not eventos and not job.finalizado():
+                # Mantém a conexão viva atrás de proxies
+                yield '\n' if ndjson else ': ping\n\n'
+                continue
+
+            for evento in eventos:
+                posicao += 1
+                dados = evento['dados']
+                if evento['tipo'] == 'deteccao':
+                    dados = formata_deteccao(dados, inline)
+                elif evento['tipo'] == 'video':
+                    dados = formata_video(dados, inline)
+
+                if ndjson:
+                    yield json.dumps({'tipo': evento['tipo'], 'dados': dados}) + '\n'
+                else:
+                    yield f"event: {evento['tipo']}\ndata: {json.dumps(dados)}\n\n"
+
+            if job.finalizado() and posicao >= len(job.eventos):
+                return
+
+    mimetype = 'application/x-ndjson' if ndjson else 'text/event-stream'
+    return Response(stream_with_context(gera()), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/biblioteca', methods=['GET'])
+def listar_biblioteca():
+    """Pastas/globs registrados e os vídeos encontrados, na ordem de processamento"""
+    ordem = request.args.get('ordem', 'prioridade')
+    if ordem not in ORDENS_BIBLIOTECA:
+        return jsonify({'erro': f'Ordem deve ser uma de: {", ".join(ORDENS_BIBLIOTECA)}', 'sucesso': False}), 400
+
+    videos = biblioteca.lista(ordem)
+    return jsonify({
+        'sucesso': True,
+        'fontes': biblioteca.fontes,
+        'total_videos': len(videos),
+        'videos': videos
+    })
+
+@app.route('/api/biblioteca', methods=['POST'])
+def registrar_biblioteca():
+    """
+    Registra uma pasta ou glob de vídeos
+    Recebe JSON: {"padrao": "/videos/camera1/*.mp4", "prioridade": 0}
+    """
+    data = corpo_json() or {}
+    padrao = str(data.get('padrao', '')).strip()
+    if not padrao:
+        return jsonify({'erro': 'Padrão (pasta ou glob) não fornecido', 'sucesso': False}), 400
+
+    try:
+        padrao = biblioteca.normaliza(padrao)
+        prioridade = le_numero(data, 'prioridade', int, padrao=0)
+    except ValueError as e:
+        return jsonify({'erro': str(e), 'sucesso': False}), 400
+
+    total = biblioteca.registra(padrao, prioridade)
+    print(f"📚 Biblioteca: {padrao} ({total} vídeo(s))")
+    return jsonify({'sucesso': True, 'padrao': padrao, 'videos_encontrados': total})
+
+@app.route('/api/biblioteca', methods=['DELETE'])
+def remover_biblioteca():
+    """Remove um padrão registrado. Recebe JSON: {"padrao": "..."}"""
+    data = corpo_json() or {}
+    if not biblioteca.remove(str(data.get('padrao', '')).strip()):
+        return jsonify({'erro': 'Padrão não registrado', 'sucesso': False}), 404
+    return jsonify({'sucesso': True})
+
+@app.route('/api/biblioteca/buscar', methods=['POST'])
+@com_admissao_biblioteca
+def buscar_biblioteca():
+    """
+    Busca uma placa ("placa") ou lista de placas ("placas") em todos os vídeos registrados
+    "ordem": "prioridade" (padrão) ou "recentes"; aceita as opções de /api/buscar-placa
+    Retorna um resultado por vídeo, com id do vídeo e segundo de cada detecção
+    """
+    try:
+        placas, ordem, parametros, erro = le_parametros_biblioteca(corpo_json())
+        if erro:
+            return jsonify({'erro': erro, 'sucesso': False}), 400
+
+        resultado = busca_biblioteca.executa(placas, ordem, **parametros)
+        return jsonify(formata_resultado_biblioteca(resultado, pede_inline()))
+
+    except Exception as e:
+        print(f"❌ Erro na busca na biblioteca: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
+@app.route('/api/biblioteca/jobs', methods=['POST'])
+def criar_job_biblioteca():
+    """
+    Busca na biblioteca em segundo plano: cada vídeo concluído chega como evento 'video'
+    em /api/jobs/<job_id>/eventos; o progresso é contado em vídeos
+    """
+    try:
+        placas, ordem, parametros, erro = le_parametros_biblioteca(corpo_json())
+        if erro:
+            return jsonify({'erro': erro, 'sucesso': False}), 400
+
+        job = jobs.submete(placas, tipo='biblioteca', vagas=busca_biblioteca.max_videos_simultaneos,
+                           executa=lambda job: busca_biblioteca.executa(placas, ordem, acompanhamento=job, **parametros))
+        print(f"📥 Job {job.id} criado para a biblioteca")
+
+        return jsonify({
+            'sucesso': True,
+            'job_id': job.id,
+            'progresso': f'/api/jobs/{job.id}',
+            'eventos': f'/api/jobs/{job.id}/eventos'
+        }), 202
+
+    except Sobrecarga as e:
+        return resposta_sobrecarga(e)
+    except Exception as e:
+        print(f"❌ Erro ao criar job: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
+def le_placas_monitor(data):
+    """Lista de placas do monitor ao vivo (pode ser vazia); retorna (placas, erro)"""
+    placas = data.get('placas', [])
+    if not isinstance(placas, list) or len(placas) > MAX_PLACAS_LISTA:
+        return None, f'"placas" deve ser uma lista com até {MAX_PLACAS_LISTA} placas'
+    placas = [str(placa).strip().upper() for placa in placas]
+    return placas, erro_formato_placas(placas)
+
+@app.route('/api/ao-vivo', methods=['POST'])
+def iniciar_monitor():
+    """
+    Inicia o monitoramento contínuo de uma fonte ao vivo
+    Recebe JSON: {"fonte": "entrada", "placas": ["TAT9G95"], "threshold": 0.8}
+    "fonte" é o nome de uma câmera de CAMERAS_AO_VIVO ou uma URL RTSP/HTTP de um host em HOSTS_AO_VIVO
+    O monitor ocupa uma vaga da admissão enquanto roda: 429 se não houver vaga ou já houver MAX_MONITORES
+    Os alertas chegam em /api/ao-vivo/<monitor_id>/eventos
+    """
+    limpa_monitores_antigos()
+    try:
+        data = corpo_json() or {}
+        fonte = str(data.get('fonte', '')).strip()
+        if not fonte:
+            return jsonify({'erro': 'Fonte não fornecida', 'sucesso': False}), 400
+        try:
+            fonte = resolve_fonte(fonte, cameras_ao_vivo, hosts_ao_vivo)
+        except ValueError as e:
+            return jsonify({'erro': str(e), 'sucesso': False}), 400
+        placas, erro = le_placas_monitor(data)
+        if erro:
+            return jsonify({'erro': erro, 'sucesso': False}), 400
+        try:
+            threshold = le_numero(data, 'threshold', padrao=0.8, minimo=0, maximo=1)
+        except ValueError as e:
+            return jsonify({'erro': str(e), 'sucesso': False}), 400
+
+        monitor = MonitorAoVivo(detector, fonte, placas, threshold=threshold,
+                                repetir=bool(data.get('repetir', True)), ao_terminar=libera_monitor)
+        with trava_monitores:
+            if len(monitores_ativos) >= MAX_MONITORES:
+                raise Sobrecarga(f"Limite de {MAX_MONITORES} monitor(es) ao vivo atingido", admissao.retry_after())
+            admissao.ocupa('o monitor ao vivo')
+            monitores_ativos.add(monitor.id)
+        monitores[monitor.id] = monitor
+        monitor.inicia()
+
+        return jsonify({
+            'sucesso': True,
+            'monitor_id': monitor.id,
+            'estado': f'/api/ao-vivo/{monitor.id}',
+            'eventos': f'/api/ao-vivo/{monitor.id}/eventos'
+        }), 202
+
+    except Sobrecarga as e:
+        return resposta_sobrecarga(e)
+    except Exception as e:
+        print(f"❌ Erro ao iniciar monitor: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
+@app.route('/api/ao-vivo', methods=['GET'])
+def listar_monitores():
+    """Estado de todos os monitores ao vivo"""
+    limpa_monitores_antigos()
+    return jsonify({'monitores': [monitor.estado() for monitor in monitores.values()]})
+
+@app.route('/api/ao-vivo/<monitor_id>', methods=['GET'])
+def estado_monitor(monitor_id):
+    """Frames capturados/processados/descartados, alertas e latências do monitor"""
+    monitor = monitores.get(monitor_id)
+    if monitor is None:
+        return jsonify({'erro': 'Monitor não encontrado', 'sucesso': False}), 404
+    return jsonify(monitor.estado())
+
+@app.route('/api/ao-vivo/<monitor_id>/placas', methods=['PUT'])
+def atualizar_placas_monitor(monitor_id):
+    """Troca a watchlist do monitor sem pará-lo. Recebe JSON: {"placas": [...]}"""
+    monitor = monitores.get(monitor_id)
+    if monitor is None:
+        return jsonify({'erro': 'Monitor não encontrado', 'sucesso': False}), 404
+
+    placas, erro = le_placas_monitor(corpo_json() or {})
+    if erro:
+        return jsonify({'erro': erro, 'sucesso': False}), 400
+    monitor.atualiza_placas(placas)
+    return jsonify({'sucesso': True, 'placas': list(monitor.placas)})
+
+@app.route('/api/ao-vivo/<monitor_id>', methods=['DELETE'])
+def parar_monitor(monitor_id):
+    """Para o monitor e o remove da lista"""
+    monitor = monitores.pop(monitor_id, None)
+    if monitor is None:
+        return jsonify({'erro': 'Monitor não encontrado', 'sucesso': False}), 404
+    monitor.para()
+    return jsonify(monitor.estado())
+
+@app.route('/api/ao-vivo/<monitor_id>/eventos', methods=['GET'])
+def eventos_monitor(monitor_id):
+    """
+    Stream dos alertas do monitor (Server-Sent Events; ?formato=ndjson para um JSON por linha)
+    Os alertas trazem latencia_ms, da captura do frame até o alerta
+    """
+    monitor = monitores.get(monitor_id)
+    if monitor is None:
+        return jsonify({'erro': 'Monitor não encontrado', 'sucesso': False}), 404
+
+    ndjson = request.args.get('formato') == 'ndjson'
+    inline = pede_inline()
+
+    def gera():
+        # Só os alertas a partir da conexão
+        posicao = monitor.posicao_base + len(monitor.eventos)
+        while True:
+            eventos, posicao = monitor.eventos_desde(posicao)
+            if not eventos and not monitor.finalizado():
+                yield '\n' if ndjson else ': ping\n\n'
+                continue
+
+            for evento in eventos:
+                dados = evento['dados']
+                if evento['tipo'] == 'alerta':
+                    dados = dict(formata_deteccao(dados, inline), monitor_id=dados['monitor_id'],
+                                 capturado_em=dados['capturado_em'], alertado_em=dados['alertado_em'],
+                                 latencia_ms=dados['latencia_ms'])
+
+                if ndjson:
+                    yield json.dumps({'tipo': evento['tipo'], 'dados': dados}) + '\n'
+                else:
+                    yield f"event: {evento['tipo']}\ndata: {json.dumps(dados)}\n\n"
+
+            if monitor.finalizado() and not eventos:
+                return
+
+    mimetype = 'application/x-ndjson' if ndjson else 'text/event-stream'
+    return Response(stream_with_context(gera()), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/indexar', methods=['POST'])
+@com_admissao
+def indexar():
+    """
+    Endpoint para indexar o vídeo (YOLO + OCR uma única vez)
+    Recebe JSON opcional: {"forcar": true} para refazer o índice
+    e "intervalo_frames" / "fps_amostragem" para a amostragem
+    """
+    try:
+        if not os.path.exists(detector.video_path):
+            return jsonify({
+                'erro': f'Vídeo {detector.video_path} não encontrado',
+                'sucesso': False
+            }), 404
+
+        data = corpo_json() or {}
+        try:
+            intervalo_frames = le_numero(data, 'intervalo_frames', int, minimo=0) or None
+            fps_amostragem = le_numero(data, 'fps_amostragem', minimo=0) or None
+        except ValueError as e:
+            return jsonify({'erro': str(e), 'sucesso': False}), 400
+        info_indice = detector.indexar_video(
+            forcar=bool(data.get('forcar', False)),
+            intervalo_frames=intervalo_frames,
+            fps_amostragem=fps_amostragem
+        )
+
+        return jsonify({
+            'sucesso': True,
+            'indice': info_indice
+        })
+
+    except Exception as e:
+        print(f"❌ Erro na indexação: {str(e)}")
+        return jsonify({
+            'erro': f'Erro interno: {str(e)}',
+            'sucesso': False
+        }), 500
+
 @app.route('/api/status', methods=['GET'])
 def status():
     """Endpoint para verificar status da API"""
+    video_existe = os.path.exists(detector.video_path)
     return jsonify({
         'status': 'online',
         'timestamp': datetime.now().isoformat(),
-        'video_existe': os.path.exists(detector.video_path),
-        'modelo_carregado': detector.model is not None
+        'video_existe': video_existe,
+        'indice_existe': video_existe and detector.indice.existe(detector.video_path, detector.parametros_indice()),
+        'modelo_carregado': detector.estado_modelos == 'pronto',
+        'modelos': detector.estado(),
+        'cache_ocr': detector.cache_ocr.resumo() if detector.cache_ocr else None,
+        'admissao': admissao.estado(),
+        'jobs_na_fila': jobs.na_fila()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metricas():
+    """Latência por etapa e contadores no formato de texto do Prometheus"""
+    return Response(detector.metricas.formato_prometheus(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/info', methods=['GET'])
 def info():
     """Informações sobre a API"""
@@ -109,15 +845,28 @@ def info():
         'endpoints': {
             '/': 'Interface web',
             '/api/buscar-placa': 'POST - Buscar placa no vídeo',
+            '/api/buscar-placas': 'POST - Buscar lista de placas numa única passada',
+            '/api/indexar': 'POST - Indexar leituras do vídeo',
+            '/api/biblioteca': 'GET - Vídeos registrados / POST - Registrar pasta ou glob / DELETE - Remover',
+            '/api/biblioteca/buscar': 'POST - Buscar placa(s) em todos os vídeos registrados',
+            '/api/biblioteca/jobs': 'POST - Busca na biblioteca em segundo plano (um evento por vídeo)',
+            '/api/jobs': 'POST - Iniciar busca em segundo plano',
+            '/api/jobs/<job_id>': 'GET - Progresso do job / DELETE - Cancelar',
+            '/api/jobs/<job_id>/eventos': 'GET - Stream de eventos (SSE ou ?formato=ndjson)',
+            '/api/ao-vivo': 'POST - Monitorar fonte ao vivo / GET - Monitores ativos',
+            '/api/ao-vivo/<monitor_id>': 'GET - Estado e latências / DELETE - Parar',
+            '/api/ao-vivo/<monitor_id>/placas': 'PUT - Trocar a watchlist',
+            '/api/ao-vivo/<monitor_id>/eventos': 'GET - Stream de alertas (SSE ou ?formato=ndjson)',
             '/api/status': 'GET - Status da API',
+            '/api/metrics': 'GET - Métricas no formato do Prometheus',
             '/api/info': 'GET - Informações da API'
         }
     })
 
-@app.route('/prints_placa/<filename>')
+@app.route('/prints_placa/<path:filename>')
 def serve_image(filename):
-    """Serve imagens salvas"""
-    return send_from_directory('prints_placa', filename)
+    """Serve imagens salvas (com ETag e cache: os nomes não se repetem entre buscas)"""
+    return send_from_directory(detector.save_dir, filename, max_age=3600, etag=True, conditional=True)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,180 @@
+import threading
+
+import cv2
+import numpy as np
+
+# Backends de detecção disponíveis e o arquivo de modelo padrão de cada um
+BACKENDS_DETECCAO = {
+    'ultralytics': 'yolov8n.pt',
+    'onnx': 'yolov8n.onnx',
+    'onnx_int8': 'yolov8n_int8.onnx'
+}
+
+# Mesmos padrões do ultralytics, para os backends devolverem as mesmas caixas
+TAMANHO_ENTRADA = 640
+CONFIANCA_MIN = 0.25
+IOU_NMS = 0.7
+
+
+def letterbox(frame, tamanho=TAMANHO_ENTRADA):
+    """Redimensiona mantendo a proporção e completa com cinza, como o ultralytics"""
+    altura, largura = frame.shape[:2]
+    escala = min(tamanho / altura, tamanho / largura)
+    nova_altura, nova_largura = round(altura * escala), round(largura * escala)
+    redimensionado = cv2.resize(frame, (nova_largura, nova_altura), interpolation=cv2.INTER_LINEAR)
+
+    topo = (tamanho - nova_altura) // 2
+    esquerda = (tamanho - nova_largura) // 2
+    tela = np.full((tamanho, tamanho, 3), 114, dtype=np.uint8)
+    tela[topo:topo + nova_altura, esquerda:esquerda + nova_largura] = redimensionado
+    return tela, escala, (esquerda, topo)
+
+
+def prepara_lote(frames: list, tamanho=TAMANHO_ENTRADA):
+    """Frames BGR -> tensor NCHW RGB float32 (0 a 1) e os dados para desfazer o letterbox"""
+    entradas = []
+    ajustes = []
+    for frame in frames:
+        tela, escala, deslocamento = letterbox(frame, tamanho)
+        entradas.append(tela[:, :, ::-1].transpose(2, 0, 1))
+        ajustes.append((escala, deslocamento, frame.shape[1], frame.shape[0]))
+    return np.ascontiguousarray(np.stack(entradas), dtype=np.float32) / 255.0, ajustes
+
+
+def pos_processa(saida, ajuste, confianca_min=CONFIANCA_MIN, iou_nms=IOU_NMS) -> list:
+    """
+    Saída do YOLOv8 exportado (84 x 8400: cx, cy, w, h + 80 classes) -> [(box, classe, confianca)]
+    com NMS por classe e as caixas em pixels do frame original
+    """
+    escala, (esquerda, topo), largura, altura = ajuste
+    predicoes = saida.T
+    pontuacoes = predicoes[:, 4:]
+    classes = pontuacoes.argmax(axis=1)
+    confiancas = pontuacoes[np.arange(len(classes)), classes]
+
+    mantidas = confiancas >= confianca_min
+    if not mantidas.any():
+        return []
+    cx, cy, w, h = predicoes[mantidas, :4].T
+    classes, confiancas = classes[mantidas], confiancas[mantidas]
+
+    x1 = np.clip((cx - w / 2 - esquerda) / escala, 0, largura)
+    y1 = np.clip((cy - h / 2 - topo) / escala, 0, altura)
+    x2 = np.clip((cx + w / 2 - esquerda) / escala, 0, largura)
+    y2 = np.clip((cy + h / 2 - topo) / escala, 0, altura)
+
+    caixas = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1)
+    indices = cv2.dnn.NMSBoxesBatched(caixas.tolist(), confiancas.tolist(), classes.tolist(),
+                                      confianca_min, iou_nms)
+    return [((int(x1[i]), int(y1[i]), int(x2[i]), int(y2[i])), int(classes[i]), float(confiancas[i]))
+            for i in np.array(indices).flatten()]
+
+
+class BackendDeteccao:
+    """
+    Interface comum dos backends de detecção.
+    detecta() recebe uma lista de frames BGR e devolve, para cada frame,
+    a lista de (box (x1, y1, x2, y2), classe COCO, confianca).
+    tamanho (opcional) é o lado da entrada da rede, múltiplo de 32, para imagens já reduzidas.
+    """
+
+    nome = None
+
+    def detecta(self, frames: list, tamanho=None) -> list:
+        raise NotImplementedError
+
+
+class BackendUltralytics(BackendDeteccao):
+    """Modelo original do ultralytics rodando em PyTorch"""
+
+    nome = 'ultralytics'
+
+    def __init__(self, arquivo=None):
+        from ultralytics import YOLO
+        self.arquivo = arquivo or BACKENDS_DETECCAO['ultralytics']
+        self.modelo = YOLO(self.arquivo)
+        # O predictor do ultralytics não pode ser usado por duas threads ao mesmo tempo
+        self._trava = threading.Lock()
+
+    def detecta(self, frames: list, tamanho=None) -> list:
+        with self._trava:
+            resultados = self.modelo(frames, imgsz=tamanho or TAMANHO_ENTRADA, verbose=False)
+
+        deteccoes_por_frame = []
+        for results in resultados:
+            deteccoes = []
+            if results.boxes is not None:
+                for box, cls, conf in zip(results.boxes.xyxy, results.boxes.cls, results.boxes.conf):
+                    deteccoes.append((tuple(map(int, box)), int(cls), float(conf)))
+            deteccoes_por_frame.append(deteccoes)
+        return deteccoes_por_frame
+
+
+class BackendOnnx(BackendDeteccao):
+    """
+    Modelo exportado para ONNX rodando no ONNX Runtime (CPU).
+    Serve tanto para o modelo FP32 quanto para o quantizado em INT8.
+    """
+
+    nome = 'onnx'
+
+    def __init__(self, arquivo=None, threads=None):
+        import onnxruntime as ort
+
+        self.arquivo = arquivo or BACKENDS_DETECCAO[self.nome]
+        opcoes = ort.SessionOptions()
+        if threads:
+            opcoes.intra_op_num_threads = threads
+        self.sessao = ort.InferenceSession(self.arquivo, opcoes, providers=['CPUExecutionProvider'])
+
+        entrada = self.sessao.get_inputs()[0]
+        self.nome_entrada = entrada.name
+        self.tamanho = entrada.shape[2] if isinstance(entrada.shape[2], int) else TAMANHO_ENTRADA
+        # Exportado com dynamic=True: aceita entradas menores que 640
+        self.tamanho_dinamico = not isinstance(entrada.shape[2], int)
+        # Modelos exportados sem dynamic=True só aceitam um frame por chamada
+        self.lote_fixo = entrada.shape[0] if isinstance(entrada.shape[0], int) else None
+
+    def detecta(self, frames: list, tamanho=None) -> list:
+        if not frames:
+            return []
+
+        tensor, ajustes = prepara_lote(frames, tamanho if tamanho and self.tamanho_dinamico else self.tamanho)
+        if self.lote_fixo:
+            saidas = np.concatenate([
+                self.sessao.run(None, {self.nome_entrada: tensor[i:i + self.lote_fixo]})[0]
+                for i in range(0, len(frames), self.lote_fixo)
+            ])
+        else:
+            saidas = self.sessao.run(None, {self.nome_entrada: tensor})[0]
+
+        return [pos_processa(saida, ajuste) for saida, ajuste in zip(saidas, ajustes)]
+
+
+class BackendOnnxInt8(BackendOnnx):
+    """Modelo ONNX quantizado em INT8 (gerado por exporta_modelo.py --int8)"""
+
+    nome = 'onnx_int8'
+
+
+def nome_backend(backend) -> str:
+    """Nome de um backend dado pelo nome ou pela classe"""
+    return backend if isinstance(backend, str) else backend.nome
+
+
+def cria_backend(nome, arquivo=None) -> BackendDeteccao:
+    """
+    Instancia o backend pelo nome ('ultralytics', 'onnx' ou 'onnx_int8')
+    Aceita também uma subclasse de BackendDeteccao, injetada por quem usa o detector (ex.: benchmarks)
+    """
+    if isinstance(nome, type) and issubclass(nome, BackendDeteccao):
+        return nome(arquivo)
+
+    classes = {
+        'ultralytics': BackendUltralytics,
+        'onnx': BackendOnnx,
+        'onnx_int8': BackendOnnxInt8
+    }
+    if nome not in classes:
+        raise ValueError(f"Backend de detecção inválido: {nome} (use {', '.join(classes)})")
+    return classes[nome](arquivo)
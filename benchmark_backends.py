@@ -0,0 +1,82 @@
+import argparse
+import os
+import time
+
+from backends_deteccao import BACKENDS_DETECCAO, cria_backend
+from benchmark_deteccao import carrega_frames
+from rastreador_motos import iou
+
+
+def motos(deteccoes: list) -> list:
+    """Mesmo filtro do PlacaDetector: motos com confiança acima de 0.5"""
+    return [box for box, cls, conf in deteccoes if cls == 3 and conf > 0.5]
+
+
+def concordancia(referencia: list, outro: list, iou_minimo=0.5) -> dict:
+    """Caixas de moto que batem (IoU >= iou_minimo) entre a referência e outro backend"""
+    iguais = 0
+    total_referencia = 0
+    total_outro = 0
+    for caixas_ref, caixas_outro in zip(referencia, outro):
+        total_referencia += len(caixas_ref)
+        total_outro += len(caixas_outro)
+        livres = list(caixas_outro)
+        for caixa in caixas_ref:
+            melhor = max(livres, key=lambda c: iou(caixa, c), default=None)
+            if melhor is not None and iou(caixa, melhor) >= iou_minimo:
+                iguais += 1
+                livres.remove(melhor)
+
+    return {
+        'recall': iguais / total_referencia if total_referencia else 1.0,
+        'precisao': iguais / total_outro if total_outro else 1.0,
+        'motos': total_outro
+    }
+
+
+def mede_backend(backend, frames: list, tamanho_lote: int):
+    """Latência por frame e as motos de cada frame"""
+    backend.detecta(frames[:tamanho_lote])  # aquecimento
+
+    resultados = []
+    inicio = time.perf_counter()
+    for i in range(0, len(frames), tamanho_lote):
+        resultados.extend(motos(d) for d in backend.detecta(frames[i:i + tamanho_lote]))
+    duracao = time.perf_counter() - inicio
+    return duracao * 1000 / len(frames), resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara latência e detecções entre os backends do YOLO")
+    parser.add_argument("video", nargs="?", default="teste.mp4")
+    parser.add_argument("--intervalo", type=int, default=15)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--backends", default="ultralytics,onnx,onnx_int8")
+    args = parser.parse_args()
+
+    frames = carrega_frames(args.video, args.intervalo, args.max_frames)
+    print(f"🎥 {len(frames)} frames amostrados de {args.video}, lote={args.lote}")
+    print("=" * 50)
+
+    referencia = None
+    for nome in args.backends.split(","):
+        if not os.path.exists(BACKENDS_DETECCAO[nome]):
+            print(f"   {nome:<12} ⚠️  {BACKENDS_DETECCAO[nome]} não encontrado (gere com exporta_modelo.py)")
+            continue
+
+        ms_por_frame, resultados = mede_backend(cria_backend(nome), frames, args.lote)
+        linha = f"   {nome:<12} {ms_por_frame:8.1f} ms/frame"
+
+        # O primeiro backend medido é a referência da concordância
+        if referencia is None:
+            referencia = resultados
+            linha += f"  (referência, {sum(map(len, resultados))} motos)"
+        else:
+            c = concordancia(referencia, resultados)
+            linha += f"  recall {c['recall']:.1%}  precisão {c['precisao']:.1%}  ({c['motos']} motos)"
+        print(linha)
+
+
+if __name__ == "__main__":
+    main()
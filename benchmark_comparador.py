@@ -0,0 +1,126 @@
+import argparse
+import random
+import time
+
+from comparador_placa import ALFABETO, CONFUNDIVEIS, ComparadorPlaca
+from lista_placas import ListaPlacas
+from placa_detector import PlacaDetector
+
+
+def textos_sinteticos(placa: str, quantidade: int, semente: int) -> list:
+    """Mistura leituras parecidas com a placa (com trocas típicas do OCR) e lixo aleatório"""
+    aleatorio = random.Random(semente)
+    textos = []
+    for _ in range(quantidade):
+        if aleatorio.random() < 0.5:
+            texto = list(placa)
+            for i in range(len(texto)):
+                if aleatorio.random() < 0.2 and texto[i] in CONFUNDIVEIS:
+                    texto[i] = aleatorio.choice(sorted(CONFUNDIVEIS[texto[i]]))
+            textos.append(''.join(texto))
+        else:
+            tamanho = aleatorio.randint(2, 9)
+            textos.append(''.join(aleatorio.choice(ALFABETO) for _ in range(tamanho)))
+    return textos
+
+
+def placas_aleatorias(quantidade: int, semente: int) -> list:
+    """Placas no formato AAA#A## / AAA####"""
+    aleatorio = random.Random(semente)
+    letras, numeros = ALFABETO[:26], ALFABETO[26:]
+    placas = set()
+    while len(placas) < quantidade:
+        placas.add(''.join(aleatorio.choice(letras) for _ in range(3)) + aleatorio.choice(numeros)
+                   + aleatorio.choice(ALFABETO) + ''.join(aleatorio.choice(numeros) for _ in range(2)))
+    return sorted(placas)
+
+
+def compara_lista(detector, args):
+    """Lista de placas (índice de n-gramas) contra comparar cada texto com todas as variações"""
+    placas = placas_aleatorias(args.placas, semente=7)
+    variacoes_por_placa = {placa: detector.gera_variacoes_placa(placa) for placa in placas}
+
+    inicio = time.perf_counter()
+    lista = ListaPlacas(variacoes_por_placa, args.threshold)
+    tempo_montagem = time.perf_counter() - inicio
+
+    aleatorio = random.Random(3)
+    textos = []
+    for semente in range(args.textos // 40):
+        textos.extend(textos_sinteticos(aleatorio.choice(placas), 40, semente))
+
+    inicio = time.perf_counter()
+    resultados = []
+    comparacoes = 0
+    for i in range(0, len(textos), args.lote):
+        resultados_lote, comparacoes_lote = lista.compara_lote(textos[i:i + args.lote])
+        resultados.extend(resultados_lote)
+        comparacoes += comparacoes_lote
+    tempo_lista = time.perf_counter() - inicio
+
+    # Referência: a mesma distância contra todas as variações de todas as placas
+    inicio = time.perf_counter()
+    for i in range(0, len(textos), args.lote):
+        lista.comparador.similaridades(textos[i:i + args.lote])
+    tempo_bruto = time.perf_counter() - inicio
+
+    print(f"📋 {len(placas)} placas ({len(lista.comparador.variacoes)} variações), {len(textos)} textos, "
+          f"threshold={args.threshold}")
+    print(f"   todas as variações: {tempo_bruto * 1e6 / len(textos):8.1f} µs/texto")
+    print(f"   índice n-gramas:    {tempo_lista * 1e6 / len(textos):8.1f} µs/texto  "
+          f"({comparacoes / len(textos):.1f} variações/texto, montagem {tempo_montagem * 1000:.1f} ms)")
+    print(f"   🚀 Ganho: {tempo_bruto / tempo_lista:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark do comparador de placas")
+    parser.add_argument("--placa", default="TAT9G95")
+    parser.add_argument("--textos", type=int, default=2000)
+    parser.add_argument("--lote", type=int, default=40, help="Textos por chamada (≈ textos de uma moto)")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--placas", type=int, default=0, help="Mede a busca por lista com N placas")
+    args = parser.parse_args()
+
+    # Só as funções de texto são usadas: não precisa carregar YOLO/EasyOCR
+    antigo = PlacaDetector.__new__(PlacaDetector)
+    if args.placas:
+        compara_lista(antigo, args)
+        return
+
+    variacoes = antigo.gera_variacoes_placa(args.placa)
+    textos = textos_sinteticos(args.placa, args.textos, semente=42) + variacoes
+
+    inicio = time.perf_counter()
+    resultados_antigos = [antigo.is_placa_brasileira_alvo(t, args.placa, args.threshold) for t in textos]
+    tempo_antigo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    comparador = ComparadorPlaca(variacoes, args.threshold)
+    tempo_montagem = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados_novos = []
+    for i in range(0, len(textos), args.lote):
+        resultados_novos.extend(comparador.compara_lote(textos[i:i + args.lote]))
+    tempo_novo = time.perf_counter() - inicio
+
+    # Equivalência: matches exatos precisam ser idênticos nos dois comparadores
+    for texto, antigo_r, novo_r in zip(textos, resultados_antigos, resultados_novos):
+        exato_antigo = antigo_r[1] == 1.0
+        exato_novo = novo_r[1] == 1.0
+        assert exato_antigo == exato_novo, f"Divergência em match exato: {texto} {antigo_r} {novo_r}"
+        if exato_antigo:
+            assert antigo_r[2] == novo_r[2], f"Variação diferente para {texto}: {antigo_r} {novo_r}"
+    print(f"✅ Matches exatos equivalentes ({sum(r[1] == 1.0 for r in resultados_novos)} exatos)")
+
+    matches_antigos = sum(r[0] for r in resultados_antigos)
+    matches_novos = sum(r[0] for r in resultados_novos)
+    print(f"🔤 {len(textos)} textos, lote={args.lote}, threshold={args.threshold}")
+    print(f"   difflib:     {tempo_antigo * 1e6 / len(textos):8.1f} µs/texto  ({matches_antigos} matches)")
+    print(f"   comparador:  {tempo_novo * 1e6 / len(textos):8.1f} µs/texto  ({matches_novos} matches, "
+          f"montagem {tempo_montagem * 1000:.1f} ms)")
+    print(f"   🚀 Ganho: {tempo_antigo / tempo_novo:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
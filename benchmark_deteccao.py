@@ -0,0 +1,59 @@
+import argparse
+import time
+
+from leitor_frames import LeitorFrames, agrupa_em_lotes
+from placa_detector import PlacaDetector
+
+
+def carrega_frames(video_path: str, intervalo: int, max_frames: int) -> list:
+    """Lê os frames amostrados uma vez para reaproveitar em todas as medições"""
+    frames = []
+    for _, frame in LeitorFrames(video_path, intervalo):
+        frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def mede_lote(detector: PlacaDetector, frames: list, tamanho_lote: int) -> dict:
+    """Roda o YOLO em todos os frames com o tamanho de lote informado"""
+    # Aquecimento para não medir a inicialização do modelo
+    detector.detecta_motos_lote(frames[:tamanho_lote])
+
+    inicio = time.perf_counter()
+    total_motos = 0
+    for lote in agrupa_em_lotes(enumerate(frames), tamanho_lote):
+        for motos in detector.detecta_motos_lote([frame for _, frame in lote]):
+            total_motos += len(motos)
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'tamanho_lote': tamanho_lote,
+        'segundos': duracao,
+        'ms_por_frame': duracao * 1000 / len(frames),
+        'frames_por_seg': len(frames) / duracao if duracao > 0 else 0.0,
+        'motos': total_motos
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do YOLO por tamanho de lote")
+    parser.add_argument("video", nargs="?", default="teste.mp4")
+    parser.add_argument("--intervalo", type=int, default=15)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--lotes", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    detector = PlacaDetector(video_path=args.video)
+    frames = carrega_frames(args.video, args.intervalo, args.max_frames)
+    print(f"🎥 {len(frames)} frames amostrados de {args.video}")
+    print("=" * 50)
+
+    for tamanho_lote in [int(t) for t in args.lotes.split(",")]:
+        r = mede_lote(detector, frames, tamanho_lote)
+        print(f"   lote={r['tamanho_lote']:<3} {r['ms_por_frame']:8.1f} ms/frame  "
+              f"{r['frames_por_seg']:6.2f} frames/s  ({r['motos']} motos)")
+
+
+if __name__ == "__main__":
+    main()
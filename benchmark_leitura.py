@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import cv2
+
+from leitor_frames import LeitorFrames
+
+
+def loop_original(video_path: str, intervalo: int) -> int:
+    """Loop antigo: cap.read() em todos os frames e descarta os não amostrados"""
+    cap = cv2.VideoCapture(video_path)
+    frame_num = 0
+    amostrados = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_num += 1
+        if frame_num % intervalo != 0:
+            continue
+        amostrados += 1
+    cap.release()
+    return amostrados
+
+
+def loop_leitor(video_path: str, intervalo: int, limiar_seek) -> int:
+    """Loop novo com o LeitorFrames (grab ou seek)"""
+    amostrados = 0
+    for _ in LeitorFrames(video_path, intervalo, limiar_seek=limiar_seek):
+        amostrados += 1
+    return amostrados
+
+
+def mede(nome: str, funcao, total_frames: int, *args) -> dict:
+    inicio = time.perf_counter()
+    amostrados = funcao(*args)
+    duracao = time.perf_counter() - inicio
+    resultado = {
+        'modo': nome,
+        'segundos': duracao,
+        'frames_amostrados': amostrados,
+        'frames_video_por_seg': total_frames / duracao if duracao > 0 else 0.0
+    }
+    print(f"   {nome:<14} {duracao:8.2f}s  {resultado['frames_video_por_seg']:10.1f} frames/s  "
+          f"({amostrados} amostrados)")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de leitura de frames amostrados")
+    parser.add_argument("video", nargs="?", default="teste.mp4")
+    parser.add_argument("--intervalos", default="15,60,150,300",
+                        help="Intervalos de amostragem separados por vírgula")
+    args = parser.parse_args()
+
+    total_frames = LeitorFrames(args.video).info_video()['total_frames']
+    print(f"🎥 Vídeo: {args.video} ({total_frames} frames)")
+    print("=" * 50)
+
+    for intervalo in [int(i) for i in args.intervalos.split(",")]:
+        print(f"⏱️  Intervalo: 1 a cada {intervalo} frames")
+        original = mede("read+descarta", loop_original, total_frames, args.video, intervalo)
+        grab = mede("grab", loop_leitor, total_frames, args.video, intervalo, None)
+        seek = mede("seek", loop_leitor, total_frames, args.video, intervalo, 1)
+
+        # Os três modos precisam entregar os mesmos frames
+        if not original['frames_amostrados'] == grab['frames_amostrados'] == seek['frames_amostrados']:
+            print("   ⚠️  Quantidade de frames amostrados diferente entre os modos!")
+
+        melhor = min(grab['segundos'], seek['segundos'])
+        print(f"   🚀 Ganho: {original['segundos'] / melhor:.1f}x")
+        print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
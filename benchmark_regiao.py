@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from benchmark_backends import concordancia
+from benchmark_deteccao import carrega_frames
+from leitor_frames import agrupa_em_lotes
+from placa_detector import PlacaDetector
+from regioes_inferencia import RegioesInferencia
+
+
+def le_poligono(texto: str) -> list:
+    """"x,y x,y x,y ..." (coordenadas normalizadas) -> [[x, y], ...]"""
+    return [[float(v) for v in ponto.split(",")] for ponto in texto.split()]
+
+
+def mede_configuracao(detector: PlacaDetector, frames: list, tamanho_lote: int, resolucao, rois) -> dict:
+    """Latência do YOLO, pixels enviados por frame e as motos encontradas com uma resolução/ROI"""
+    detector.regioes = RegioesInferencia({'padrao': {'resolucao': resolucao, 'rois': rois}}) if resolucao or rois else None
+    detector.detecta_motos_lote(frames[:tamanho_lote])  # aquecimento
+
+    antes = detector.metricas.instantaneo()
+    motos = []
+    inicio = time.perf_counter()
+    for lote in agrupa_em_lotes(iter(frames), tamanho_lote):
+        motos.extend(detector.detecta_motos_lote(lote))
+    duracao = time.perf_counter() - inicio
+    contadores = detector.metricas.diferenca(antes)['contadores']
+
+    return {
+        'ms_por_frame': duracao * 1000 / len(frames),
+        'pixels_por_frame': contadores['pixels_inferidos'] / len(frames),
+        'motos': motos
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e pixels do YOLO por resolução de inferência e ROI")
+    parser.add_argument("video", nargs="?", default="teste.mp4")
+    parser.add_argument("--intervalo", type=int, default=15)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--backend", default="ultralytics")
+    parser.add_argument("--resolucoes", default="0,960,640,480,320", help="lado maior enviado ao YOLO (0 = original)")
+    parser.add_argument("--roi", action="append", default=[],
+                        help='polígono normalizado "x,y x,y x,y ..." (pode repetir)')
+    args = parser.parse_args()
+
+    detector = PlacaDetector(video_path=args.video, backend_deteccao=args.backend)
+    frames = carrega_frames(args.video, args.intervalo, args.max_frames)
+    altura, largura = frames[0].shape[:2]
+    rois = [le_poligono(texto) for texto in args.roi]
+    print(f"🎥 {len(frames)} frames {largura}x{altura} de {args.video}, lote={args.lote}, {len(rois)} ROI(s)")
+    print("=" * 50)
+
+    # Referência da concordância: frame inteiro na resolução original
+    referencia = None
+    for usar_roi in ([False, True] if rois else [False]):
+        for resolucao in [int(r) for r in args.resolucoes.split(",")]:
+            r = mede_configuracao(detector, frames, args.lote, resolucao or None, rois if usar_roi else None)
+            nome = f"{'ROI' if usar_roi else 'frame'} {resolucao or 'original'}"
+            linha = (f"   {nome:<14} {r['ms_por_frame']:8.1f} ms/frame  "
+                     f"{r['pixels_por_frame'] / 1e6:6.2f} Mpx/frame ({r['pixels_por_frame'] / (largura * altura):6.1%})")
+            if referencia is None:
+                referencia = r['motos']
+                linha += f"  (referência, {sum(map(len, referencia))} motos)"
+            else:
+                c = concordancia(referencia, r['motos'])
+                linha += f"  recall {c['recall']:.1%}  precisão {c['precisao']:.1%}  ({c['motos']} motos)"
+            print(linha)
+
+
+if __name__ == "__main__":
+    main()
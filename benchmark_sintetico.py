@@ -0,0 +1,417 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import string
+import tempfile
+
+import cv2
+import numpy as np
+
+from backends_deteccao import BACKENDS_DETECCAO, BackendDeteccao
+from placa_detector import MODOS_EXECUCAO, PlacaDetector
+from rastreador_motos import iou
+
+# Carroceria magenta: é a cor que o BackendSintetico procura
+COR_MOTO = (170, 40, 160)
+COR_RODA = (20, 20, 20)
+
+# Parte da moto que precisa estar dentro do frame para ela contar no gabarito
+FRACAO_VISIVEL = 0.5
+
+
+class BackendSintetico(BackendDeteccao):
+    """
+    Detector das motos desenhadas por este benchmark: acha os retângulos na cor COR_MOTO_HSV
+    por limiar de cor e contorno. Não serve para vídeo real e não é um backend do app; é injetado
+    no PlacaDetector para medir OCR, comparação e modos de execução sem depender do que o YOLO reconhece.
+    """
+
+    nome = 'sintetico'
+
+    # Faixa HSV do magenta usado na carroceria das motos sintéticas
+    COR_MOTO_HSV = ((140, 120, 60), (170, 255, 255))
+    AREA_MIN = 0.002
+
+    def __init__(self, arquivo=None):
+        self.arquivo = arquivo
+
+    def detecta(self, frames: list, tamanho=None) -> list:
+        deteccoes_por_frame = []
+        for frame in frames:
+            altura, largura = frame.shape[:2]
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            mascara = cv2.inRange(hsv, *self.COR_MOTO_HSV)
+            mascara = cv2.morphologyEx(mascara, cv2.MORPH_OPEN, None, iterations=1)
+
+            deteccoes = []
+            contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for contorno in contornos:
+                x, y, w, h = cv2.boundingRect(contorno)
+                if w * h >= self.AREA_MIN * largura * altura:
+                    deteccoes.append(((x, y, x + w, y + h), 3, 0.9))
+            deteccoes_por_frame.append(deteccoes)
+        return deteccoes_por_frame
+
+
+def backend_benchmark(nome: str):
+    """'sintetico' vira a classe BackendSintetico; os outros nomes vão direto para o PlacaDetector"""
+    return BackendSintetico if nome == BackendSintetico.nome else nome
+
+
+def gera_placas(quantidade: int, aleatorio: random.Random) -> list:
+    """Placas Mercosul (AAA#A##) sem repetição"""
+    placas = set()
+    while len(placas) < quantidade:
+        placas.add(''.join(aleatorio.choice(string.ascii_uppercase) for _ in range(3))
+                   + aleatorio.choice(string.digits) + aleatorio.choice(string.ascii_uppercase)
+                   + ''.join(aleatorio.choice(string.digits) for _ in range(2)))
+    return sorted(placas)
+
+
+def monta_cenario(largura: int, altura: int, fps: float, duracao_s: float, num_motos: int,
+                  duas_linhas: bool, semente: int) -> dict:
+    """
+    Sorteia as motos do vídeo: cada uma atravessa o frame na horizontal, em janelas
+    de tempo escalonadas, deixando trechos sem moto (frames parados) entre elas
+    """
+    aleatorio = random.Random(semente)
+    total_frames = int(duracao_s * fps)
+    janela = total_frames / num_motos
+    motos = []
+
+    for placa in gera_placas(num_motos, aleatorio):
+        indice = len(motos)
+        h = int(altura * aleatorio.uniform(0.3, 0.42))
+        w = int(h * 0.75)
+        inicio = int(indice * janela + aleatorio.uniform(0, 0.2) * janela) + 1
+        travessia = max(2, int(janela * aleatorio.uniform(0.55, 0.75)))
+        direcao = aleatorio.choice((1, -1))
+        motos.append({
+            'placa': placa,
+            'inicio': inicio,
+            'fim': inicio + travessia,
+            'x0': -w if direcao > 0 else largura,
+            'y': int(aleatorio.uniform(0.1, 0.8) * (altura - h * 1.2)),
+            'velocidade': direcao * (largura + w) / travessia,
+            'w': w,
+            'h': h
+        })
+
+    return {
+        'largura': largura,
+        'altura': altura,
+        'fps': fps,
+        'total_frames': total_frames,
+        'duas_linhas': duas_linhas,
+        'motos': motos
+    }
+
+
+def caixa_moto(moto: dict, frame_num: int):
+    """Carroceria (x1, y1, x2, y2) da moto no frame, fora da tela inclusive; None fora da janela dela"""
+    if not moto['inicio'] <= frame_num <= moto['fim']:
+        return None
+    x1 = int(moto['x0'] + moto['velocidade'] * (frame_num - moto['inicio']))
+    return x1, moto['y'], x1 + moto['w'], moto['y'] + moto['h']
+
+
+def gabarito_frame(cenario: dict, frame_num: int) -> list:
+    """(placa, box recortado ao frame) das motos suficientemente visíveis no frame"""
+    visiveis = []
+    for moto in cenario['motos']:
+        caixa = caixa_moto(moto, frame_num)
+        if caixa is None:
+            continue
+        x1, y1 = max(0, caixa[0]), max(0, caixa[1])
+        x2, y2 = min(cenario['largura'], caixa[2]), min(cenario['altura'], caixa[3])
+        if x2 > x1 and (x2 - x1) * (y2 - y1) >= FRACAO_VISIVEL * moto['w'] * moto['h']:
+            visiveis.append((moto['placa'], (x1, y1, x2, y2)))
+    return visiveis
+
+
+def escreve_centralizado(imagem, texto: str, x1: int, y1: int, x2: int, y2: int):
+    """Texto preto ocupando a largura do retângulo"""
+    fonte = cv2.FONT_HERSHEY_SIMPLEX
+    espessura = max(1, (y2 - y1) // 12)
+    (w, h), _ = cv2.getTextSize(texto, fonte, 1.0, espessura)
+    escala = min(0.9 * (x2 - x1) / w, 0.7 * (y2 - y1) / h)
+    (w, h), _ = cv2.getTextSize(texto, fonte, escala, espessura)
+    origem = (x1 + (x2 - x1 - w) // 2, y1 + (y2 - y1 + h) // 2)
+    cv2.putText(imagem, texto, origem, fonte, escala, (0, 0, 0), espessura, cv2.LINE_AA)
+
+
+def desenha_moto(frame, moto: dict, caixa: tuple, duas_linhas: bool):
+    """Carroceria, rodas e placa branca com o texto"""
+    x1, y1, x2, y2 = caixa
+    w, h = x2 - x1, y2 - y1
+    cv2.rectangle(frame, (x1, y1), (x2, y2), COR_MOTO, -1)
+    raio = max(3, w // 6)
+    for cx in (x1 + raio, x2 - raio):
+        cv2.circle(frame, (cx, y2 + raio), raio, COR_RODA, -1)
+
+    largura_placa = int(w * 0.8)
+    altura_placa = int(largura_placa * (0.75 if duas_linhas else 0.32))
+    px1 = x1 + (w - largura_placa) // 2
+    py1 = y1 + int(h * 0.92) - altura_placa
+    px2, py2 = px1 + largura_placa, py1 + altura_placa
+    cv2.rectangle(frame, (px1, py1), (px2, py2), (255, 255, 255), -1)
+    cv2.rectangle(frame, (px1, py1), (px2, py2), (0, 0, 0), max(1, altura_placa // 20))
+
+    if duas_linhas:
+        meio = (py1 + py2) // 2
+        escreve_centralizado(frame, moto['placa'][:3], px1, py1, px2, meio)
+        escreve_centralizado(frame, moto['placa'][3:], px1, meio, px2, py2)
+    else:
+        escreve_centralizado(frame, moto['placa'], px1, py1, px2, py2)
+
+
+def gera_fundo(largura: int, altura: int, aleatorio: random.Random):
+    """Fundo fixo: gradiente cinza, blocos sem saturação e uma placa de sinalização com texto"""
+    gradiente = np.linspace(70, 150, altura, dtype=np.uint8)[:, None]
+    fundo = np.repeat(np.repeat(gradiente, largura, axis=1)[:, :, None], 3, axis=2)
+    for _ in range(6):
+        x, y = aleatorio.randrange(largura), aleatorio.randrange(altura)
+        tom = aleatorio.randint(40, 200)
+        cv2.rectangle(fundo, (x, y), (x + largura // 6, y + altura // 8), (tom, tom, tom), -1)
+
+    # Texto que não é placa, para o OCR e a comparação terem o que descartar
+    sx1, sy1 = largura // 20, altura // 20
+    cv2.rectangle(fundo, (sx1, sy1), (sx1 + largura // 5, sy1 + altura // 12), (230, 230, 230), -1)
+    escreve_centralizado(fundo, "PATIO 3", sx1, sy1, sx1 + largura // 5, sy1 + altura // 12)
+    return fundo
+
+
+def gera_video(caminho: str, cenario: dict, ruido: float, desfoque: int, semente: int) -> str:
+    """Renderiza o cenário num .mp4 com ruído gaussiano (desvio em níveis de cinza) e desfoque"""
+    aleatorio = random.Random(semente)
+    gerador_ruido = np.random.default_rng(semente)
+    largura, altura = cenario['largura'], cenario['altura']
+    fundo = gera_fundo(largura, altura, aleatorio)
+
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*'mp4v'), cenario['fps'], (largura, altura))
+    if not escritor.isOpened():
+        raise RuntimeError(f"Não foi possível criar o vídeo {caminho}")
+
+    for frame_num in range(1, cenario['total_frames'] + 1):
+        frame = fundo.copy()
+        for moto in cenario['motos']:
+            caixa = caixa_moto(moto, frame_num)
+            if caixa is not None:
+                desenha_moto(frame, moto, caixa, cenario['duas_linhas'])
+
+        if desfoque > 1:
+            k = desfoque if desfoque % 2 else desfoque + 1
+            frame = cv2.GaussianBlur(frame, (k, k), 0)
+        if ruido > 0:
+            frame = np.clip(frame + gerador_ruido.normal(0, ruido, frame.shape), 0, 255).astype(np.uint8)
+        escritor.write(frame)
+
+    escritor.release()
+    return caminho
+
+
+def avalia_resultado(resultado: dict, cenario: dict, iou_minimo=0.3) -> dict:
+    """
+    Recall: placas do vídeo com pelo menos uma detecção correta.
+    Precisão: detecções cuja placa está mesmo naquele frame, na mesma moto (IoU >= iou_minimo).
+    """
+    placas_reais = [moto['placa'] for moto in cenario['motos']]
+    corretas_por_placa = {}
+    deteccoes = 0
+    corretas = 0
+    for placa, deteccoes_placa in resultado['deteccoes_por_placa'].items():
+        for deteccao in deteccoes_placa:
+            deteccoes += 1
+            if any(p == placa and iou(caixa, deteccao['box']) >= iou_minimo
+                   for p, caixa in gabarito_frame(cenario, deteccao['frame'])):
+                corretas += 1
+                corretas_por_placa[placa] = corretas_por_placa.get(placa, 0) + 1
+
+    return {
+        'recall': sum(1 for p in placas_reais if p in corretas_por_placa) / len(placas_reais),
+        'precisao': corretas / deteccoes if deteccoes else 1.0,
+        'deteccoes': deteccoes,
+        'deteccoes_corretas': corretas,
+        'falsos_positivos': deteccoes - corretas,
+        'placas_reais': len(placas_reais),
+        'placas_encontradas': len(corretas_por_placa)
+    }
+
+
+def memoria_pico_mb() -> float:
+    """Pico de memória residente deste processo e dos filhos (ru_maxrss vem em KB no Linux)"""
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024.0
+
+
+def executa_busca(fila, video_path: str, placas: list, modo: str, opcoes: dict):
+    """Roda uma busca completa num processo novo, para o pico de memória ser só desta execução"""
+    pasta = tempfile.mkdtemp(prefix="benchmark_sintetico_")
+    try:
+        detector = PlacaDetector(video_path=video_path, save_dir=os.path.join(pasta, "prints"),
+                                 index_dir=os.path.join(pasta, "indices"), modo_execucao=modo,
+                                 backend_deteccao=backend_benchmark(opcoes['backend']), tamanho_lote=opcoes['lote'],
+                                 tamanho_lote_ocr=opcoes['lote_ocr'], espera_lote_ocr_ms=opcoes['espera_ocr_ms'],
+                                 amostragem_adaptativa=opcoes['amostragem'] == 'adaptativa',
+                                 passo_grosso=opcoes['passo_grosso'], passo_fino=opcoes['passo_fino'],
+                                 raio_refino=opcoes['raio_refino'])
+        resultado = detector.buscar_placas(placas, threshold=opcoes['threshold'], usar_indice=False,
+                                           intervalo_frames=opcoes['intervalo'])
+        detector.fecha_pool()
+        fila.put({
+            'resultado': {'deteccoes_por_placa': resultado['deteccoes_por_placa']},
+            'estatisticas': resultado['estatisticas'],
+            'tempos': resultado['tempos'],
+            'tempos_modelos': detector.estado()['tempos'],
+            'memoria_pico_mb': memoria_pico_mb()
+        })
+    except Exception as e:
+        fila.put({'erro': f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def mede_modo(video_path: str, placas: list, modo: str, opcoes: dict) -> dict:
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=executa_busca, args=(fila, video_path, placas, modo, opcoes))
+    processo.start()
+    saida = fila.get()
+    processo.join()
+    return saida
+
+
+def resumo_execucao(modo: str, amostragem: str, saida: dict, cenario: dict) -> dict:
+    """Linha do JSON de uma execução: velocidade, tempo por etapa, acerto e memória"""
+    if 'erro' in saida:
+        return {'modo': modo, 'amostragem': amostragem, 'erro': saida['erro']}
+
+    estatisticas = saida['estatisticas']
+    return {
+        'modo': modo,
+        'amostragem': amostragem,
+        'frames_processados': estatisticas['frames_processados'],
+        'tempo_total_s': estatisticas['tempo_total_s'],
+        'frames_por_seg': estatisticas['frames_processados'] / estatisticas['tempo_total_s'],
+        'etapas_s': {
+            'carregamento_modelos': saida['tempos_modelos'].get('carregamento_s', 0.0),
+            'aquecimento_modelos': saida['tempos_modelos'].get('aquecimento_s', 0.0),
+            # Tempo de cada etapa medido pelas métricas do detector (somado entre threads/processos)
+            **{etapa: medida['total_s'] for etapa, medida in saida['tempos']['etapas'].items()}
+        },
+        'contadores': saida['tempos']['contadores'],
+        'memoria_pico_mb': saida['memoria_pico_mb'],
+        'acuracia': avalia_resultado(saida['resultado'], cenario),
+        'estatisticas': estatisticas
+    }
+
+
+def le_resolucao(texto: str) -> tuple:
+    largura, altura = texto.lower().split("x")
+    return int(largura), int(altura)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera vídeos sintéticos com placas conhecidas e mede velocidade e acerto da busca")
+    parser.add_argument("--resolucoes", default="1280x720", help="Lista separada por vírgula, ex.: 640x360,1280x720")
+    parser.add_argument("--ruido", default="0,8", help="Desvio do ruído gaussiano (lista)")
+    parser.add_argument("--desfoque", default="0", help="Tamanho do kernel de desfoque (lista, 0 = sem)")
+    parser.add_argument("--duas-linhas", action="store_true", help="Placas de moto em duas linhas")
+    parser.add_argument("--motos", type=int, default=6)
+    parser.add_argument("--duracao", type=float, default=20.0, help="Segundos de vídeo")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--placas-falsas", type=int, default=20, help="Placas buscadas que não estão no vídeo")
+    parser.add_argument("--modos", default=",".join(MODOS_EXECUCAO))
+    parser.add_argument("--backend", default=BackendSintetico.nome,
+                        choices=[BackendSintetico.nome] + list(BACKENDS_DETECCAO),
+                        help="'sintetico' detecta as motos desenhadas; os do YOLO medem o custo real da detecção")
+    parser.add_argument("--intervalo", type=int, default=15)
+    parser.add_argument("--amostragem", default="fixa",
+                        help="Lista com fixa (intervalo) e/ou adaptativa (grosso para o fino), ex.: fixa,adaptativa")
+    parser.add_argument("--passo-grosso", type=int, default=60)
+    parser.add_argument("--passo-fino", type=int, default=5)
+    parser.add_argument("--raio-refino", type=int, default=30)
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--lote-ocr", type=int, default=1, help="Recortes por chamada do EasyOCR (1 = um por vez)")
+    parser.add_argument("--espera-ocr-ms", type=float, default=50, help="Espera máxima do lote de OCR no modo pipeline")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="benchmark_sintetico.json")
+    parser.add_argument("--pasta-videos", help="Mantém os vídeos gerados nesta pasta")
+    args = parser.parse_args()
+
+    opcoes = {'backend': args.backend, 'lote': args.lote, 'threshold': args.threshold, 'intervalo': args.intervalo,
+              'lote_ocr': args.lote_ocr, 'espera_ocr_ms': args.espera_ocr_ms, 'passo_grosso': args.passo_grosso,
+              'passo_fino': args.passo_fino, 'raio_refino': args.raio_refino}
+    pasta_videos = args.pasta_videos or tempfile.mkdtemp(prefix="videos_sinteticos_")
+    os.makedirs(pasta_videos, exist_ok=True)
+    relatorio = {
+        'ambiente': {
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'configuracao': vars(args),
+        'cenarios': []
+    }
+
+    try:
+        combinacoes = itertools.product(args.resolucoes.split(","), args.ruido.split(","), args.desfoque.split(","))
+        for resolucao, ruido, desfoque in combinacoes:
+            largura, altura = le_resolucao(resolucao)
+            cenario = monta_cenario(largura, altura, args.fps, args.duracao, args.motos,
+                                    args.duas_linhas, args.semente)
+            nome = f"sintetico_{largura}x{altura}_ruido{ruido}_desfoque{desfoque}.mp4"
+            video_path = gera_video(os.path.join(pasta_videos, nome), cenario, float(ruido), int(desfoque),
+                                    args.semente)
+
+            # Placas falsas na busca medem falsos positivos da comparação
+            placas_reais = [moto['placa'] for moto in cenario['motos']]
+            falsas = [p for p in gera_placas(args.placas_falsas + len(placas_reais), random.Random(args.semente + 1))
+                      if p not in placas_reais][:args.placas_falsas]
+
+            print(f"🎥 {nome}: {cenario['total_frames']} frames, {len(placas_reais)} motos")
+            execucoes = []
+            for modo, amostragem in itertools.product(args.modos.split(","), args.amostragem.split(",")):
+                saida = mede_modo(video_path, placas_reais + falsas, modo, dict(opcoes, amostragem=amostragem))
+                execucao = resumo_execucao(modo, amostragem, saida, cenario)
+                execucoes.append(execucao)
+                nome_execucao = f"{modo}/{amostragem}"
+                if 'erro' in execucao:
+                    print(f"   {nome_execucao:<22} ❌ {execucao['erro']}")
+                    continue
+                print(f"   {nome_execucao:<22} {execucao['frames_por_seg']:7.2f} frames/s  "
+                      f"{execucao['contadores'].get('frames_inferidos', 0):5d} inferências  "
+                      f"YOLO {execucao['etapas_s'].get('deteccao', 0.0):5.1f}s  OCR {execucao['etapas_s'].get('ocr', 0.0):5.1f}s  "
+                      f"recall {execucao['acuracia']['recall']:.0%}  "
+                      f"precisão {execucao['acuracia']['precisao']:.0%}  "
+                      f"memória {execucao['memoria_pico_mb']:.0f} MB")
+
+            relatorio['cenarios'].append({
+                'video': nome,
+                'resolucao': [largura, altura],
+                'ruido': float(ruido),
+                'desfoque': int(desfoque),
+                'total_frames': cenario['total_frames'],
+                'gabarito': cenario['motos'],
+                'execucoes': execucoes
+            })
+    finally:
+        if not args.pasta_videos:
+            shutil.rmtree(pasta_videos, ignore_errors=True)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"📄 Relatório salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
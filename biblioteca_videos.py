@@ -0,0 +1,244 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from acompanhamento import Acompanhamento, BuscaCancelada
+from leitor_frames import LeitorFrames
+
+# Extensões reconhecidas quando uma pasta é registrada
+EXTENSOES_VIDEO = ('.mp4', '.avi', '.mov', '.mkv', '.m4v')
+
+# Ordens de processamento dos vídeos
+ORDENS_BIBLIOTECA = ('prioridade', 'recentes')
+
+# Pasta padrão sob a qual os padrões da biblioteca precisam ficar
+RAIZ_BIBLIOTECA = 'videos'
+
+
+def dentro_da_pasta(caminho: str, pasta: str) -> bool:
+    """O caminho, com links simbólicos resolvidos, fica dentro da pasta (já resolvida com realpath)"""
+    caminho = os.path.realpath(caminho)
+    return caminho == pasta or caminho.startswith(pasta.rstrip(os.sep) + os.sep)
+
+
+def id_video(caminho: str) -> str:
+    """Identificador curto e estável do vídeo (derivado do caminho absoluto)"""
+    return hashlib.sha1(os.path.abspath(caminho).encode("utf-8")).hexdigest()[:12]
+
+
+class BibliotecaVideos:
+    """
+    Vídeos registrados por pasta ou glob (ex.: /videos/camera1, /videos/*/2024-*.mp4).
+    Os padrões são expandidos a cada listagem, então clipes novos entram sozinhos.
+    Só valem padrões dentro da pasta raiz (relativos a ela ou absolutos); arquivos que
+    escapam dela por link simbólico ficam de fora da listagem.
+    """
+
+    def __init__(self, raiz=RAIZ_BIBLIOTECA):
+        self.raiz = os.path.realpath(raiz)
+        self.fontes = []
+        self._trava = threading.Lock()
+
+    def normaliza(self, padrao: str) -> str:
+        """
+        Padrão absoluto equivalente ('..' já resolvido), validado contra a raiz
+        Lança ValueError se a parte fixa do padrão (antes do primeiro curinga) fica fora da raiz
+        """
+        padrao = os.path.normpath(os.path.join(self.raiz, os.path.expanduser(padrao.strip())))
+
+        fixas = []
+        for parte in padrao.split(os.sep):
+            if any(curinga in parte for curinga in '*?['):
+                break
+            fixas.append(parte)
+        if not dentro_da_pasta(os.sep.join(fixas) or os.sep, self.raiz):
+            raise ValueError(f"Padrão fora da pasta da biblioteca ({self.raiz}): {padrao}")
+        return padrao
+
+    def registra(self, padrao: str, prioridade=0) -> int:
+        """Registra uma pasta ou glob (ver normaliza); retorna quantos vídeos ele encontra agora"""
+        padrao = self.normaliza(padrao)
+        with self._trava:
+            self.fontes = [fonte for fonte in self.fontes if fonte['padrao'] != padrao]
+            self.fontes.append({'padrao': padrao, 'prioridade': int(prioridade)})
+        return len(self._expande(padrao))
+
+    def remove(self, padrao: str) -> bool:
+        try:
+            padrao = self.normaliza(padrao)
+        except ValueError:
+            return False
+        with self._trava:
+            antes = len(self.fontes)
+            self.fontes = [fonte for fonte in self.fontes if fonte['padrao'] != padrao]
+            return len(self.fontes) < antes
+
+    def _expande(self, padrao: str) -> list:
+        if os.path.isdir(padrao):
+            padrao = os.path.join(padrao, "**", "*")
+        return sorted(caminho for caminho in glob.glob(padrao, recursive=True)
+                      if os.path.isfile(caminho) and caminho.lower().endswith(EXTENSOES_VIDEO)
+                      and dentro_da_pasta(caminho, self.raiz))
+
+    def lista(self, ordem='prioridade') -> list:
+        """
+        Vídeos registrados, sem repetição, na ordem de processamento:
+        'prioridade' (maior prioridade primeiro, depois os mais recentes) ou 'recentes'
+        """
+        if ordem not in ORDENS_BIBLIOTECA:
+            raise ValueError(f"Ordem inválida: {ordem} (use {', '.join(ORDENS_BIBLIOTECA)})")
+
+        with self._trava:
+            fontes = list(self.fontes)
+
+        videos = {}
+        for fonte in fontes:
+            for caminho in self._expande(fonte['padrao']):
+                identificador = id_video(caminho)
+                # Um vídeo casado por mais de um padrão fica com a maior prioridade
+                if identificador in videos and videos[identificador]['prioridade'] >= fonte['prioridade']:
+                    continue
+                info = os.stat(caminho)
+                videos[identificador] = {
+                    'video_id': identificador,
+                    'caminho': caminho,
+                    'camera': os.path.basename(os.path.dirname(os.path.abspath(caminho))),
+                    'tamanho': info.st_size,
+                    'modificado_em': info.st_mtime,
+                    'prioridade': fonte['prioridade']
+                }
+
+        if ordem == 'recentes':
+            chave = lambda video: -video['modificado_em']
+        else:
+            chave = lambda video: (-video['prioridade'], -video['modificado_em'])
+        return sorted(videos.values(), key=chave)
+
+
+class AcompanhamentoVideo(Acompanhamento):
+    """
+    Acompanhamento da busca em um vídeo da biblioteca: compartilha o cancelamento
+    com a busca inteira e repassa as detecções já com o id do vídeo e o segundo
+    """
+
+    def __init__(self, pai: Acompanhamento, video: dict, fps: float):
+        super().__init__()
+        self._cancelar = pai._cancelar
+        self.pai = pai
+        self.video = video
+        self.fps = fps
+
+    def nova_deteccao(self, deteccao: dict):
+        self.pai.nova_deteccao(marca_deteccao(deteccao, self.video, self.fps))
+
+
+def segundo_do_frame(frame_num: int, fps: float):
+    """Posição do frame (numerado a partir de 1) em segundos, se o FPS for conhecido"""
+    return (frame_num - 1) / fps if fps else None
+
+
+def marca_deteccao(deteccao: dict, video: dict, fps: float) -> dict:
+    """Acrescenta à detecção o vídeo de origem e o segundo em que ela aparece"""
+    if 'video_id' in deteccao:
+        return deteccao
+    deteccao['video_id'] = video['video_id']
+    deteccao['video'] = video['caminho']
+    deteccao['segundo'] = segundo_do_frame(deteccao['frame'], fps)
+    return deteccao
+
+
+class BuscaBiblioteca:
+    """
+    Busca uma placa (ou lista de placas) em todos os vídeos da biblioteca.
+    Os vídeos são distribuídos, na ordem pedida, por um pool limitado de threads;
+    cada um usa uma cópia do detector (mesmos modelos e caches) com pasta de imagens própria.
+    Vídeos sem mudança (mesmo tamanho/mtime) com índice pronto respondem pelo índice.
+    Quem chama reserva uma vaga de admissão por vídeo simultâneo (ver app.com_admissao_biblioteca).
+    """
+
+    def __init__(self, detector, biblioteca: BibliotecaVideos, max_videos_simultaneos=2):
+        self.detector = detector
+        self.biblioteca = biblioteca
+        self.max_videos_simultaneos = max(1, int(max_videos_simultaneos))
+
+    def _busca_video(self, video: dict, placas: list, parametros: dict, acompanhamento: Acompanhamento) -> dict:
+        acompanhamento.verifica_cancelamento()
+        acompanhamento.inicia_video(video)
+
+        inicio = time.perf_counter()
+        resultado_video = dict(video)
+        try:
+            sem_mudanca = self.detector.indice.sem_mudanca(video['caminho'])
+            fps = LeitorFrames(video['caminho']).info_video()['fps']
+            detector = self.detector.para_video(video['caminho'],
+                                                os.path.join(self.detector.save_dir, video['video_id']))
+            resultado = detector.buscar_placas(placas, acompanhamento=AcompanhamentoVideo(acompanhamento, video, fps),
+                                               **parametros)
+
+            deteccoes = [marca_deteccao(deteccao, video, fps) for deteccao in
+                         (d for deteccoes_placa in resultado['deteccoes_por_placa'].values() for d in deteccoes_placa)]
+            deteccoes.sort(key=lambda deteccao: deteccao['frame'])
+            resultado_video.update({
+                'status': 'concluido',
+                'origem': resultado['origem'],
+                'sem_mudanca': sem_mudanca,
+                'fps': fps,
+                'placas_encontradas': resultado['placas_encontradas'],
+                'total_deteccoes': len(deteccoes),
+                'deteccoes': deteccoes,
+                'estatisticas': resultado['estatisticas']
+            })
+        except BuscaCancelada:
+            raise
+        except Exception as e:
+            print(f"❌ Erro no vídeo {video['caminho']}: {e}")
+            resultado_video.update({'status': 'erro', 'erro': str(e), 'total_deteccoes': 0, 'deteccoes': []})
+
+        resultado_video['tempo_s'] = time.perf_counter() - inicio
+        acompanhamento.conclui_video(resultado_video)
+        return resultado_video
+
+    def executa(self, placas, ordem='prioridade', acompanhamento=None, **parametros) -> dict:
+        """
+        placas: uma placa ou lista de placas; parametros são os mesmos de buscar_placas
+        Retorna um resultado por vídeo, na ordem de processamento
+        """
+        if parametros.get('modo_execucao') == 'processos':
+            raise ValueError("Na biblioteca os vídeos já rodam em paralelo; use 'sequencial' ou 'pipeline'")
+
+        acompanhamento = acompanhamento or Acompanhamento()
+        placas = list(self.detector.normaliza_placas(placas))
+        videos = self.biblioteca.lista(ordem)
+        inicio = time.perf_counter()
+        print(f"📚 Buscando {len(placas)} placa(s) em {len(videos)} vídeo(s), "
+              f"{self.max_videos_simultaneos} por vez ({ordem})")
+
+        acompanhamento.inicia(len(videos))
+        executor = ThreadPoolExecutor(max_workers=self.max_videos_simultaneos)
+        try:
+            futuros = [executor.submit(self._busca_video, video, placas, parametros, acompanhamento)
+                       for video in videos]
+            resultados = []
+            for futuro in futuros:
+                resultados.append(futuro.result())
+                acompanhamento.progresso(len(resultados))
+        finally:
+            # Cancelamento: os vídeos que ainda não começaram nem chegam a rodar
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return {
+            'placas_pesquisadas': placas,
+            'ordem': ordem,
+            'total_videos': len(videos),
+            'videos_pelo_indice': sum(1 for r in resultados if r.get('origem') == 'indice'),
+            'videos_com_erro': sum(1 for r in resultados if r['status'] == 'erro'),
+            'total_deteccoes': sum(r['total_deteccoes'] for r in resultados),
+            'sucesso': any(r['total_deteccoes'] for r in resultados),
+            'videos': resultados,
+            'tempo_total_s': time.perf_counter() - inicio,
+            'concluido_em': datetime.now().isoformat()
+        }
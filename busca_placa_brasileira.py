@@ -4,6 +4,7 @@ import easyocr
 import re
 import os
 import difflib
+from leitor_frames import LeitorFrames
 
 def limpa_texto_placa(texto: str) -> str:
     """Remove espaços e caracteres especiais"""
@@ -108,6 +109,7 @@ def is_placa_brasileira_alvo(texto_detectado: str, placa_alvo: str, threshold=1.
 video_path = "teste.mp4"
 placa_alvo = "TAT9G95"  # Padrão brasileiro: AAA#A##
 save_dir = "prints_placa"
+intervalo_frames = 15
 
 print(f"🇧🇷 BUSCA PLACA BRASILEIRA: {placa_alvo}")
 print("🎯 APENAS MATCHES 100% EXATOS!")
@@ -129,20 +131,10 @@ for arquivo in os.listdir(save_dir):
 model = YOLO("yolov8n.pt")
 reader = easyocr.Reader(['en', 'pt'], gpu=False)
 
-cap = cv2.VideoCapture(video_path)
-frame_num = 0
 deteccoes_encontradas = []
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    frame_num += 1
-
-    # Processa a cada 15 frames
-    if frame_num % 15 != 0:
-        continue
-
+# Lê apenas 1 a cada 15 frames (os demais são pulados com grab, sem retrieve)
+for frame_num, frame in LeitorFrames(video_path, intervalo_frames):
     results = model(frame)[0]
     
     if results.boxes is not None:
@@ -241,8 +233,6 @@ while True:
                 except Exception as e:
                     continue
 
-cap.release()
-
 print(f"\n🏁 BUSCA FINALIZADA")
 print("=" * 50)
 
@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+# dHash de 8 x 9 pixels: 64 bits por recorte
+LADO_HASH = 8
+
+# Recortes com até esta quantidade de bits diferentes no hash são candidatos a repetição (ruído do vídeo)
+DISTANCIA_MAXIMA = 7
+
+# O hash é dividido em DISTANCIA_MAXIMA + 1 blocos: dois hashes a essa distância têm um bloco igual
+BITS_BLOCO = 64 // (DISTANCIA_MAXIMA + 1)
+
+# Confirmação do candidato: miniatura em tons de cinza e diferença máxima por pixel (níveis de cinza).
+# O hash de 64 bits quase não vê a placa; a miniatura separa motos iguais com placas diferentes
+LADO_MINIATURA = 16
+DIFERENCA_MAXIMA = 16
+
+# Linhas mantidas no arquivo SQLite; passando disso as mais antigas são apagadas
+MAX_LINHAS_DISCO = 200000
+
+
+def hash_perceptual(imagem) -> int:
+    """
+    dHash do recorte: tons de cinza, redução para 8 x 9 e um bit por gradiente horizontal
+    Pequenas variações de brilho e ruído mudam poucos bits do hash
+    """
+    cinza = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY) if imagem.ndim == 3 else imagem
+    reduzida = cv2.resize(cinza, (LADO_HASH + 1, LADO_HASH), interpolation=cv2.INTER_AREA)
+    bits = (reduzida[:, 1:] > reduzida[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def chave_perceptual(imagem) -> tuple:
+    """
+    Chave do recorte no cache: (hash de 64 bits, proporção, miniatura em tons de cinza)
+    A proporção do recorte separa enquadramentos diferentes
+    """
+    cinza = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY) if imagem.ndim == 3 else imagem
+    miniatura = cv2.resize(cinza, (LADO_MINIATURA, LADO_MINIATURA), interpolation=cv2.INTER_AREA)
+    return hash_perceptual(cinza), round(imagem.shape[1] / imagem.shape[0], 1), miniatura
+
+
+def blocos_hash(valor: int) -> list:
+    """Os DISTANCIA_MAXIMA + 1 blocos de BITS_BLOCO bits do hash"""
+    mascara = (1 << BITS_BLOCO) - 1
+    return [(valor >> (i * BITS_BLOCO)) & mascara for i in range(DISTANCIA_MAXIMA + 1)]
+
+
+def distancia_hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def mesma_imagem(a, b) -> bool:
+    """Miniaturas iguais a menos de ruído"""
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max()) <= DIFERENCA_MAXIMA
+
+
+def normaliza_resultados(resultados_ocr, largura: int, altura: int) -> list:
+    """Guarda os bboxes do EasyOCR relativos ao tamanho do recorte"""
+    return [([[float(x) / largura, float(y) / altura] for x, y in bbox], texto, float(conf))
+            for bbox, texto, conf in resultados_ocr]
+
+
+def escala_resultados(resultados: list, largura: int, altura: int) -> list:
+    """Volta os bboxes relativos para pixels do recorte atual"""
+    return [([[x * largura, y * altura] for x, y in bbox], texto, conf)
+            for bbox, texto, conf in resultados]
+
+
+class CacheOCR:
+    """
+    Cache dos resultados do EasyOCR endereçado pelo hash perceptual do recorte da moto.
+    Um recorte repetido com ruído ainda acerta: a busca aceita hashes a até DISTANCIA_MAXIMA
+    bits (índice por blocos do hash, nos quais pelo menos um bloco coincide) e confirma o
+    candidato pela miniatura do recorte.
+    Fica em memória com LRU limitado e, opcionalmente, num arquivo SQLite que
+    sobrevive a reinícios do processo (e é compartilhado pelos processos do pool),
+    limitado a max_linhas_disco linhas (as mais antigas saem primeiro).
+    """
+
+    def __init__(self, tamanho_max=4096, arquivo=None, max_linhas_disco=MAX_LINHAS_DISCO):
+        self.tamanho_max = tamanho_max
+        self.arquivo = arquivo
+        self.max_linhas_disco = max(1, int(max_linhas_disco))
+        # id da entrada -> (hash, proporção, miniatura, resultados), na ordem de uso
+        self.memoria = OrderedDict()
+        # (bloco, valor do bloco, proporção) -> ids das entradas
+        self.baldes = {}
+        self.proximo_id = 0
+        self.acertos = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._trava = threading.Lock()
+        self._conexao = None
+
+        if arquivo:
+            pasta = os.path.dirname(arquivo)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            self._conexao = sqlite3.connect(arquivo, timeout=30, check_same_thread=False)
+            colunas = ", ".join(f"b{i} INTEGER NOT NULL" for i in range(DISTANCIA_MAXIMA + 1))
+            self._conexao.execute(
+                f"CREATE TABLE IF NOT EXISTS ocr_perceptual (id INTEGER PRIMARY KEY, proporcao REAL NOT NULL, "
+                f"{colunas}, miniatura BLOB NOT NULL, resultados TEXT NOT NULL)")
+            for i in range(DISTANCIA_MAXIMA + 1):
+                self._conexao.execute(
+                    f"CREATE INDEX IF NOT EXISTS ocr_perceptual_b{i} ON ocr_perceptual (b{i}, proporcao)")
+            self._conexao.commit()
+
+    def _baldes_da_chave(self, valor: int, proporcao: float) -> list:
+        return [(i, bloco, proporcao) for i, bloco in enumerate(blocos_hash(valor))]
+
+    def _guarda_memoria(self, chave: tuple, resultados: list):
+        valor, proporcao, miniatura = chave
+        entrada_id = self.proximo_id
+        self.proximo_id += 1
+        self.memoria[entrada_id] = (valor, proporcao, miniatura, resultados)
+        for balde in self._baldes_da_chave(valor, proporcao):
+            self.baldes.setdefault(balde, set()).add(entrada_id)
+
+        while len(self.memoria) > self.tamanho_max:
+            removida_id, (removido, proporcao_removida, _, _) = self.memoria.popitem(last=False)
+            for balde in self._baldes_da_chave(removido, proporcao_removida):
+                self.baldes[balde].discard(removida_id)
+                if not self.baldes[balde]:
+                    del self.baldes[balde]
+            self.remocoes += 1
+
+    def _procura_memoria(self, chave: tuple):
+        """Entrada mais próxima da chave na memória (id), ou None"""
+        valor, proporcao, miniatura = chave
+        candidatos = set()
+        for balde in self._baldes_da_chave(valor, proporcao):
+            candidatos.update(self.baldes.get(balde, ()))
+
+        melhor, menor_distancia = None, DISTANCIA_MAXIMA + 1
+        for entrada_id in candidatos:
+            outro, _, outra_miniatura, _ = self.memoria[entrada_id]
+            distancia = distancia_hamming(valor, outro)
+            if distancia < menor_distancia and mesma_imagem(miniatura, outra_miniatura):
+                melhor, menor_distancia = entrada_id, distancia
+        return melhor
+
+    def _procura_disco(self, chave: tuple):
+        """Resultados da entrada mais próxima da chave no SQLite, ou None"""
+        valor, proporcao, miniatura = chave
+        blocos = blocos_hash(valor)
+        condicao = " OR ".join(f"b{i} = ?" for i in range(len(blocos)))
+        linhas = self._conexao.execute(
+            f"SELECT {', '.join(f'b{i}' for i in range(len(blocos)))}, miniatura, resultados FROM ocr_perceptual "
+            f"WHERE proporcao = ? AND ({condicao})", [proporcao] + blocos).fetchall()
+
+        melhor, menor_distancia = None, DISTANCIA_MAXIMA + 1
+        for linha in linhas:
+            outro = sum(bloco << (i * BITS_BLOCO) for i, bloco in enumerate(linha[:len(blocos)]))
+            distancia = distancia_hamming(valor, outro)
+            outra_miniatura = np.frombuffer(linha[-2], dtype=np.uint8).reshape(miniatura.shape)
+            if distancia < menor_distancia and mesma_imagem(miniatura, outra_miniatura):
+                melhor, menor_distancia = linha[-1], distancia
+        return melhor
+
+    def obtem(self, chave: tuple):
+        """Resultados guardados para a chave (ou uma quase igual), ou None"""
+        with self._trava:
+            entrada_id = self._procura_memoria(chave)
+            if entrada_id is not None:
+                self.memoria.move_to_end(entrada_id)
+                self.acertos += 1
+                return self.memoria[entrada_id][3]
+
+            if self._conexao is not None:
+                guardado = self._procura_disco(chave)
+                if guardado is not None:
+                    resultados = [tuple(r) for r in json.loads(guardado)]
+                    self._guarda_memoria(chave, resultados)
+                    self.acertos += 1
+                    self.acertos_disco += 1
+                    return resultados
+
+            self.falhas += 1
+            return None
+
+    def guarda(self, chave: tuple, resultados: list):
+        """Guarda os resultados de uma chave de chave_perceptual()"""
+        with self._trava:
+            self._guarda_memoria(chave, resultados)
+            if self._conexao is not None:
+                valor, proporcao, miniatura = chave
+                blocos = blocos_hash(valor)
+                self._conexao.execute(
+                    f"INSERT INTO ocr_perceptual (proporcao, {', '.join(f'b{i}' for i in range(len(blocos)))}, "
+                    f"miniatura, resultados) VALUES ({', '.join('?' * (len(blocos) + 3))})",
+                    [proporcao] + blocos + [sqlite3.Binary(miniatura.tobytes()), json.dumps(resultados)])
+                # Novas linhas recebem o maior id + 1 e só as de id baixo são apagadas, então tudo abaixo
+                # das últimas max_linhas_disco é mais antigo (inclusive o que os outros processos gravaram)
+                self._conexao.execute(
+                    "DELETE FROM ocr_perceptual WHERE id <= (SELECT MAX(id) FROM ocr_perceptual) - ?",
+                    (self.max_linhas_disco,))
+                self._conexao.commit()
+
+    def contadores(self) -> dict:
+        return {'acertos': self.acertos, 'acertos_disco': self.acertos_disco, 'falhas': self.falhas}
+
+    def resumo(self, desde=None) -> dict:
+        """Acertos/falhas (desde um snapshot de contadores(), se informado) e ocupação"""
+        contadores = self.contadores()
+        if desde:
+            contadores = {chave: valor - desde.get(chave, 0) for chave, valor in contadores.items()}
+        consultas = contadores['acertos'] + contadores['falhas']
+        contadores.update({
+            'taxa_acerto': contadores['acertos'] / consultas if consultas else 0.0,
+            'entradas_memoria': len(self.memoria),
+            'tamanho_max': self.tamanho_max,
+            'remocoes': self.remocoes,
+            'arquivo': self.arquivo,
+            'max_linhas_disco': self.max_linhas_disco if self.arquivo else None
+        })
+        return contadores
+
+    def fecha(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
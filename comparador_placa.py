@@ -0,0 +1,159 @@
+import re
+
+import numpy as np
+
+# Caracteres possíveis depois da limpeza; o último código é usado como preenchimento
+ALFABETO = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+CODIGO = {char: i for i, char in enumerate(ALFABETO)}
+PREENCHIMENTO = len(ALFABETO)
+
+# Pares que o OCR costuma trocar
+PARES_CONFUSAO = [
+    ('O', '0'), ('D', '0'), ('Q', '0'), ('G', '0'),
+    ('I', '1'), ('L', '1'), ('T', '1'),
+    ('Z', '2'), ('S', '5'), ('G', '6'), ('B', '8'), ('G', '8'), ('G', '9'),
+    ('T', '7'), ('A', '4'),
+    ('C', 'G'), ('U', 'V'), ('M', 'N'), ('P', 'R'), ('E', 'F')
+]
+
+# Formato da placa brasileira: L = letra, N = número, X = letra (Mercosul) ou número (antiga)
+FORMATO_PLACA = 'LLLNXNN'
+
+CUSTO_CONFUSAO_FORTE = 0.2   # OCR trocou a classe do caractere numa posição de formato fixo
+CUSTO_CONFUSAO = 0.4         # troca comum do OCR numa posição que aceita as duas classes
+CUSTO_EDICAO = 1.0           # substituição, inserção ou remoção comuns
+
+
+def limpa_texto(texto: str) -> str:
+    """Remove espaços e caracteres especiais"""
+    return re.sub(r'[^A-Z0-9]', '', texto.upper().strip())
+
+
+def _confundiveis() -> dict:
+    pares = {}
+    for a, b in PARES_CONFUSAO:
+        pares.setdefault(a, set()).add(b)
+        pares.setdefault(b, set()).add(a)
+    return pares
+
+
+CONFUNDIVEIS = _confundiveis()
+
+
+def custo_substituicao(char_lido: str, char_alvo: str, classe_posicao: str) -> float:
+    """Custo de o OCR ter lido char_lido onde a placa tem char_alvo"""
+    if char_lido == char_alvo:
+        return 0.0
+
+    if char_lido not in CONFUNDIVEIS.get(char_alvo, ()):
+        return CUSTO_EDICAO
+
+    # Número numa posição que só aceita letra (ou o contrário) é quase certamente erro de leitura
+    if (classe_posicao == 'L' and char_lido.isdigit()) or (classe_posicao == 'N' and char_lido.isalpha()):
+        return CUSTO_CONFUSAO_FORTE
+
+    return CUSTO_CONFUSAO
+
+
+class ComparadorPlaca:
+    """
+    Compara textos do OCR com as variações de uma ou mais placas.
+    Montado uma vez por busca: as variações da placa viram um conjunto para
+    match exato e uma tabela de custos por posição para a distância de edição
+    ponderada, calculada de uma vez para um lote inteiro de textos.
+    """
+
+    def __init__(self, variacoes: list, threshold=1.0):
+        self.threshold = threshold
+        self.variacoes = [v for v in variacoes if v]
+        self.exatas = set(self.variacoes)
+
+        self.comprimentos_ref = np.array([len(v) for v in self.variacoes], dtype=np.int64)
+        self.max_ref = int(self.comprimentos_ref.max()) if self.variacoes else 0
+
+        # custos[r, j, c]: custo de ler o código c na posição j da variação r
+        self.custos = np.full((len(self.variacoes), self.max_ref, PREENCHIMENTO + 1), CUSTO_EDICAO)
+        for r, variacao in enumerate(self.variacoes):
+            # A posição só é conhecida nas variações com o tamanho de uma placa completa
+            formato = FORMATO_PLACA if len(variacao) == len(FORMATO_PLACA) else 'X' * len(variacao)
+            for j, char_alvo in enumerate(variacao):
+                for char_lido, c in CODIGO.items():
+                    self.custos[r, j, c] = custo_substituicao(char_lido, char_alvo, formato[j])
+
+    def _codifica(self, textos: list):
+        comprimentos = np.array([len(t) for t in textos], dtype=np.int64)
+        largura = int(comprimentos.max()) if len(textos) else 0
+        codigos = np.full((len(textos), largura), PREENCHIMENTO, dtype=np.int64)
+        for b, texto in enumerate(textos):
+            codigos[b, :len(texto)] = [CODIGO[c] for c in texto]
+        return codigos, comprimentos
+
+    def distancias(self, textos: list, refs=None) -> np.ndarray:
+        """
+        Distância de edição ponderada de cada texto para cada variação
+        refs (opcional) restringe o cálculo a um subconjunto de índices de variações
+        Retorna matriz (textos, variações); a programação dinâmica roda
+        vetorizada sobre todos os textos e variações ao mesmo tempo
+        """
+        custos = self.custos if refs is None else self.custos[refs]
+        comprimentos_ref = self.comprimentos_ref if refs is None else self.comprimentos_ref[refs]
+        codigos, comprimentos = self._codifica(textos)
+        lote, largura = codigos.shape
+        total_refs = custos.shape[0]
+
+        anterior = np.broadcast_to(np.arange(self.max_ref + 1, dtype=float) * CUSTO_EDICAO,
+                                   (lote, total_refs, self.max_ref + 1)).copy()
+        finais = anterior.copy()
+
+        for i in range(1, largura + 1):
+            # (refs, posições, lote) -> (lote, refs, posições)
+            substituicao = custos[:, :, codigos[:, i - 1]].transpose(2, 0, 1)
+
+            atual = np.empty_like(anterior)
+            atual[:, :, 0] = i * CUSTO_EDICAO
+            diagonal = np.minimum(anterior[:, :, 1:] + CUSTO_EDICAO, anterior[:, :, :-1] + substituicao)
+            for j in range(1, self.max_ref + 1):
+                atual[:, :, j] = np.minimum(diagonal[:, :, j - 1], atual[:, :, j - 1] + CUSTO_EDICAO)
+
+            terminou = (comprimentos == i)[:, None, None]
+            finais = np.where(terminou, atual, finais)
+            anterior = atual
+
+        # Cada variação termina na própria coluna
+        return np.take_along_axis(finais, comprimentos_ref[None, :, None], axis=2)[:, :, 0]
+
+    def similaridades(self, textos: list, refs=None) -> np.ndarray:
+        """Similaridade (0 a 1) de cada texto para cada variação (ou para o subconjunto refs)"""
+        distancias = self.distancias(textos, refs)
+        comprimentos_ref = self.comprimentos_ref if refs is None else self.comprimentos_ref[refs]
+        comprimentos = np.array([len(t) for t in textos], dtype=float)
+        maiores = np.maximum(comprimentos[:, None], comprimentos_ref[None, :]).clip(min=1)
+        return np.clip(1.0 - distancias / maiores, 0.0, 1.0)
+
+    def compara_lote(self, textos: list) -> list:
+        """
+        Compara vários textos numa única chamada
+        Retorna lista de (é_match, similaridade, melhor_variacao), como is_placa_brasileira_alvo
+        """
+        textos = [limpa_texto(t) for t in textos]
+        if not textos or not self.variacoes:
+            return [(False, 0.0, t) for t in textos]
+
+        similaridades = self.similaridades(textos)
+        melhores = similaridades.argmax(axis=1)
+
+        resultados = []
+        for b, texto in enumerate(textos):
+            # Match exato com qualquer variação conhecida
+            if texto in self.exatas:
+                resultados.append((True, 1.0, texto))
+                continue
+
+            similaridade = float(similaridades[b, melhores[b]])
+            variacao = self.variacoes[melhores[b]] if similaridade > 0 else texto
+            resultados.append((similaridade >= self.threshold, similaridade, variacao))
+
+        return resultados
+
+    def compara(self, texto: str) -> tuple:
+        return self.compara_lote([texto])[0]
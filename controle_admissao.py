@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Peso da última busca na média móvel da duração (usada no Retry-After)
+PESO_DURACAO = 0.2
+
+
+class Sobrecarga(Exception):
+    """Sem vaga para a busca: fila cheia ou espera longa demais. retry_after em segundos"""
+
+    def __init__(self, mensagem: str, retry_after: int):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+class ControleAdmissao:
+    """
+    Limita quantas buscas rodam ao mesmo tempo no servidor.
+    Quem chega com todas as vagas ocupadas espera numa fila limitada (até espera_max_s);
+    com a fila cheia a busca é recusada na hora, com uma estimativa de quando tentar de novo.
+    Tarefas sem fim previsto (monitores ao vivo) ocupam uma vaga com ocupa() até chamarem libera().
+    Uma busca que roda vários vídeos em paralelo (biblioteca) ocupa uma vaga por vídeo.
+    """
+
+    def __init__(self, max_simultaneas=2, max_fila=8, espera_max_s=30.0):
+        self.max_simultaneas = max(1, int(max_simultaneas))
+        self.max_fila = max(0, int(max_fila))
+        self.espera_max_s = espera_max_s
+        self.executando = 0
+        self.na_fila = 0
+        self.aceitas = 0
+        self.recusadas = 0
+        # Vagas ocupadas por ocupa() (já contadas em executando)
+        self.ocupadas_fixas = 0
+        # Média móvel da duração das buscas (None até a primeira terminar)
+        self.duracao_media_s = None
+        self._condicao = threading.Condition()
+
+    def retry_after(self) -> int:
+        """Segundos estimados até abrir uma vaga para quem está chegando agora"""
+        duracao = self.duracao_media_s or 1.0
+        rodadas = (self.na_fila + 1) / self.max_simultaneas
+        return max(1, math.ceil(duracao * rodadas))
+
+    def vagas_para(self, vagas: int) -> int:
+        """Vagas que uma busca pode pedir de uma vez (no máximo todas)"""
+        return min(max(1, int(vagas)), self.max_simultaneas)
+
+    @contextmanager
+    def vaga(self, limitar_fila=True, vagas=1):
+        """
+        with admissao.vaga(): ... roda o bloco ocupando uma das vagas (ou vagas, limitado a max_simultaneas)
+        Levanta Sobrecarga se a fila estiver cheia ou a espera passar de espera_max_s;
+        limitar_fila=False espera o tempo que for (buscas que já estão na fila dos jobs)
+        """
+        vagas = self.vagas_para(vagas)
+        with self._condicao:
+            if (limitar_fila and self.executando + vagas > self.max_simultaneas
+                    and self.na_fila >= self.max_fila):
+                self.recusadas += 1
+                raise Sobrecarga("Servidor ocupado: fila de buscas cheia", self.retry_after())
+
+            self.na_fila += 1
+            limite = time.monotonic() + self.espera_max_s if limitar_fila else None
+            try:
+                while self.executando + vagas > self.max_simultaneas:
+                    restante = None if limite is None else limite - time.monotonic()
+                    if restante is not None and restante <= 0:
+                        self.recusadas += 1
+                        raise Sobrecarga("Servidor ocupado: tempo de espera na fila esgotado", self.retry_after())
+                    self._condicao.wait(restante)
+            finally:
+                self.na_fila -= 1
+            self.executando += vagas
+            self.aceitas += 1
+
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            with self._condicao:
+                self.executando -= vagas
+                if self.duracao_media_s is None:
+                    self.duracao_media_s = duracao
+                else:
+                    self.duracao_media_s += PESO_DURACAO * (duracao - self.duracao_media_s)
+                # Quem espera por várias vagas pode não caber: todos conferem de novo
+                self._condicao.notify_all()
+
+    def ocupa(self, motivo='tarefa'):
+        """
+        Ocupa uma vaga até libera(), sem passar pela fila (não dá para esperar uma tarefa sem fim)
+        Levanta Sobrecarga se todas as vagas estiverem ocupadas
+        """
+        with self._condicao:
+            if self.executando >= self.max_simultaneas:
+                self.recusadas += 1
+                raise Sobrecarga(f"Servidor ocupado: sem vaga para {motivo}", self.retry_after())
+            self.executando += 1
+            self.ocupadas_fixas += 1
+            self.aceitas += 1
+
+    def libera(self):
+        """Devolve uma vaga ocupada com ocupa()"""
+        with self._condicao:
+            self.executando -= 1
+            self.ocupadas_fixas -= 1
+            self._condicao.notify_all()
+
+    def estado(self) -> dict:
+        with self._condicao:
+            return {
+                'executando': self.executando,
+                'ocupadas_fixas': self.ocupadas_fixas,
+                'na_fila': self.na_fila,
+                'max_simultaneas': self.max_simultaneas,
+                'max_fila': self.max_fila,
+                'espera_max_s': self.espera_max_s,
+                'aceitas': self.aceitas,
+                'recusadas': self.recusadas,
+                'duracao_media_s': self.duracao_media_s
+            }
@@ -0,0 +1,75 @@
+import argparse
+import os
+
+from backends_deteccao import TAMANHO_ENTRADA, prepara_lote
+from benchmark_deteccao import carrega_frames
+
+
+class DadosCalibracao:
+    """Frames do vídeo, pré-processados como no BackendOnnx, para calibrar a quantização INT8"""
+
+    def __init__(self, video_path: str, nome_entrada: str, intervalo: int, max_frames: int):
+        self.nome_entrada = nome_entrada
+        self.frames = carrega_frames(video_path, intervalo, max_frames)
+        self.posicao = 0
+
+    def get_next(self):
+        # Interface do CalibrationDataReader do ONNX Runtime
+        if self.posicao >= len(self.frames):
+            return None
+        tensor, _ = prepara_lote([self.frames[self.posicao]])
+        self.posicao += 1
+        return {self.nome_entrada: tensor}
+
+    def rewind(self):
+        self.posicao = 0
+
+
+def exporta_onnx(pesos: str) -> str:
+    """Exporta o modelo do ultralytics para ONNX com lote dinâmico"""
+    from ultralytics import YOLO
+    return YOLO(pesos).export(format="onnx", imgsz=TAMANHO_ENTRADA, dynamic=True, simplify=True)
+
+
+def quantiza_int8(modelo_onnx: str, saida: str, video_path: str, intervalo: int, max_frames: int) -> str:
+    """Quantização estática INT8 (QDQ, pesos por canal) calibrada com frames do próprio vídeo"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    nome_entrada = ort.InferenceSession(modelo_onnx, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class Leitor(DadosCalibracao, CalibrationDataReader):
+        pass
+
+    quantize_static(
+        modelo_onnx, saida,
+        Leitor(video_path, nome_entrada, intervalo, max_frames),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return saida
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o YOLO para ONNX (e opcionalmente INT8) para rodar no ONNX Runtime")
+    parser.add_argument("--pesos", default="yolov8n.pt")
+    parser.add_argument("--int8", action="store_true", help="Também gera o modelo quantizado em INT8")
+    parser.add_argument("--video", default="teste.mp4", help="Vídeo usado na calibração do INT8")
+    parser.add_argument("--intervalo", type=int, default=15)
+    parser.add_argument("--frames-calibracao", type=int, default=64)
+    args = parser.parse_args()
+
+    modelo_onnx = exporta_onnx(args.pesos)
+    print(f"✅ ONNX exportado: {modelo_onnx}  (backend_deteccao='onnx')")
+
+    if args.int8:
+        saida = os.path.splitext(modelo_onnx)[0] + "_int8.onnx"
+        quantiza_int8(modelo_onnx, saida, args.video, args.intervalo, args.frames_calibracao)
+        print(f"✅ INT8 gerado: {saida}  (backend_deteccao='onnx_int8', "
+              f"calibrado com {args.frames_calibracao} frames de {args.video})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+
+class FiltroMovimento:
+    """
+    Decide se um frame amostrado mudou o suficiente para rodar YOLO + OCR de novo.
+    Compara uma versão reduzida, em tons de cinza e suavizada do frame com a do
+    último frame que passou pela inferência (e não só com o anterior, para que
+    mudanças lentas também acabem disparando o processamento).
+    """
+
+    def __init__(self, limiar=0.02, limiar_pixel=25, largura=160, max_pulados=30):
+        self.limiar = limiar                # fração de pixels alterados para considerar que mudou
+        self.limiar_pixel = limiar_pixel    # diferença de intensidade (0-255) para um pixel contar
+        self.largura = largura
+        self.max_pulados = max_pulados      # força uma inferência depois de tantos frames pulados seguidos
+        self.referencia = None
+        self.pulados_seguidos = 0
+        self.frames_processados = 0
+        self.frames_pulados = 0
+
+    def _reduz(self, frame):
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        altura = max(1, round(cinza.shape[0] * self.largura / cinza.shape[1]))
+        reduzido = cv2.resize(cinza, (self.largura, altura), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(reduzido, (5, 5), 0)
+
+    def fracao_alterada(self, reduzido) -> float:
+        diferenca = cv2.absdiff(reduzido, self.referencia)
+        return np.count_nonzero(diferenca > self.limiar_pixel) / float(diferenca.size)
+
+    def mudou(self, frame) -> bool:
+        """True se o frame precisa de inferência; False se pode reaproveitar o resultado anterior"""
+        reduzido = self._reduz(frame)
+
+        if (self.referencia is None or reduzido.shape != self.referencia.shape
+                or self.pulados_seguidos >= self.max_pulados
+                or self.fracao_alterada(reduzido) >= self.limiar):
+            self.referencia = reduzido
+            self.pulados_seguidos = 0
+            self.frames_processados += 1
+            return True
+
+        self.pulados_seguidos += 1
+        self.frames_pulados += 1
+        return False
+
+    def resumo(self) -> dict:
+        total = self.frames_processados + self.frames_pulados
+        return {
+            'limiar': self.limiar,
+            'frames_processados': self.frames_processados,
+            'frames_pulados': self.frames_pulados,
+            'fracao_pulada': self.frames_pulados / total if total else 0.0
+        }
+
+
+def junta_resumos(resumos: list) -> dict:
+    """Junta os resumos de vários filtros (ex.: um por trecho do vídeo)"""
+    processados = sum(r['frames_processados'] for r in resumos)
+    pulados = sum(r['frames_pulados'] for r in resumos)
+    total = processados + pulados
+    return {
+        'limiar': resumos[0]['limiar'] if resumos else None,
+        'frames_processados': processados,
+        'frames_pulados': pulados,
+        'fracao_pulada': pulados / total if total else 0.0
+    }
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Versão do formato do índice (muda quando a estrutura das leituras muda)
+VERSAO_INDICE = 1
+
+# Índices mantidos em memória depois de lidos (os menos usados saem primeiro)
+MAX_INDICES_CARREGADOS = 8
+
+
+def hash_parametros(parametros: dict) -> str:
+    """Identificador curto dos parâmetros de um índice (a ordem das chaves não importa)"""
+    return hashlib.sha1(json.dumps(parametros, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class IndiceLeituras:
+    """
+    Índice em disco com todas as leituras de OCR de um vídeo.
+    Cada vídeo é identificado pelo hash SHA-256 do conteúdo, então renomear
+    ou copiar o arquivo não invalida o índice. Há um arquivo por vídeo e
+    conjunto de parâmetros, para buscas com opções diferentes não se apagarem.
+    """
+
+    def __init__(self, index_dir="indices", max_carregados=MAX_INDICES_CARREGADOS):
+        self.index_dir = index_dir
+        # Hashes já calculados: caminho -> {tamanho, mtime_ns, hash}, gravados em disco
+        # para que vídeos sem mudança não sejam lidos de novo nem depois de reiniciar
+        self.arquivo_hashes = os.path.join(index_dir, "hashes.json")
+        self._hashes = {}
+        self._trava_hashes = threading.Lock()
+        # Últimos índices lidos do disco (LRU): caminho -> (mtime, índice)
+        self._carregados = OrderedDict()
+        self.max_carregados = max(0, int(max_carregados))
+        self._trava_carregados = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+        self._carrega_hashes()
+
+    def _carrega_hashes(self):
+        if not os.path.exists(self.arquivo_hashes):
+            return
+        try:
+            with open(self.arquivo_hashes, "r", encoding="utf-8") as arquivo:
+                self._hashes = json.load(arquivo)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cache de hashes ignorado ({self.arquivo_hashes}): {e}")
+
+    def _salva_hashes(self):
+        temporario = f"{self.arquivo_hashes}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(self._hashes, arquivo)
+        os.replace(temporario, self.arquivo_hashes)
+
+    def sem_mudanca(self, video_path: str) -> bool:
+        """O vídeo tem o mesmo tamanho/mtime da última vez que o hash foi calculado"""
+        info = os.stat(video_path)
+        anterior = self._hashes.get(os.path.abspath(video_path))
+        return (anterior is not None and anterior['tamanho'] == info.st_size
+                and anterior['mtime_ns'] == info.st_mtime_ns)
+
+    def hash_video(self, video_path: str) -> str:
+        """Calcula o hash do conteúdo do vídeo (com cache por tamanho/mtime)"""
+        if self.sem_mudanca(video_path):
+            return self._hashes[os.path.abspath(video_path)]['hash']
+
+        info = os.stat(video_path)
+        sha = hashlib.sha256()
+        with open(video_path, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+                sha.update(bloco)
+
+        with self._trava_hashes:
+            self._hashes[os.path.abspath(video_path)] = {
+                'tamanho': info.st_size,
+                'mtime_ns': info.st_mtime_ns,
+                'hash': sha.hexdigest()
+            }
+            self._salva_hashes()
+        return sha.hexdigest()
+
+    def caminho_indice(self, video_path: str, parametros: dict) -> str:
+        """Caminho do arquivo de índice de um vídeo com esses parâmetros"""
+        return os.path.join(self.index_dir, f"{self.hash_video(video_path)}_{hash_parametros(parametros)}.json")
+
+    def _em_cache(self, caminho: str, mtime: int):
+        with self._trava_carregados:
+            em_cache = self._carregados.get(caminho)
+            if em_cache is None or em_cache[0] != mtime:
+                return None
+            self._carregados.move_to_end(caminho)
+            return em_cache[1]
+
+    def _guarda_em_cache(self, caminho: str, mtime: int, indice: dict):
+        with self._trava_carregados:
+            self._carregados[caminho] = (mtime, indice)
+            self._carregados.move_to_end(caminho)
+            while len(self._carregados) > self.max_carregados:
+                self._carregados.popitem(last=False)
+
+    def existe(self, video_path: str, parametros: dict) -> bool:
+        """Verifica se existe índice válido para o vídeo e os parâmetros"""
+        return self.carrega(video_path, parametros) is not None
+
+    def carrega(self, video_path: str, parametros: dict):
+        """
+        Carrega o índice do vídeo.
+        Retorna None se não existir ou se foi gerado com outros parâmetros.
+        """
+        if not os.path.exists(video_path):
+            return None
+
+        caminho = self.caminho_indice(video_path, parametros)
+        if not os.path.exists(caminho):
+            return None
+
+        mtime = os.stat(caminho).st_mtime_ns
+        indice = self._em_cache(caminho, mtime)
+        if indice is None:
+            try:
+                with open(caminho, "r", encoding="utf-8") as arquivo:
+                    indice = json.load(arquivo)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Índice corrompido ignorado ({caminho}): {e}")
+                return None
+            self._guarda_em_cache(caminho, mtime, indice)
+
+        if indice.get('versao') != VERSAO_INDICE or indice.get('parametros') != parametros:
+            return None
+
+        return indice
+
+    def salva(self, video_path: str, leituras: list, parametros: dict, frames_processados: int) -> str:
+        """Grava o índice do vídeo de forma atômica"""
+        caminho = self.caminho_indice(video_path, parametros)
+        indice = {
+            'versao': VERSAO_INDICE,
+            'video_hash': self.hash_video(video_path),
+            'video_path': video_path,
+            'parametros': parametros,
+            'frames_processados': frames_processados,
+            'total_leituras': len(leituras),
+            'criado_em': datetime.now().isoformat(),
+            'leituras': leituras
+        }
+
+        # Temporário próprio de quem grava: dois jobs indexando o mesmo vídeo não se atrapalham
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(indice, arquivo, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+        return caminho
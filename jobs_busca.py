@@ -0,0 +1,198 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from acompanhamento import Acompanhamento, BuscaCancelada
+from controle_admissao import Sobrecarga
+
+# Jobs finalizados ficam disponíveis por este tempo (segundos)
+TTL_JOBS = 3600
+
+
+class JobBusca(Acompanhamento):
+    """
+    Busca executada em segundo plano.
+    Guarda o progresso e uma lista de eventos (progresso, detecção, vídeo, fim)
+    que os clientes consomem por polling ou streaming.
+    executa (opcional) roda outra busca no lugar de buscar_placa, ex.: a busca na biblioteca;
+    nela o progresso é contado em vídeos e cada vídeo concluído vira um evento 'video'.
+    vagas é quantas vagas da admissão o job ocupa (uma por vídeo rodando em paralelo).
+    """
+
+    def __init__(self, placa, parametros: dict, executa=None, tipo='placa', vagas=1):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.placa = placa
+        self.parametros = parametros
+        self.executa = executa
+        self.tipo = tipo
+        self.vagas = vagas
+        self.status = 'na_fila'
+        self.criado_em = datetime.now().isoformat()
+        self.inicio = None
+        self.fim = None
+        self.frames_previstos = 0
+        self.frames_processados = 0
+        self.deteccoes = []
+        self.resultado = None
+        self.erro = None
+        self.eventos = []
+        self._condicao = threading.Condition()
+
+    def _publica(self, tipo: str, dados: dict):
+        with self._condicao:
+            self.eventos.append({'tipo': tipo, 'dados': dados})
+            self._condicao.notify_all()
+
+    def inicia(self, frames_previstos: int):
+        self.frames_previstos = frames_previstos
+        self._publica('progresso', self.progresso_atual())
+
+    def progresso(self, frames_processados: int):
+        self.frames_processados = frames_processados
+        self._publica('progresso', self.progresso_atual())
+
+    def nova_deteccao(self, deteccao: dict):
+        self.deteccoes.append(deteccao)
+        self._publica('deteccao', deteccao)
+
+    def conclui_video(self, resultado_video: dict):
+        self._publica('video', resultado_video)
+
+    def comeca(self) -> bool:
+        """Passa de na_fila para executando; False se o job foi cancelado antes"""
+        with self._condicao:
+            if self.status != 'na_fila':
+                return False
+            self.status = 'executando'
+            self.inicio = time.time()
+            return True
+
+    def finaliza(self, status: str, se_status=None):
+        """
+        Muda o status final e publica 'fim' juntos, para quem lê os eventos nunca ver
+        o job finalizado sem o 'fim'; se_status (opcional) só finaliza a partir dele
+        """
+        with self._condicao:
+            if self.finalizado() or (se_status is not None and self.status != se_status):
+                return
+            self.status = status
+            self.fim = time.time()
+            self._publica('fim', self.progresso_atual())
+
+    def finalizado(self) -> bool:
+        return self.status in ('concluido', 'cancelado', 'erro')
+
+    def progresso_atual(self) -> dict:
+        """Frames processados, detecções até agora e estimativa de término"""
+        decorrido = (self.fim or time.time()) - self.inicio if self.inicio else 0.0
+        restante = None
+        if self.status == 'executando' and self.frames_processados and self.frames_previstos:
+            por_frame = decorrido / self.frames_processados
+            restante = max(0.0, por_frame * (self.frames_previstos - self.frames_processados))
+
+        return {
+            'job_id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'placa': self.placa,
+            'frames_processados': self.frames_processados,
+            'frames_previstos': self.frames_previstos,
+            'percentual': (min(1.0, self.frames_processados / self.frames_previstos)
+                           if self.frames_previstos else (1.0 if self.status == 'concluido' else 0.0)),
+            'total_deteccoes': len(self.deteccoes),
+            'decorrido_s': decorrido,
+            'eta_s': restante,
+            'erro': self.erro
+        }
+
+    def eventos_desde(self, posicao: int, timeout=15.0) -> list:
+        """Espera por eventos a partir da posição informada (vazio em caso de timeout)"""
+        with self._condicao:
+            if posicao >= len(self.eventos) and not self.finalizado():
+                self._condicao.wait(timeout)
+            return self.eventos[posicao:]
+
+
+class GerenciadorJobs:
+    """
+    Fila de buscas em segundo plano executadas sobre um PlacaDetector
+    Com admissao (ControleAdmissao), cada job ocupa uma das vagas compartilhadas com as
+    buscas síncronas; max_fila limita quantos jobs podem esperar (None: sem limite)
+    """
+
+    def __init__(self, detector, max_simultaneos=1, admissao=None, max_fila=None):
+        self.detector = detector
+        self.admissao = admissao
+        self.max_fila = max_fila
+        self.jobs = {}
+        self._trava = threading.Lock()
+        # Cada busca grava numa pasta própria; o limite real de CPU vem da admissão
+        self.executor = ThreadPoolExecutor(max_workers=max_simultaneos)
+
+    def _executa(self, job: JobBusca):
+        if self.admissao is None:
+            self._roda(job)
+            return
+        # Cancelado enquanto esperava na fila dos jobs: nem disputa a vaga
+        if job.finalizado():
+            return
+        # O job já passou pela fila dele: espera a vaga sem prazo
+        with self.admissao.vaga(limitar_fila=False, vagas=job.vagas):
+            self._roda(job)
+
+    def _roda(self, job: JobBusca):
+        # Cancelado enquanto ainda estava na fila
+        if not job.comeca():
+            return
+
+        try:
+            if job.executa is not None:
+                job.resultado = job.executa(job)
+            else:
+                job.resultado = self.detector.buscar_placa(job.placa, acompanhamento=job, **job.parametros)
+            job.finaliza('concluido')
+        except BuscaCancelada:
+            print(f"🛑 Busca {job.id} cancelada")
+            job.finaliza('cancelado')
+        except Exception as e:
+            print(f"❌ Erro no job {job.id}: {e}")
+            job.erro = str(e)
+            job.finaliza('erro')
+
+    def na_fila(self) -> int:
+        with self._trava:
+            return sum(1 for job in self.jobs.values() if job.status == 'na_fila')
+
+    def _limpa_antigos(self):
+        limite = time.time() - TTL_JOBS
+        with self._trava:
+            for job_id in [j.id for j in self.jobs.values() if j.finalizado() and j.fim < limite]:
+                del self.jobs[job_id]
+
+    def submete(self, placa, executa=None, tipo='placa', vagas=1, **parametros) -> JobBusca:
+        self._limpa_antigos()
+        if self.max_fila is not None and self.na_fila() >= self.max_fila:
+            retry_after = self.admissao.retry_after() if self.admissao else 1
+            raise Sobrecarga("Servidor ocupado: fila de jobs cheia", retry_after)
+        job = JobBusca(placa, parametros, executa, tipo, vagas)
+        with self._trava:
+            self.jobs[job.id] = job
+        self.executor.submit(self._executa, job)
+        return job
+
+    def obtem(self, job_id: str):
+        with self._trava:
+            return self.jobs.get(job_id)
+
+    def cancela(self, job_id: str):
+        job = self.obtem(job_id)
+        if job is None or job.finalizado():
+            return job
+
+        job.cancela()
+        # Se já começou, a própria busca para ao ver o cancelamento
+        job.finaliza('cancelado', se_status='na_fila')
+        return job
@@ -0,0 +1,134 @@
+import bisect
+
+import cv2
+
+# A partir deste intervalo compensa pular com seek em vez de grab
+LIMIAR_SEEK = 120
+
+
+def calcula_intervalo(fps_video: float, intervalo_frames=None, fps_amostragem=None) -> int:
+    """
+    Define de quantos em quantos frames o vídeo será amostrado
+    fps_amostragem (frames analisados por segundo) tem prioridade sobre intervalo_frames
+    """
+    if fps_amostragem:
+        if fps_video and fps_video > 0:
+            return max(1, int(round(fps_video / float(fps_amostragem))))
+        # Sem FPS no container, assume 30 FPS
+        return max(1, int(round(30.0 / float(fps_amostragem))))
+
+    if intervalo_frames:
+        return max(1, int(intervalo_frames))
+
+    return 15
+
+
+def agrupa_em_lotes(frames, tamanho_lote: int):
+    """Agrupa (frame_num, frame) em listas de até tamanho_lote itens"""
+    lote = []
+    for item in frames:
+        lote.append(item)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class LeitorFrames:
+    """
+    Lê apenas os frames amostrados do vídeo.
+    Os frames descartados são só avançados com grab() (sem converter para BGR)
+    e, para saltos grandes, o leitor pula direto com seek.
+    Os frames são numerados a partir de 1, como no loop original, e inicio/fim
+    (inclusivos) limitam a leitura a um trecho sem mudar a numeração.
+    frames (opcional) troca os múltiplos do intervalo por uma lista de frames escolhidos.
+    """
+
+    def __init__(self, video_path: str, intervalo=15, limiar_seek=LIMIAR_SEEK, inicio=None, fim=None, frames=None):
+        self.video_path = video_path
+        self.intervalo = max(1, int(intervalo))
+        self.limiar_seek = limiar_seek
+        self.inicio = max(1, int(inicio)) if inicio else 1
+        self.fim = int(fim) if fim else None
+        self.frames = sorted(set(frames)) if frames is not None else None
+        self.frames_lidos = 0
+        self.frames_entregues = 0
+
+    def info_video(self) -> dict:
+        """Retorna FPS e total de frames do vídeo"""
+        cap = cv2.VideoCapture(self.video_path)
+        info = {
+            'fps': cap.get(cv2.CAP_PROP_FPS) or 0.0,
+            'total_frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        }
+        cap.release()
+        return info
+
+    def frames_previstos(self, total_frames=None) -> int:
+        """Quantos frames amostrados o trecho tem (total_frames: total do vídeo, se já conhecido)"""
+        if total_frames is None:
+            total_frames = self.info_video()['total_frames']
+        fim = self.fim or total_frames
+        if self.fim and total_frames:
+            fim = min(self.fim, total_frames)
+        if self.frames is not None:
+            return sum(1 for frame_num in self.frames if self.inicio <= frame_num and (not fim or frame_num <= fim))
+        primeiro = self.proximo_amostrado(self.inicio)
+        return (fim - primeiro) // self.intervalo + 1 if fim >= primeiro else 0
+
+    def proximo_amostrado(self, frame_num: int):
+        """Menor frame amostrado (múltiplo do intervalo ou da lista) a partir de frame_num; None se acabou"""
+        if self.frames is not None:
+            posicao = bisect.bisect_left(self.frames, frame_num)
+            return self.frames[posicao] if posicao < len(self.frames) else None
+        return ((frame_num + self.intervalo - 1) // self.intervalo) * self.intervalo
+
+    def _usa_seek(self, salto: int) -> bool:
+        return self.limiar_seek is not None and salto > 1 and salto >= self.limiar_seek
+
+    def _posiciona(self, cap, frame_num: int) -> bool:
+        """Faz seek para o frame (1-based) e confere se o container obedeceu"""
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num - 1)
+        return int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_num - 1
+
+    def __iter__(self):
+        """Gera (frame_num, frame) apenas para os frames amostrados"""
+        cap = cv2.VideoCapture(self.video_path)
+        seek_preciso = True
+        frame_num = 0
+
+        try:
+            while True:
+                proximo = self.proximo_amostrado(max(frame_num + 1, self.inicio))
+                if proximo is None or (self.fim is not None and proximo > self.fim):
+                    return
+
+                if seek_preciso and self._usa_seek(proximo - frame_num):
+                    if self._posiciona(cap, proximo):
+                        frame_num = proximo - 1
+                    else:
+                        # Container sem seek preciso: reabre e volta para grab()
+                        seek_preciso = False
+                        cap.release()
+                        cap = cv2.VideoCapture(self.video_path)
+                        for _ in range(frame_num):
+                            cap.grab()
+
+                # Avança os frames descartados sem retrieve (sem converter para BGR)
+                while frame_num + 1 < proximo:
+                    if not cap.grab():
+                        return
+                    frame_num += 1
+                    self.frames_lidos += 1
+
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                frame_num += 1
+                self.frames_lidos += 1
+                self.frames_entregues += 1
+
+                yield frame_num, frame
+        finally:
+            cap.release()
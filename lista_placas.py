@@ -0,0 +1,144 @@
+from collections import Counter
+
+import numpy as np
+
+from comparador_placa import CUSTO_EDICAO, PARES_CONFUSAO, ComparadorPlaca, limpa_texto
+
+# Tamanho dos n-gramas do índice invertido
+TAMANHO_NGRAMA = 2
+
+
+def _classes_confusao() -> dict:
+    """
+    Junta os caracteres que o OCR confunde (direta ou indiretamente) numa mesma classe
+    Trocas dentro de uma classe custam menos que uma edição comum, então o índice
+    trabalha com o texto normalizado para não perder candidatos por causa delas
+    """
+    representante = {}
+
+    def raiz(char):
+        while representante.get(char, char) != char:
+            char = representante[char]
+        return char
+
+    for a, b in PARES_CONFUSAO:
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            representante[max(ra, rb)] = min(ra, rb)
+
+    return {char: raiz(char) for char in representante}
+
+
+CLASSES_CONFUSAO = _classes_confusao()
+
+
+def normaliza(texto: str) -> str:
+    """Troca cada caractere pelo representante da sua classe de confusão"""
+    return ''.join(CLASSES_CONFUSAO.get(char, char) for char in texto)
+
+
+def ngramas(texto: str) -> list:
+    return [texto[i:i + TAMANHO_NGRAMA] for i in range(len(texto) - TAMANHO_NGRAMA + 1)]
+
+
+class ListaPlacas:
+    """
+    Lista de placas procuradas ao mesmo tempo (watchlist).
+    As variações de todas as placas ficam num único ComparadorPlaca e num
+    índice invertido de n-gramas do texto normalizado: cada texto do OCR só
+    é comparado com as variações que compartilham n-gramas suficientes com
+    ele, então o custo cresce com o tamanho do vídeo e não com o da lista.
+    """
+
+    def __init__(self, variacoes_por_placa: dict, threshold=1.0):
+        self.threshold = threshold
+        self.placas = list(variacoes_por_placa)
+
+        # Variações repetidas entre placas viram uma só referência
+        donos = {}
+        for placa, variacoes in variacoes_por_placa.items():
+            for variacao in variacoes:
+                if variacao:
+                    donos.setdefault(variacao, []).append(placa)
+
+        self.comparador = ComparadorPlaca(list(donos), threshold)
+        self.donos = [donos[v] for v in self.comparador.variacoes]
+        self.exatas = {v: i for i, v in enumerate(self.comparador.variacoes)}
+
+        self.indice = {}
+        self.por_tamanho = {}
+        for r, variacao in enumerate(self.comparador.variacoes):
+            for ngrama in set(ngramas(normaliza(variacao))):
+                self.indice.setdefault(ngrama, []).append(r)
+            self.por_tamanho.setdefault(len(variacao), []).append(r)
+
+    def __len__(self):
+        return len(self.placas)
+
+    def candidatos(self, texto: str) -> list:
+        """
+        Variações que podem atingir o threshold com este texto
+        Com no máximo k edições comuns, os textos normalizados ainda compartilham
+        pelo menos (n-gramas distintos do texto) - k * TAMANHO_NGRAMA n-gramas
+        """
+        maior = max(len(texto), self.comparador.max_ref)
+        edicoes = int((1.0 - self.threshold) * maior / CUSTO_EDICAO + 1e-9)
+
+        # Inserção e remoção custam uma edição: tamanhos muito diferentes nunca batem
+        por_tamanho = [r for tamanho, refs in self.por_tamanho.items()
+                       if abs(tamanho - len(texto)) <= edicoes for r in refs]
+
+        ngramas_texto = set(ngramas(normaliza(texto)))
+        minimo = len(ngramas_texto) - edicoes * TAMANHO_NGRAMA
+        if minimo <= 0:
+            return por_tamanho
+
+        contagem = Counter()
+        for ngrama in ngramas_texto:
+            contagem.update(self.indice.get(ngrama, ()))
+        return [r for r in por_tamanho if contagem[r] >= minimo]
+
+    def compara_lote(self, textos: list) -> list:
+        """
+        Compara vários textos com todas as placas da lista
+        Retorna (resultados, comparacoes): para cada texto, lista de (placa, similaridade, variacao)
+        com match, e quantos pares texto x variação foram pontuados nesta chamada
+        (a lista é compartilhada entre buscas, então a contagem fica com quem chamou)
+        """
+        textos = [limpa_texto(t) for t in textos]
+        resultados = [[] for _ in textos]
+
+        pendentes = []
+        refs = set()
+        for b, texto in enumerate(textos):
+            if not texto:
+                continue
+
+            # Match exato: todas as placas que têm essa variação (as outras ainda são pontuadas,
+            # para o resultado de cada placa ser o mesmo de uma busca só por ela)
+            if texto in self.exatas:
+                resultados[b] = [(placa, 1.0, texto) for placa in self.donos[self.exatas[texto]]]
+
+            candidatos = self.candidatos(texto)
+            if candidatos:
+                pendentes.append(b)
+                refs.update(candidatos)
+
+        if not pendentes:
+            return resultados, 0
+
+        # Uma única programação dinâmica para os textos pendentes x candidatos
+        refs = np.array(sorted(refs), dtype=np.int64)
+        similaridades = self.comparador.similaridades([textos[b] for b in pendentes], refs)
+
+        for linha, b in enumerate(pendentes):
+            melhores = {placa: (similaridade, variacao) for placa, similaridade, variacao in resultados[b]}
+            for coluna in np.flatnonzero(similaridades[linha] >= self.threshold):
+                similaridade = float(similaridades[linha, coluna])
+                variacao = self.comparador.variacoes[refs[coluna]]
+                for placa in self.donos[refs[coluna]]:
+                    if placa not in melhores or similaridade > melhores[placa][0]:
+                        melhores[placa] = (similaridade, variacao)
+            resultados[b] = [(placa, sim, variacao) for placa, (sim, variacao) in melhores.items()]
+
+        return resultados, int(similaridades.size)
@@ -0,0 +1,94 @@
+import cv2
+
+# Proporção largura/altura aceita: placa de moto (~1.2, duas linhas) até placa de carro (~3.1)
+PROPORCAO_MIN = 0.8
+PROPORCAO_MAX = 4.5
+
+# Área da placa em relação ao recorte da moto
+AREA_MIN = 0.004
+AREA_MAX = 0.25
+
+
+class LocalizadorPlaca:
+    """
+    Encontra a região da placa dentro do recorte da moto com heurísticas de contorno:
+    realce de caracteres escuros sobre fundo claro (black-hat), gradiente horizontal,
+    fechamento morfológico e filtro por proporção/área. Só a região encontrada,
+    redimensionada para uma altura fixa, vai para o OCR; sem candidato, usa o recorte inteiro.
+    """
+
+    def __init__(self, altura_saida=128, margem=0.12):
+        self.altura_saida = altura_saida
+        self.margem = margem
+        self.localizadas = 0
+        self.sem_placa = 0
+
+    def candidatos(self, moto_img) -> list:
+        """Retângulos (x, y, w, h) com cara de placa, do mais provável para o menos provável"""
+        cinza = cv2.cvtColor(moto_img, cv2.COLOR_BGR2GRAY) if moto_img.ndim == 3 else moto_img
+        altura, largura = cinza.shape[:2]
+        kernel_texto = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, largura // 20), max(3, altura // 40)))
+
+        realce = cv2.morphologyEx(cinza, cv2.MORPH_BLACKHAT, kernel_texto)
+        gradiente = cv2.convertScaleAbs(cv2.Sobel(realce, cv2.CV_32F, 1, 0, ksize=3))
+        gradiente = cv2.GaussianBlur(gradiente, (5, 5), 0)
+        _, mascara = cv2.threshold(gradiente, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # Junta os caracteres de uma linha e as duas linhas da placa de moto num bloco só
+        mascara = cv2.morphologyEx(mascara, cv2.MORPH_CLOSE, kernel_texto, iterations=2)
+        mascara = cv2.morphologyEx(mascara, cv2.MORPH_OPEN, None, iterations=1)
+
+        contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        area_recorte = float(altura * largura)
+        candidatos = []
+        for contorno in contornos:
+            x, y, w, h = cv2.boundingRect(contorno)
+            proporcao = w / float(h)
+            area = w * h / area_recorte
+            if not (PROPORCAO_MIN <= proporcao <= PROPORCAO_MAX and AREA_MIN <= area <= AREA_MAX):
+                continue
+
+            # Mais texto dentro do retângulo = mais provável; placas ficam na metade de baixo da moto
+            densidade = cv2.countNonZero(mascara[y:y + h, x:x + w]) / float(w * h)
+            posicao = 1.0 + 0.5 * ((y + h / 2.0) / altura)
+            candidatos.append((densidade * posicao, (x, y, w, h)))
+
+        return [retangulo for _, retangulo in sorted(candidatos, reverse=True)]
+
+    def recorta(self, moto_img):
+        """
+        Retorna (imagem, deslocamento, escala): a região da placa redimensionada
+        (ou o recorte inteiro), o canto (x, y) dela no recorte e o fator aplicado
+        """
+        candidatos = self.candidatos(moto_img)
+        if not candidatos:
+            self.sem_placa += 1
+            return moto_img, (0, 0), 1.0
+
+        x, y, w, h = candidatos[0]
+        altura, largura = moto_img.shape[:2]
+        dx, dy = int(w * self.margem), int(h * self.margem)
+        x1, y1 = max(0, x - dx), max(0, y - dy)
+        x2, y2 = min(largura, x + w + dx), min(altura, y + h + dy)
+
+        placa = moto_img[y1:y2, x1:x2]
+        escala = self.altura_saida / float(placa.shape[0])
+        placa = cv2.resize(placa, (max(1, round(placa.shape[1] * escala)), self.altura_saida),
+                           interpolation=cv2.INTER_AREA if escala < 1 else cv2.INTER_CUBIC)
+        self.localizadas += 1
+        return placa, (x1, y1), escala
+
+    def resumo(self) -> dict:
+        total = self.localizadas + self.sem_placa
+        return {
+            'localizadas': self.localizadas,
+            'sem_placa': self.sem_placa,
+            'fracao_localizada': self.localizadas / total if total else 0.0
+        }
+
+
+def volta_para_recorte(resultados_ocr, deslocamento, escala) -> list:
+    """Converte os bboxes do OCR da região da placa para coordenadas do recorte da moto"""
+    x0, y0 = deslocamento
+    return [([[x / escala + x0, y / escala + y0] for x, y in bbox], texto, conf)
+            for bbox, texto, conf in resultados_ocr]
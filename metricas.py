@@ -0,0 +1,135 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (segundos) dos buckets do histograma de latência das etapas
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Etapas medidas; os contadores levam a descrição exportada no /api/metrics
+ETAPAS = ('decodificacao', 'deteccao', 'localizacao', 'ocr', 'montagem', 'comparacao', 'gravacao_jpeg', 'busca',
+          'alerta_ao_vivo')
+CONTADORES = {
+    'frames_decodificados': 'Frames amostrados decodificados',
+    'frames_inferidos': 'Frames enviados ao YOLO',
+    'pixels_inferidos': 'Pixels enviados ao YOLO (depois do recorte da ROI e da redução)',
+    'motos_detectadas': 'Motos detectadas pelo YOLO',
+    'chamadas_ocr': 'Chamadas do EasyOCR (fora do cache; um lote conta uma vez)',
+    'recortes_ocr': 'Recortes lidos pelo EasyOCR (fora do cache)',
+    'candidatos_placa': 'Textos de placa montados dos recortes e enviados à comparação',
+    'matches': 'Textos que bateram com alguma placa',
+    'buscas': 'Buscas executadas',
+    'buscas_recusadas': 'Buscas recusadas com 429 (servidor lotado)',
+    'frames_descartados': 'Frames ao vivo descartados porque o processamento estava atrasado'
+}
+
+PREFIXO = 'mottu'
+
+
+class Metricas:
+    """
+    Histogramas de latência por etapa e contadores, compartilhados pelas threads do detector.
+    instantaneo() tira uma foto dos valores; resumo(desde) dá só o que aconteceu depois dela
+    (o detalhamento por busca) e acumula() soma o que os processos do pool mediram.
+    """
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        self._trava = threading.Lock()
+        self._contadores = {nome: 0 for nome in CONTADORES}
+        self._histogramas = {etapa: self._histograma_vazio() for etapa in ETAPAS}
+
+    def _histograma_vazio(self) -> dict:
+        # Um bucket por limite e o último para +Inf (contagens não cumulativas)
+        return {'buckets': [0] * (len(self.limites) + 1), 'soma': 0.0, 'contagem': 0}
+
+    def incrementa(self, nome: str, valor=1):
+        with self._trava:
+            self._contadores[nome] = self._contadores.get(nome, 0) + valor
+
+    def observa(self, etapa: str, segundos: float):
+        posicao = next((i for i, limite in enumerate(self.limites) if segundos <= limite), len(self.limites))
+        with self._trava:
+            histograma = self._histogramas.setdefault(etapa, self._histograma_vazio())
+            histograma['buckets'][posicao] += 1
+            histograma['soma'] += segundos
+            histograma['contagem'] += 1
+
+    @contextmanager
+    def mede(self, etapa: str):
+        """with metricas.mede('ocr'): ... registra a duração do bloco no histograma da etapa"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observa(etapa, time.perf_counter() - inicio)
+
+    def instantaneo(self) -> dict:
+        """Cópia dos valores atuais (serializável, pode atravessar processos)"""
+        with self._trava:
+            return {
+                'contadores': dict(self._contadores),
+                'histogramas': {etapa: {'buckets': list(h['buckets']), 'soma': h['soma'], 'contagem': h['contagem']}
+                                for etapa, h in self._histogramas.items()}
+            }
+
+    def diferenca(self, desde: dict) -> dict:
+        """Valores acumulados depois do instantâneo desde"""
+        atual = self.instantaneo()
+        vazio = self._histograma_vazio()
+        for nome in atual['contadores']:
+            atual['contadores'][nome] -= desde['contadores'].get(nome, 0)
+        for etapa, histograma in atual['histogramas'].items():
+            anterior = desde['histogramas'].get(etapa, vazio)
+            histograma['buckets'] = [a - b for a, b in zip(histograma['buckets'], anterior['buckets'])]
+            histograma['soma'] -= anterior['soma']
+            histograma['contagem'] -= anterior['contagem']
+        return atual
+
+    def acumula(self, valores: dict):
+        """Soma valores medidos em outro lugar (ex.: a diferença devolvida por um worker)"""
+        with self._trava:
+            for nome, valor in valores['contadores'].items():
+                self._contadores[nome] = self._contadores.get(nome, 0) + valor
+            for etapa, outro in valores['histogramas'].items():
+                histograma = self._histogramas.setdefault(etapa, self._histograma_vazio())
+                histograma['buckets'] = [a + b for a, b in zip(histograma['buckets'], outro['buckets'])]
+                histograma['soma'] += outro['soma']
+                histograma['contagem'] += outro['contagem']
+
+    def resumo(self, desde=None) -> dict:
+        """Tempo total, chamadas e média por etapa e os contadores (desde um instantâneo, se informado)"""
+        valores = self.diferenca(desde) if desde else self.instantaneo()
+        return {
+            'etapas': {
+                etapa: {
+                    'chamadas': h['contagem'],
+                    'total_s': h['soma'],
+                    'media_ms': h['soma'] * 1000 / h['contagem']
+                }
+                for etapa, h in valores['histogramas'].items() if h['contagem']
+            },
+            'contadores': valores['contadores']
+        }
+
+    def formato_prometheus(self) -> str:
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        valores = self.instantaneo()
+        nome_histograma = f'{PREFIXO}_etapa_segundos'
+        linhas = [
+            f'# HELP {nome_histograma} Latência por etapa da busca',
+            f'# TYPE {nome_histograma} histogram'
+        ]
+        for etapa, h in valores['histogramas'].items():
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), h['buckets']):
+                acumulado += contagem
+                linhas.append(f'{nome_histograma}_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{nome_histograma}_sum{{etapa="{etapa}"}} {h["soma"]}')
+            linhas.append(f'{nome_histograma}_count{{etapa="{etapa}"}} {h["contagem"]}')
+
+        for nome, valor in valores['contadores'].items():
+            linhas.append(f'# HELP {PREFIXO}_{nome}_total {CONTADORES.get(nome, nome)}')
+            linhas.append(f'# TYPE {PREFIXO}_{nome}_total counter')
+            linhas.append(f'{PREFIXO}_{nome}_total {valor}')
+
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,366 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+# Eventos guardados para os clientes do SSE (os mais antigos são descartados)
+MAX_EVENTOS = 1000
+
+# Latências guardadas para média e percentis
+JANELA_LATENCIAS = 500
+
+# Esquemas de URL aceitos como fonte ao vivo (os hosts vêm da configuração)
+ESQUEMAS_AO_VIVO = ('rtsp', 'rtsps', 'http', 'https')
+
+
+def le_cameras(texto: str) -> dict:
+    """Câmeras configuradas no formato "nome=fonte,nome=fonte" (fonte: URL, arquivo ou índice)"""
+    cameras = {}
+    for item in filter(None, (parte.strip() for parte in texto.split(','))):
+        nome, separador, fonte = item.partition('=')
+        if not separador or not nome.strip() or not fonte.strip():
+            raise ValueError(f"Câmera inválida: {item} (use nome=fonte)")
+        cameras[nome.strip()] = fonte.strip()
+    return cameras
+
+
+def resolve_fonte(fonte: str, cameras: dict, hosts=()) -> str:
+    """
+    Fonte que o monitor pode abrir: o nome de uma câmera configurada (vira a fonte dela) ou uma URL
+    com esquema em ESQUEMAS_AO_VIVO e host na lista hosts. Arquivos locais e dispositivos só
+    entram como câmeras configuradas. Lança ValueError para qualquer outra coisa
+    """
+    if fonte in cameras:
+        return cameras[fonte]
+
+    partes = urlsplit(fonte)
+    if partes.scheme.lower() not in ESQUEMAS_AO_VIVO or not partes.hostname:
+        raise ValueError(f"Fonte não permitida: use uma câmera configurada ({', '.join(cameras) or 'nenhuma'}) "
+                         f"ou uma URL {'/'.join(ESQUEMAS_AO_VIVO)}")
+    if partes.hostname.lower() not in {host.lower() for host in hosts}:
+        raise ValueError(f"Host não permitido para fontes ao vivo: {partes.hostname}")
+    return fonte
+
+
+def abre_fonte(fonte):
+    """VideoCapture de uma URL (RTSP/HTTP), arquivo local ou índice de dispositivo ("0")"""
+    if isinstance(fonte, str) and fonte.isdigit():
+        fonte = int(fonte)
+    cap = cv2.VideoCapture(fonte)
+    # Em câmeras/streams, não deixa o OpenCV acumular frames velhos no buffer interno
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def resumo_latencias(latencias) -> dict:
+    if not latencias:
+        return {'amostras': 0, 'media_ms': None, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    valores = np.array(latencias) * 1000
+    return {
+        'amostras': len(valores),
+        'media_ms': float(valores.mean()),
+        'p50_ms': float(np.percentile(valores, 50)),
+        'p95_ms': float(np.percentile(valores, 95)),
+        'max_ms': float(valores.max())
+    }
+
+
+class MonitorAoVivo:
+    """
+    Monitoramento contínuo de uma fonte ao vivo contra uma lista de placas (watchlist).
+    Uma thread só captura e guarda o frame mais recente; outra processa (YOLO + OCR +
+    comparação) sempre o último frame disponível. Se o processamento atrasa, os frames
+    que chegaram nesse meio-tempo são descartados em vez de enfileirados.
+    Cada match vira um alerta (callback ao_alertar e eventos para o SSE) com a latência
+    da captura até o alerta. Um arquivo local faz o papel de câmera, no ritmo do FPS dele.
+    ao_terminar é chamado uma única vez quando o monitor para (pedido, fim do arquivo ou erro).
+    """
+
+    def __init__(self, detector, fonte, placas=(), threshold=0.8, ao_alertar=None,
+                 repetir=True, intervalo_realerta_s=30.0, ao_terminar=None):
+        self.id = uuid.uuid4().hex
+        self.fonte = fonte
+        self.detector = detector.para_video(str(fonte), os.path.join(detector.save_dir, f"ao_vivo_{self.id}"))
+        self.threshold = threshold
+        self.ao_alertar = ao_alertar
+        self.ao_terminar = ao_terminar
+        self._terminou = False
+        self._threads_ativas = 0
+        self._trava_fim = threading.Lock()
+        self.arquivo_local = isinstance(fonte, str) and os.path.isfile(fonte)
+        self.repetir = repetir
+        self.intervalo_realerta_s = intervalo_realerta_s
+        self.placas = self.detector.normaliza_placas(list(placas))
+        self.status = 'parado'
+        self.erro = None
+        self.iniciado_em = None
+        # time.time() de quando o monitor parou (quem guarda os monitores usa para descartá-los)
+        self.terminado_em = None
+
+        self._parar = threading.Event()
+        self._threads = []
+        # Último frame capturado: (frame_num, frame, capturado_em)
+        self._ultimo = None
+        self._condicao_frame = threading.Condition()
+        # Eventos para o SSE com posição absoluta (posicao_base = posição do primeiro guardado)
+        self.eventos = deque(maxlen=MAX_EVENTOS)
+        self.posicao_base = 0
+        self._condicao_eventos = threading.Condition()
+
+        self.frames_capturados = 0
+        self.frames_processados = 0
+        self.frames_descartados = 0
+        self.total_alertas = 0
+        self.atrasos = deque(maxlen=JANELA_LATENCIAS)
+        self.latencias_alerta = deque(maxlen=JANELA_LATENCIAS)
+        # Placa -> (trilha, instante) do último alerta, para não repetir o mesmo alerta
+        self._ultimos_alertas = {}
+
+    # --- watchlist ---
+
+    def atualiza_placas(self, placas):
+        """Troca a lista de placas monitoradas sem parar o monitor"""
+        self.placas = self.detector.normaliza_placas(list(placas))
+        self._publica('placas', {'placas': list(self.placas)})
+
+    # --- ciclo de vida ---
+
+    def inicia(self):
+        self._parar.clear()
+        self.status = 'executando'
+        self.iniciado_em = datetime.now().isoformat()
+        self._threads = [
+            threading.Thread(target=self._executa, args=(self._captura,), daemon=True),
+            threading.Thread(target=self._executa, args=(self._processa,), daemon=True)
+        ]
+        self._threads_ativas = len(self._threads)
+        for thread in self._threads:
+            thread.start()
+        print(f"📡 Monitor {self.id} ao vivo em {self.fonte} ({len(self.placas)} placa(s))")
+        return self
+
+    def para(self):
+        self._parar.set()
+        with self._condicao_frame:
+            self._condicao_frame.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self.status == 'executando':
+            self.status = 'parado'
+        self._publica('fim', self.estado())
+        self._termina()
+
+    def _termina(self):
+        """Chama ao_terminar uma única vez, seja qual for o motivo da parada"""
+        with self._trava_fim:
+            if self._terminou:
+                return
+            self._terminou = True
+        self.terminado_em = time.time()
+        # O último frame não serve mais para nada
+        with self._condicao_frame:
+            self._ultimo = None
+        if self.ao_terminar is not None:
+            self.ao_terminar(self)
+
+    def _executa(self, funcao):
+        try:
+            funcao()
+        except Exception as e:
+            print(f"❌ Monitor {self.id}: {e}")
+            self.erro = str(e)
+            self.status = 'erro'
+            self._parar.set()
+            with self._condicao_frame:
+                self._condicao_frame.notify_all()
+            self._publica('fim', self.estado())
+        finally:
+            # A última thread a sair libera o monitor (fim do arquivo ou erro)
+            with self._trava_fim:
+                self._threads_ativas -= 1
+                ultima = self._threads_ativas == 0
+            if ultima:
+                self._termina()
+
+    # --- captura ---
+
+    def _captura(self):
+        cap = abre_fonte(self.fonte)
+        if not cap.isOpened():
+            raise RuntimeError(f"Não foi possível abrir a fonte {self.fonte}")
+
+        # Arquivo local: entrega no ritmo do vídeo, como uma câmera
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        intervalo = 1.0 / fps if self.arquivo_local else 0.0
+        proximo = time.perf_counter()
+        falhas = 0
+
+        try:
+            while not self._parar.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    if self.arquivo_local and self.repetir:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    if self.arquivo_local:
+                        break
+                    # Stream caiu: tenta reconectar
+                    falhas += 1
+                    print(f"⚠️  Monitor {self.id}: sem frames da fonte, reconectando ({falhas})")
+                    cap.release()
+                    self._parar.wait(min(10.0, float(falhas)))
+                    cap = abre_fonte(self.fonte)
+                    continue
+                falhas = 0
+
+                capturado_em = time.time()
+                with self._condicao_frame:
+                    self.frames_capturados += 1
+                    # O frame anterior não chegou a ser processado: descartado
+                    if self._ultimo is not None:
+                        self.frames_descartados += 1
+                        self.detector.metricas.incrementa('frames_descartados')
+                    self._ultimo = (self.frames_capturados, frame, capturado_em)
+                    self._condicao_frame.notify()
+
+                if intervalo:
+                    # Depois de um atraso grande, volta ao ritmo a partir de agora em vez de correr atrás
+                    proximo = max(proximo + intervalo, time.perf_counter() - 1.0)
+                    self._parar.wait(max(0.0, proximo - time.perf_counter()))
+        finally:
+            cap.release()
+            if not self._parar.is_set():
+                # Arquivo terminou sem repetir
+                self.status = 'concluido'
+                self._parar.set()
+                with self._condicao_frame:
+                    self._condicao_frame.notify_all()
+                self._publica('fim', self.estado())
+
+    # --- processamento ---
+
+    def _proximo_frame(self):
+        """Espera e retira o frame mais recente (None quando o monitor para)"""
+        with self._condicao_frame:
+            while self._ultimo is None and not self._parar.is_set():
+                self._condicao_frame.wait(0.5)
+            item, self._ultimo = self._ultimo, None
+            return item
+
+    def _processa(self):
+        detector = self.detector
+        rastreador = detector.novo_rastreador(historico=False)
+        filtro = detector.novo_filtro_movimento()
+        leituras_frame = []
+
+        while True:
+            item = self._proximo_frame()
+            if item is None:
+                return
+            frame_num, frame, capturado_em = item
+            self.atrasos.append(time.time() - capturado_em)
+
+            motos = detector.detecta_motos_filtrado(filtro, [frame])[0]
+            if motos is None:
+                leituras_frame = detector.reaproveita_leituras(leituras_frame, frame_num)
+            else:
+                motos, trilhas = detector.seleciona_motos(rastreador, frame_num, motos)
+                leituras_frame = detector.le_motos(frame_num, frame, motos, trilhas, rastreador)
+            self.frames_processados += 1
+
+            placas = self.placas
+            if not placas:
+                continue
+            for leitura in leituras_frame:
+                for match in detector.avalia_leitura(leitura, placas, self.threshold):
+                    if self._deve_alertar(leitura.get('trilha'), match[5]):
+                        self._alerta(frame, leitura, match, capturado_em)
+
+    def _deve_alertar(self, trilha, placa) -> bool:
+        """Um alerta por moto rastreada; sem trilha, no máximo um a cada intervalo_realerta_s"""
+        agora = time.time()
+        anterior = self._ultimos_alertas.get(placa)
+        if anterior is not None:
+            trilha_anterior, instante = anterior
+            if trilha is not None and trilha == trilha_anterior:
+                return False
+            if agora - instante < self.intervalo_realerta_s:
+                return False
+        self._ultimos_alertas[placa] = (trilha, agora)
+        return True
+
+    def _alerta(self, frame, leitura: dict, match: tuple, capturado_em: float):
+        # Um monitor pode rodar por dias sem nenhuma busca: as imagens antigas vencem aqui também
+        self.detector.limpa_saidas_antigas()
+        alerta = self.detector.salva_deteccao(frame, leitura, match)
+        alertado_em = time.time()
+        alerta.update({
+            'monitor_id': self.id,
+            'trilha': leitura.get('trilha'),
+            'primeiro_frame': leitura['frame'],
+            'ultimo_frame': leitura['frame'],
+            'frames_com_match': 1,
+            'capturado_em': datetime.fromtimestamp(capturado_em).isoformat(),
+            'alertado_em': datetime.fromtimestamp(alertado_em).isoformat(),
+            'latencia_ms': (alertado_em - capturado_em) * 1000
+        })
+        self.total_alertas += 1
+        self.latencias_alerta.append(alertado_em - capturado_em)
+        self.detector.metricas.observa('alerta_ao_vivo', alertado_em - capturado_em)
+        print(f"🚨 Monitor {self.id}: {alerta['placa']} (latência {alerta['latencia_ms']:.0f} ms)")
+
+        self._publica('alerta', alerta)
+        if self.ao_alertar is not None:
+            try:
+                self.ao_alertar(alerta)
+            except Exception as e:
+                print(f"⚠️  Erro no callback de alerta: {e}")
+
+    # --- eventos e estado ---
+
+    def _publica(self, tipo: str, dados: dict):
+        with self._condicao_eventos:
+            if len(self.eventos) == self.eventos.maxlen:
+                self.posicao_base += 1
+            self.eventos.append({'tipo': tipo, 'dados': dados})
+            self._condicao_eventos.notify_all()
+
+    def eventos_desde(self, posicao: int, timeout=15.0) -> tuple:
+        """
+        Espera por eventos a partir da posição informada
+        Retorna (eventos, proxima_posicao); quem ficou para trás perde os descartados
+        """
+        with self._condicao_eventos:
+            fim = self.posicao_base + len(self.eventos)
+            if posicao >= fim and not self.finalizado():
+                self._condicao_eventos.wait(timeout)
+                fim = self.posicao_base + len(self.eventos)
+            inicio = max(posicao, self.posicao_base)
+            return list(self.eventos)[inicio - self.posicao_base:], fim
+
+    def finalizado(self) -> bool:
+        return self.status in ('parado', 'concluido', 'erro')
+
+    def estado(self) -> dict:
+        return {
+            'monitor_id': self.id,
+            'fonte': str(self.fonte),
+            'status': self.status,
+            'erro': self.erro,
+            'iniciado_em': self.iniciado_em,
+            'placas': list(self.placas),
+            'frames_capturados': self.frames_capturados,
+            'frames_processados': self.frames_processados,
+            'frames_descartados': self.frames_descartados,
+            'total_alertas': self.total_alertas,
+            # Idade do frame quando o processamento o pegou
+            'atraso_processamento': resumo_latencias(list(self.atrasos)),
+            # Da captura do frame até o alerta (inclui YOLO, OCR, comparação e gravação das imagens)
+            'latencia_alerta': resumo_latencias(list(self.latencias_alerta))
+        }
@@ -0,0 +1,125 @@
+from rastreador_motos import PADRAO_PLACA
+
+# Máximo de candidatos por recorte que seguem para a comparação com as placas
+MAX_CANDIDATOS = 8
+
+# Fragmentos numa mesma linha: centros verticais a menos desta fração da altura do maior
+TOLERANCIA_LINHA = 0.5
+
+# Uma placa raramente vem partida em mais pedaços que isso numa mesma linha
+MAX_FRAGMENTOS = 3
+
+# Placa de duas linhas: linhas de alturas parecidas (razão mínima) separadas por no máximo uma altura
+RAZAO_ALTURA_LINHAS = 0.5
+
+# Formato AAA#A## posição a posição: L letra, D dígito, X letra (Mercosul) ou dígito (modelo antigo)
+FORMATO_PLACA = 'LLLDXDD'
+
+# Trocas comuns do OCR: o caractere ainda cabe na posição se parecer com o que ela pede
+PARECE_LETRA = set('01245678')
+PARECE_DIGITO = set('OQDILZASGTB')
+
+
+def caixa(leitura: dict) -> tuple:
+    """Retângulo (x0, y0, x1, y1) envolvendo o bbox de um texto do OCR"""
+    xs = [x for x, _ in leitura['bbox']]
+    ys = [y for _, y in leitura['bbox']]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _encaixa(texto: str) -> bool:
+    """Texto de 7 caracteres no formato da placa ('?' vale qualquer caractere)"""
+    for char, classe in zip(texto, FORMATO_PLACA):
+        if char == '?' or classe == 'X':
+            continue
+        if classe == 'L' and not (char.isalpha() or char in PARECE_LETRA):
+            return False
+        if classe == 'D' and not (char.isdigit() or char in PARECE_DIGITO):
+            return False
+    return True
+
+
+def compativel_com_placa(texto: str) -> bool:
+    """
+    O texto pode ser uma placa AAA#A## lida pelo OCR: 7 caracteres no formato (aceitando as trocas
+    comuns, como 0/O e 8/B) ou 6 caracteres com um perdido em qualquer posição
+    """
+    if len(texto) == 7:
+        return _encaixa(texto)
+    if len(texto) == 6:
+        return any(_encaixa(texto[:i] + '?' + texto[i:]) for i in range(7))
+    return False
+
+
+def agrupa_linhas(leituras_ocr: list) -> list:
+    """
+    Agrupa os textos do OCR em linhas pelo centro vertical do bbox
+    Retorna as linhas de cima para baixo, cada uma com os textos da esquerda para a direita
+    """
+    linhas = []
+    for leitura in sorted(leituras_ocr, key=lambda l: sum(caixa(l)[1::2]) / 2.0):
+        x0, y0, x1, y1 = caixa(leitura)
+        centro, altura = (y0 + y1) / 2.0, y1 - y0
+        if linhas and abs(centro - linhas[-1]['centro']) <= TOLERANCIA_LINHA * max(altura, linhas[-1]['altura']):
+            linha = linhas[-1]
+            linha['textos'].append(leitura)
+            linha['centro'] += (centro - linha['centro']) / len(linha['textos'])
+            linha['altura'] = max(linha['altura'], altura)
+        else:
+            linhas.append({'centro': centro, 'altura': altura, 'textos': [leitura]})
+
+    return [sorted(linha['textos'], key=lambda l: caixa(l)[0]) for linha in linhas]
+
+
+def _empilhadas(cima: list, baixo: list) -> bool:
+    """As duas linhas podem ser as duas metades de uma placa de moto"""
+    topo_cima, base_cima = min(caixa(l)[1] for l in cima), max(caixa(l)[3] for l in cima)
+    topo_baixo, base_baixo = min(caixa(l)[1] for l in baixo), max(caixa(l)[3] for l in baixo)
+    altura_cima, altura_baixo = base_cima - topo_cima, base_baixo - topo_baixo
+    if min(altura_cima, altura_baixo) < RAZAO_ALTURA_LINHAS * max(altura_cima, altura_baixo):
+        return False
+    return topo_baixo - base_cima <= max(altura_cima, altura_baixo)
+
+
+def _trechos(linha: list) -> list:
+    """Sequências contíguas de até MAX_FRAGMENTOS textos da linha: (texto_limpo, original, confiança, x0, x1)"""
+    trechos = []
+    for i in range(len(linha)):
+        for j in range(i, min(len(linha), i + MAX_FRAGMENTOS)):
+            partes = linha[i:j + 1]
+            trechos.append((''.join(p['texto_limpo'] for p in partes), '+'.join(p['texto'] for p in partes),
+                            min(p['confianca'] for p in partes), caixa(partes[0])[0], caixa(partes[-1])[2]))
+    return trechos
+
+
+def monta_candidatos(leituras_ocr: list, max_candidatos=MAX_CANDIDATOS) -> list:
+    """
+    Monta os textos de placa possíveis a partir da posição de cada texto no recorte:
+    textos vizinhos numa mesma linha, da esquerda para a direita, e a linha de cima seguida
+    da de baixo quando estão uma sobre a outra (placa de moto em duas linhas).
+    Só ficam os candidatos no formato AAA#A## (trechos de 7 caracteres são extraídos de textos
+    maiores), os que casam exatamente com o padrão primeiro e depois por confiança.
+    Retorna lista de (texto_limpo, texto_original, confianca)
+    """
+    linhas = agrupa_linhas(leituras_ocr)
+    trechos_linhas = [_trechos(linha) for linha in linhas]
+
+    montados = [trecho[:3] for trechos in trechos_linhas for trecho in trechos]
+    for i in range(len(linhas) - 1):
+        if not _empilhadas(linhas[i], linhas[i + 1]):
+            continue
+        cima, baixo = trechos_linhas[i], trechos_linhas[i + 1]
+        for texto1, orig1, c1, a0, a1 in cima:
+            for texto2, orig2, c2, b0, b1 in baixo:
+                if min(a1, b1) > max(a0, b0):
+                    montados.append((f"{texto1}{texto2}", f"{orig1}/{orig2}", min(c1, c2)))
+
+    candidatos = {}
+    for texto, original, confianca in montados:
+        trechos = [texto] if len(texto) <= 7 else [texto[i:i + 7] for i in range(len(texto) - 6)]
+        for trecho in trechos:
+            if compativel_com_placa(trecho) and confianca > candidatos.get(trecho, ('', -1.0))[1]:
+                candidatos[trecho] = (original, confianca)
+
+    ordenados = sorted(candidatos.items(), key=lambda item: (not PADRAO_PLACA.match(item[0]), -item[1][1]))
+    return [(texto, original, confianca) for texto, (original, confianca) in ordenados[:max_candidatos]]
@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+
+# Lado maior de um recorte no lote do EasyOCR (recortes maiores são reduzidos, menores ficam como estão)
+LADO_MAX_OCR = 640
+
+
+def ordena_por_tamanho(imagens: list) -> list:
+    """Índices das imagens da menor para a maior: lotes com tamanhos parecidos desperdiçam menos borda"""
+    return sorted(range(len(imagens)), key=lambda i: (imagens[i].shape[0], imagens[i].shape[1]))
+
+
+def padroniza_lote(imagens: list, lado_max=LADO_MAX_OCR) -> tuple:
+    """
+    Deixa os recortes de um lote do mesmo tamanho, como o readtext_batched exige:
+    reduz os que passam de lado_max e completa os demais com borda preta à direita e embaixo
+    (sem distorcer nem mover o texto). Retorna (telas, escalas, (altura, largura))
+    """
+    reduzidas = []
+    escalas = []
+    for imagem in imagens:
+        altura, largura = imagem.shape[:2]
+        escala = min(1.0, lado_max / float(max(altura, largura)))
+        if escala < 1.0:
+            imagem = cv2.resize(imagem, (max(1, int(largura * escala)), max(1, int(altura * escala))),
+                                interpolation=cv2.INTER_AREA)
+        reduzidas.append(imagem)
+        escalas.append(escala)
+
+    altura = max(imagem.shape[0] for imagem in reduzidas)
+    largura = max(imagem.shape[1] for imagem in reduzidas)
+    telas = []
+    for imagem in reduzidas:
+        tela = np.zeros((altura, largura) + imagem.shape[2:], dtype=imagem.dtype)
+        tela[:imagem.shape[0], :imagem.shape[1]] = imagem
+        telas.append(tela)
+    return telas, escalas, (altura, largura)
+
+
+def desfaz_escala(resultados_ocr, escala: float) -> list:
+    """Bboxes do recorte reduzido -> pixels do recorte original"""
+    if escala == 1.0:
+        return list(resultados_ocr)
+    return [([[x / escala, y / escala] for x, y in bbox], texto, conf) for bbox, texto, conf in resultados_ocr]
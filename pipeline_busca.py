@@ -0,0 +1,300 @@
+import queue
+import threading
+import time
+
+from acompanhamento import Acompanhamento
+from leitor_frames import agrupa_em_lotes
+from rastreador_motos import DeteccoesPorTrilha
+
+# Marca de fim de fluxo entre as etapas
+FIM = object()
+
+
+class FilaMedida:
+    """Fila limitada que registra a profundidade a cada inserção"""
+
+    def __init__(self, nome: str, tamanho: int):
+        self.nome = nome
+        self.fila = queue.Queue(maxsize=tamanho)
+        self.amostras = 0
+        self.soma_profundidade = 0
+        self.max_profundidade = 0
+
+    def coloca(self, item, parar: threading.Event):
+        """Bloqueia enquanto a fila estiver cheia (backpressure)"""
+        while not parar.is_set():
+            try:
+                self.fila.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+        profundidade = self.fila.qsize()
+        self.amostras += 1
+        self.soma_profundidade += profundidade
+        self.max_profundidade = max(self.max_profundidade, profundidade)
+
+    def pega(self, parar: threading.Event):
+        while not parar.is_set():
+            try:
+                return self.fila.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return FIM
+
+    def pega_ate(self, prazo: float, parar: threading.Event):
+        """Como pega, mas desiste no prazo (time.monotonic) e retorna None"""
+        while not parar.is_set():
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                return None
+            try:
+                return self.fila.get(timeout=min(0.1, restante))
+            except queue.Empty:
+                continue
+        return FIM
+
+    def resumo(self) -> dict:
+        return {
+            'capacidade': self.fila.maxsize,
+            'profundidade_media': self.soma_profundidade / self.amostras if self.amostras else 0.0,
+            'profundidade_max': self.max_profundidade
+        }
+
+
+class PipelineBusca:
+    """
+    Executa a busca em etapas paralelas ligadas por filas limitadas:
+    decodificação -> YOLO (em lotes) -> OCR (pool de workers) -> escrita.
+    Com tamanho_lote_ocr > 1 cada worker de OCR junta as motos de vários frames
+    até completar o lote ou passar espera_lote_ocr_ms, e lê todas numa chamada.
+    A etapa de escrita reordena os frames, então leituras e detecções
+    saem exatamente na mesma ordem do modo sequencial.
+    """
+
+    def __init__(self, detector, workers_ocr=2, tamanho_fila=16):
+        self.detector = detector
+        self.workers_ocr = max(1, int(workers_ocr))
+        self.fila_frames = FilaMedida('frames', tamanho_fila)
+        self.fila_ocr = FilaMedida('ocr', tamanho_fila)
+        self.fila_escrita = FilaMedida('escrita', tamanho_fila)
+        self.parar = threading.Event()
+        self.erros = []
+        self.ocupado = {'decodificacao': 0.0, 'deteccao': 0.0, 'ocr': 0.0, 'escrita': 0.0}
+        self._trava_ocupado = threading.Lock()
+        self.acompanhamento = Acompanhamento()
+        self.rastreador = None
+        self.filtro = None
+        self.primeiro_match = False
+
+    def _soma_ocupado(self, etapa: str, segundos: float):
+        with self._trava_ocupado:
+            self.ocupado[etapa] += segundos
+
+    def _executa_etapa(self, funcao, *args):
+        """Roda uma etapa e interrompe o pipeline inteiro se ela falhar"""
+        try:
+            funcao(*args)
+        except Exception as e:
+            self.erros.append(e)
+            self.parar.set()
+
+    def _decodifica(self, leitor):
+        frames = self.detector.le_frames(leitor)
+        try:
+            while not self.parar.is_set():
+                self.acompanhamento.verifica_cancelamento()
+
+                t0 = time.perf_counter()
+                item = next(frames, FIM)
+                self._soma_ocupado('decodificacao', time.perf_counter() - t0)
+
+                self.fila_frames.coloca(item, self.parar)
+                if item is FIM:
+                    break
+        finally:
+            # Libera o VideoCapture mesmo se o pipeline for interrompido
+            frames.close()
+
+    def _frames_da_fila(self):
+        while True:
+            item = self.fila_frames.pega(self.parar)
+            if item is FIM:
+                return
+            yield item
+
+    def _detecta(self, tamanho_lote: int):
+        sequencia = 0
+        for lote in agrupa_em_lotes(self._frames_da_fila(), tamanho_lote):
+            t0 = time.perf_counter()
+            motos_por_frame = self.detector.detecta_motos_filtrado(self.filtro, [frame for _, frame in lote])
+            self._soma_ocupado('deteccao', time.perf_counter() - t0)
+
+            # O rastreador precisa ver os frames em ordem, então roda nesta etapa. Antes de escolher
+            # as motos de um frame ele espera as leituras pendentes das mesmas trilhas, como no modo
+            # sequencial: frame a frame ou, com lote de OCR, as de lotes anteriores do YOLO
+            desde = lote[0][0] if self.detector.tamanho_lote_ocr > 1 else None
+            for (frame_num, frame), motos in zip(lote, motos_por_frame):
+                motos, trilhas = self.detector.seleciona_motos(self.rastreador, frame_num, motos, self.parar, desde)
+                self.fila_ocr.coloca((sequencia, frame_num, frame, motos, trilhas), self.parar)
+                sequencia += 1
+
+        # Um fim para cada worker de OCR
+        for _ in range(self.workers_ocr):
+            self.fila_ocr.coloca(FIM, self.parar)
+
+    def _junta_lote(self, item) -> tuple:
+        """
+        Junta frames da fila de OCR até somar tamanho_lote_ocr motos ou passar espera_lote_ocr_ms
+        Retorna (itens, chegou_ao_fim)
+        """
+        itens = [item]
+        tamanho = self.detector.tamanho_lote_ocr
+        if tamanho <= 1:
+            return itens, False
+
+        recortes = len(item[3] or [])
+        prazo = time.monotonic() + self.detector.espera_lote_ocr_ms / 1000.0
+        while recortes < tamanho:
+            proximo = self.fila_ocr.pega_ate(prazo, self.parar)
+            if proximo is None:
+                break
+            if proximo is FIM:
+                return itens, True
+            itens.append(proximo)
+            recortes += len(proximo[3] or [])
+        return itens, False
+
+    def _le_ocr(self, placa_alvo, threshold):
+        while True:
+            item = self.fila_ocr.pega(self.parar)
+            if item is FIM:
+                self.fila_escrita.coloca(FIM, self.parar)
+                return
+
+            itens, chegou_ao_fim = self._junta_lote(item)
+
+            # Frame parado: a escrita copia as leituras do frame anterior, que já estão em ordem
+            for sequencia, frame_num, frame, motos, _ in itens:
+                if motos is None:
+                    self.fila_escrita.coloca((sequencia, frame_num, frame, None, None), self.parar)
+            itens = [item for item in itens if item[3] is not None]
+
+            t0 = time.perf_counter()
+            leituras_por_frame = self.detector.le_motos_frames(
+                [(frame_num, frame, motos, trilhas) for _, frame_num, frame, motos, trilhas in itens],
+                self.rastreador) if itens else []
+            saidas = []
+            for (sequencia, frame_num, frame, _, _), leituras_frame in zip(itens, leituras_por_frame):
+                matches = []
+                if placa_alvo is not None:
+                    for leitura in leituras_frame:
+                        for match in self.detector.avalia_leitura(leitura, placa_alvo, threshold):
+                            matches.append((leitura, match))
+                saidas.append((sequencia, frame_num, frame, leituras_frame, matches))
+            self._soma_ocupado('ocr', time.perf_counter() - t0)
+
+            for saida in saidas:
+                self.fila_escrita.coloca(saida, self.parar)
+
+            if chegou_ao_fim:
+                self.fila_escrita.coloca(FIM, self.parar)
+                return
+
+    def _escreve(self, placa_alvo, threshold, leituras: list, deteccoes: DeteccoesPorTrilha, estatisticas: dict):
+        pendentes = {}
+        proxima = 0
+        fins = 0
+        leituras_anteriores = []
+
+        while fins < self.workers_ocr:
+            item = self.fila_escrita.pega(self.parar)
+            if item is FIM:
+                if self.parar.is_set():
+                    return
+                fins += 1
+                continue
+
+            pendentes[item[0]] = item
+
+            # Grava na ordem dos frames, como no modo sequencial
+            while proxima in pendentes:
+                _, frame_num, frame, leituras_frame, matches = pendentes.pop(proxima)
+                proxima += 1
+
+                t0 = time.perf_counter()
+                if leituras_frame is None:
+                    leituras_frame = self.detector.reaproveita_leituras(leituras_anteriores, frame_num)
+                    matches = []
+                    if placa_alvo is not None:
+                        matches = [(leitura, match) for leitura in leituras_frame
+                                   for match in self.detector.avalia_leitura(leitura, placa_alvo, threshold)]
+                leituras_anteriores = leituras_frame
+
+                estatisticas['frames_processados'] += 1
+                leituras.extend(leituras_frame)
+                for leitura, match in matches:
+                    deteccoes.registra(frame, leitura, match)
+                self._soma_ocupado('escrita', time.perf_counter() - t0)
+
+                self.acompanhamento.progresso(estatisticas['frames_processados'])
+
+                if self.primeiro_match and deteccoes.deteccoes:
+                    # Para as outras etapas; o que já estava nas filas é descartado
+                    estatisticas['parou_no_frame'] = frame_num
+                    self.parar.set()
+                    return
+
+    def executa(self, leitor, tamanho_lote: int, placa_alvo=None, threshold=1.0, acompanhamento=None,
+                primeiro_match=False):
+        """
+        Retorna (leituras, deteccoes, estatisticas) no mesmo formato do modo sequencial
+        primeiro_match interrompe o pipeline assim que a primeira detecção é gravada
+        """
+        self.acompanhamento = acompanhamento or Acompanhamento()
+        self.primeiro_match = primeiro_match
+        self.rastreador = self.detector.novo_rastreador()
+        self.filtro = self.detector.novo_filtro_movimento()
+        leituras = []
+        deteccoes = DeteccoesPorTrilha(self.detector, self.acompanhamento)
+        estatisticas = {
+            'frames_processados': 0,
+            'tamanho_lote': tamanho_lote,
+            'modo_execucao': 'pipeline',
+            'workers_ocr': self.workers_ocr
+        }
+
+        threads = [
+            threading.Thread(target=self._executa_etapa, args=(self._decodifica, leitor), daemon=True),
+            threading.Thread(target=self._executa_etapa, args=(self._detecta, tamanho_lote), daemon=True)
+        ]
+        for _ in range(self.workers_ocr):
+            threads.append(threading.Thread(target=self._executa_etapa,
+                                            args=(self._le_ocr, placa_alvo, threshold), daemon=True))
+        threads.append(threading.Thread(target=self._executa_etapa,
+                                        args=(self._escreve, placa_alvo, threshold, leituras, deteccoes, estatisticas),
+                                        daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.erros:
+            raise self.erros[0]
+
+        estatisticas['tempo_deteccao_s'] = self.ocupado['deteccao']
+        estatisticas['tempo_ocr_s'] = self.ocupado['ocr']
+        # No OCR o tempo ocupado é a soma de todos os workers
+        estatisticas['etapas'] = {etapa: {'ocupado_s': segundos} for etapa, segundos in self.ocupado.items()}
+        estatisticas['filas'] = {
+            fila.nome: fila.resumo() for fila in (self.fila_frames, self.fila_ocr, self.fila_escrita)
+        }
+        if self.rastreador is not None:
+            self.rastreador.marca_visto_ate(leituras)
+            deteccoes.finaliza(self.rastreador)
+            estatisticas['rastreamento'] = self.rastreador.resumo()
+        if self.filtro is not None:
+            estatisticas['movimento'] = self.filtro.resumo()
+
+        return leituras, deteccoes.deteccoes, estatisticas
@@ -1,22 +1,245 @@
+import copy
 import cv2
-from ultralytics import YOLO
-import easyocr
+import numpy as np
 import re
 import os
 import difflib
 import base64
+import threading
+import time
+import uuid
 from datetime import datetime
+from acompanhamento import Acompanhamento, AcompanhamentoPassadas
+from amostragem_adaptativa import AmostragemAdaptativa
+from backends_deteccao import BACKENDS_DETECCAO, BackendDeteccao, cria_backend, nome_backend
+from cache_ocr import CacheOCR, chave_perceptual, escala_resultados, normaliza_resultados
+from comparador_placa import limpa_texto
+from filtro_movimento import FiltroMovimento
+from indice_leituras import IndiceLeituras
+from leitor_frames import LeitorFrames, agrupa_em_lotes, calcula_intervalo
+from localizador_placa import LocalizadorPlaca, volta_para_recorte
+from lista_placas import ListaPlacas
+from metricas import Metricas
+from montagem_placa import MAX_CANDIDATOS, monta_candidatos
+from ocr_lote import desfaz_escala, ordena_por_tamanho, padroniza_lote
+from regioes_inferencia import RegioesInferencia
+from pipeline_busca import PipelineBusca
+from processamento_paralelo import PoolProcessos
+from rastreador_motos import PADRAO_PLACA, DeteccoesPorTrilha, RastreadorMotos
+
+# Imagens e pastas de busca mais antigas que isto (segundos) são apagadas
+TTL_SAIDA = 3600
+
+# A limpeza por idade roda no máximo uma vez a cada tantos segundos
+INTERVALO_LIMPEZA_S = 60
+
+# Modos de execução da varredura do vídeo
+MODOS_EXECUCAO = ('sequencial', 'pipeline', 'processos')
+
+# Unidades de inicio/fim de uma busca num trecho do vídeo
+UNIDADES_TRECHO = ('segundos', 'frames')
+
+# Quando YOLO e EasyOCR são carregados:
+# 'imediato' (no construtor), 'segundo_plano' (thread iniciada no construtor),
+# 'sob_demanda' (no primeiro uso) ou 'pre_fork' (pesos no construtor, aquecimento no primeiro uso,
+# para carregar uma vez no processo pai e compartilhar com os workers via copy-on-write)
+MODOS_CARREGAMENTO = ('imediato', 'segundo_plano', 'sob_demanda', 'pre_fork')
 
 class PlacaDetector:
-    def __init__(self, video_path="teste.mp4", save_dir="prints_placa"):
+    def __init__(self, video_path="teste.mp4", save_dir="prints_placa", index_dir="indices",
+                 intervalo_frames=15, fps_amostragem=None, tamanho_lote=8,
+                 modo_execucao='sequencial', workers_ocr=2, tamanho_fila=16, workers_processos=None,
+                 qualidade_jpeg=90, tamanho_miniatura=320, rastrear_motos=True, reocr_a_cada=10,
+                 confianca_confirmacao=0.5, limiar_movimento=None,
+                 tamanho_cache_ocr=4096, arquivo_cache_ocr=None, localizar_placa=False,
+                 carregamento='imediato', backend_deteccao='ultralytics', modelo_deteccao=None, leitor_ocr=None,
+                 ttl_saida=TTL_SAIDA, regioes_inferencia=None, resolucao_inferencia=None,
+                 tamanho_lote_ocr=1, espera_lote_ocr_ms=50, max_candidatos_placa=MAX_CANDIDATOS,
+                 amostragem_adaptativa=False, passo_grosso=60, passo_fino=5, raio_refino=30):
         self.video_path = video_path
         self.save_dir = save_dir
-        self.model = YOLO("yolov8n.pt")
-        self.reader = easyocr.Reader(['en', 'pt'], gpu=False)
-        
+        # Raiz de todas as imagens (as buscas gravam em subpastas dela) e há quanto tempo foi limpa
+        self.pasta_raiz = save_dir
+        self.ttl_saida = ttl_saida
+        self._limpeza = {'ultima': 0.0}
+        # Detector original quando este é uma cópia feita por para_video (modelos e pool ficam nele)
+        self._origem = None
+        self.intervalo_frames = intervalo_frames
+        self.fps_amostragem = fps_amostragem
+        self.tamanho_lote = tamanho_lote
+        self.modo_execucao = modo_execucao
+        self.workers_ocr = workers_ocr
+        self.tamanho_fila = tamanho_fila
+        self.workers_processos = workers_processos
+        self._pool_processos = None
+        self._trava_pool = threading.Lock()
+        self.qualidade_jpeg = qualidade_jpeg
+        self.tamanho_miniatura = tamanho_miniatura
+        # Comparadores por lista de placas/threshold, compartilhados pelas cópias de para_video e pelas threads
+        self._comparadores = {}
+        self._trava_comparadores = threading.Lock()
+        # Pares texto x variação pontuados (varre_ou_consulta_indice troca por um contador próprio da busca)
+        self._comparacoes = {'total': 0}
+        self._trava_comparacoes = threading.Lock()
+        self.rastrear_motos = rastrear_motos
+        self.reocr_a_cada = reocr_a_cada
+        self.confianca_confirmacao = confianca_confirmacao
+        self.limiar_movimento = limiar_movimento
+        # Resultados do EasyOCR por hash perceptual do recorte (0 desliga o cache)
+        self.cache_ocr = CacheOCR(tamanho_cache_ocr, arquivo_cache_ocr) if tamanho_cache_ocr else None
+        # OCR só na região da placa em vez do recorte inteiro da moto
+        self.localizador = LocalizadorPlaca() if localizar_placa else None
+        # Recortes por chamada do EasyOCR (1 = um por vez) e quanto o pipeline espera para completar o lote
+        self.tamanho_lote_ocr = max(1, int(tamanho_lote_ocr))
+        self.espera_lote_ocr_ms = espera_lote_ocr_ms
+        # Textos de placa montados por recorte que seguem para a comparação
+        self.max_candidatos_placa = max_candidatos_placa
+        # Varredura do grosso para o fino no lugar do intervalo fixo (None = intervalo fixo)
+        self.amostragem = (AmostragemAdaptativa(passo_grosso, passo_fino, raio_refino)
+                           if amostragem_adaptativa else None)
+        # Resolução do YOLO e polígonos de interesse por vídeo/câmera (dicionário ou arquivo JSON)
+        self.regioes = (RegioesInferencia(regioes_inferencia, resolucao_inferencia)
+                        if regioes_inferencia or resolucao_inferencia else None)
+        self.indice = IndiceLeituras(index_dir)
+        # Latência por etapa e contadores (expostos em /api/metrics)
+        self.metricas = Metricas()
+
+        # Modelos: carregados conforme o modo de carregamento
+        # backend_deteccao é o nome de um backend ou uma subclasse de BackendDeteccao (ex.: a do benchmark sintético)
+        injetado = isinstance(backend_deteccao, type) and issubclass(backend_deteccao, BackendDeteccao)
+        if not injetado and backend_deteccao not in BACKENDS_DETECCAO:
+            raise ValueError(f"Backend de detecção inválido: {backend_deteccao}")
+        self.backend_deteccao = backend_deteccao
+        self.modelo_deteccao = modelo_deteccao or (None if injetado else BACKENDS_DETECCAO[backend_deteccao])
+        # Fábrica do leitor de OCR (None = EasyOCR); precisa ser picklable para o modo processos
+        self.leitor_ocr = leitor_ocr
+        self._model = None
+        self._reader = None
+        self.estado_modelos = 'nao_carregado'
+        self.erro_modelos = None
+        self.tempos_modelos = {}
+        self._trava_modelos = threading.Lock()
+        self._modelos_prontos = threading.Event()
+
         # Cria diretório se não existir
         os.makedirs(save_dir, exist_ok=True)
 
+        if carregamento not in MODOS_CARREGAMENTO:
+            raise ValueError(f"Modo de carregamento inválido: {carregamento}")
+        if carregamento == 'imediato':
+            self.prepara_modelos()
+        elif carregamento == 'pre_fork':
+            self.carrega_modelos()
+            # Cada processo filho aquece a própria cópia assim que nasce
+            os.register_at_fork(after_in_child=self.inicia_carregamento)
+        elif carregamento == 'segundo_plano':
+            self.inicia_carregamento()
+
+    @property
+    def model(self):
+        """Backend do YOLO pronto para uso (espera o carregamento, se ainda estiver em andamento)"""
+        origem = self._origem or self
+        origem.prepara_modelos()
+        return origem._model
+
+    @property
+    def reader(self):
+        """EasyOCR pronto para uso (espera o carregamento, se ainda estiver em andamento)"""
+        origem = self._origem or self
+        origem.prepara_modelos()
+        return origem._reader
+
+    def carrega_modelos(self):
+        """Carrega os pesos do YOLO e do EasyOCR uma única vez"""
+        with self._trava_modelos:
+            if self._model is not None:
+                return
+
+            self.estado_modelos = 'carregando'
+            inicio = time.perf_counter()
+            try:
+                print(f"📦 Carregando YOLO ({nome_backend(self.backend_deteccao)}: {self.modelo_deteccao}) e EasyOCR...")
+                model = cria_backend(self.backend_deteccao, self.modelo_deteccao)
+                if self.leitor_ocr is None:
+                    # Importado aqui: só o import do PyTorch já leva segundos
+                    import easyocr
+                    self._reader = easyocr.Reader(['en', 'pt'], gpu=False)
+                else:
+                    self._reader = self.leitor_ocr()
+                self._model = model
+            except Exception as e:
+                self.estado_modelos = 'erro'
+                self.erro_modelos = str(e)
+                raise
+
+            self.erro_modelos = None
+            self.estado_modelos = 'carregado'
+            self.tempos_modelos['carregamento_s'] = time.perf_counter() - inicio
+
+    def aquece_modelos(self):
+        """Roda uma inferência num frame vazio para a primeira busca não pagar a inicialização"""
+        with self._trava_modelos:
+            if self._modelos_prontos.is_set():
+                return
+
+            self.estado_modelos = 'aquecendo'
+            inicio = time.perf_counter()
+            try:
+                self._model.detecta([np.zeros((640, 640, 3), dtype=np.uint8)])
+                self._reader.readtext(np.zeros((64, 256, 3), dtype=np.uint8), detail=1)
+            except Exception as e:
+                self.estado_modelos = 'erro'
+                self.erro_modelos = str(e)
+                raise
+
+            self.estado_modelos = 'pronto'
+            self.tempos_modelos['aquecimento_s'] = time.perf_counter() - inicio
+            self._modelos_prontos.set()
+            print(f"✅ Modelos prontos (carregamento {self.tempos_modelos.get('carregamento_s', 0.0):.1f}s, "
+                  f"aquecimento {self.tempos_modelos['aquecimento_s']:.1f}s)")
+
+    def prepara_modelos(self):
+        """Garante os modelos carregados e aquecidos, bloqueando até ficarem prontos"""
+        if self._modelos_prontos.is_set():
+            return
+        self.carrega_modelos()
+        self.aquece_modelos()
+
+    def inicia_carregamento(self) -> threading.Thread:
+        """Carrega e aquece os modelos numa thread, sem travar quem criou o detector"""
+        thread = threading.Thread(target=self._prepara_em_segundo_plano, daemon=True)
+        thread.start()
+        return thread
+
+    def _prepara_em_segundo_plano(self):
+        try:
+            self.prepara_modelos()
+        except Exception as e:
+            print(f"❌ Erro ao carregar os modelos: {e}")
+
+    def estado(self) -> dict:
+        """Estado dos modelos: nao_carregado, carregando, carregado, aquecendo, pronto ou erro"""
+        return {
+            'estado': self.estado_modelos,
+            'backend_deteccao': nome_backend(self.backend_deteccao),
+            'pronto': self._modelos_prontos.is_set(),
+            'erro': self.erro_modelos,
+            'tempos': dict(self.tempos_modelos)
+        }
+
+    def para_video(self, video_path: str, save_dir=None):
+        """
+        Detector para outro vídeo que compartilha modelos, pool, caches, índice e métricas com este
+        save_dir separado evita que buscas simultâneas misturem as imagens umas das outras
+        """
+        detector = copy.copy(self)
+        # A cópia usa os modelos e o pool do original, mesmo que ainda estejam carregando
+        detector._origem = self._origem or self
+        detector.video_path = video_path
+        detector.save_dir = save_dir or self.save_dir
+        os.makedirs(detector.save_dir, exist_ok=True)
+        return detector
+
     def limpa_texto_placa(self, texto: str) -> str:
         """Remove espaços e caracteres especiais"""
         texto = texto.upper().strip()
@@ -122,140 +345,994 @@ class PlacaDetector:
         except:
             return None
 
-    def buscar_placa(self, placa_alvo: str, threshold=1.0):
+    def grava_jpeg(self, imagem, nome_arquivo: str) -> str:
+        """Codifica o JPEG em memória e grava no disco uma única vez"""
+        with self.metricas.mede('gravacao_jpeg'):
+            ok, buffer = cv2.imencode('.jpg', imagem, [cv2.IMWRITE_JPEG_QUALITY, int(self.qualidade_jpeg)])
+            if not ok:
+                raise ValueError(f"Falha ao codificar {nome_arquivo}")
+
+            caminho = os.path.join(self.save_dir, nome_arquivo)
+            # A limpeza por idade pode ter removido a pasta de uma busca muito longa
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(buffer.tobytes())
+        return caminho
+
+    def miniatura(self, imagem):
+        """Reduz a imagem para caber em tamanho_miniatura (lado maior)"""
+        altura, largura = imagem.shape[:2]
+        escala = self.tamanho_miniatura / float(max(altura, largura))
+        if escala >= 1.0:
+            return imagem
+        return cv2.resize(imagem, (max(1, int(largura * escala)), max(1, int(altura * escala))),
+                          interpolation=cv2.INTER_AREA)
+
+    def nova_pasta_busca(self) -> str:
+        """Subpasta exclusiva de uma busca, para buscas simultâneas não apagarem as imagens umas das outras"""
+        nome = f"busca_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        return os.path.join(self.save_dir, nome)
+
+    def limpa_saidas_antigas(self, forcar=False):
         """
-        Busca uma placa específica no vídeo
-        Retorna dicionário com resultados encontrados
+        Apaga as imagens com mais de ttl_saida segundos (em qualquer subpasta da raiz)
+        e as pastas de busca e de monitores ao vivo que ficaram vazias; roda no máximo a cada INTERVALO_LIMPEZA_S
         """
-        print(f"🇧🇷 BUSCA PLACA BRASILEIRA: {placa_alvo}")
-        
-        # Limpa pasta anterior
-        for arquivo in os.listdir(self.save_dir):
-            file_path = os.path.join(self.save_dir, arquivo)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
+        agora = time.time()
+        if not self.ttl_saida or (not forcar and agora - self._limpeza['ultima'] < INTERVALO_LIMPEZA_S):
+            return
+        self._limpeza['ultima'] = agora
+        limite = agora - self.ttl_saida
 
-        cap = cv2.VideoCapture(self.video_path)
-        frame_num = 0
+        for pasta, subpastas, arquivos in os.walk(self.pasta_raiz, topdown=False):
+            try:
+                # Idade da pasta antes de apagar os arquivos (apagar muda o mtime dela)
+                pasta_antiga = os.path.getmtime(pasta) < limite
+                for arquivo in arquivos:
+                    caminho = os.path.join(pasta, arquivo)
+                    if os.path.getmtime(caminho) < limite:
+                        os.remove(caminho)
+                if (pasta_antiga and os.path.basename(pasta).startswith(('busca_', 'ao_vivo_'))
+                        and not os.listdir(pasta)):
+                    os.rmdir(pasta)
+            except OSError:
+                # Outra limpeza chegou antes
+                continue
+
+    def inicia_limpeza_periodica(self) -> threading.Thread:
+        """
+        Roda limpa_saidas_antigas a cada INTERVALO_LIMPEZA_S numa thread de fundo, para as imagens
+        vencerem também com o servidor parado ou só com monitores ao vivo (que não passam por executa_busca)
+        """
+        def limpa():
+            while True:
+                time.sleep(INTERVALO_LIMPEZA_S)
+                try:
+                    self.limpa_saidas_antigas()
+                except Exception as e:
+                    print(f"⚠️  Limpeza das imagens antigas falhou: {e}")
+
+        thread = threading.Thread(target=limpa, daemon=True)
+        thread.start()
+        return thread
+
+    def intervalo_amostragem(self, intervalo_frames=None, fps_amostragem=None) -> int:
+        """Resolve o intervalo de amostragem (padrão do detector ou da busca)"""
+        intervalo_frames = intervalo_frames or self.intervalo_frames
+        fps_amostragem = fps_amostragem or self.fps_amostragem
+
+        fps_video = 0.0
+        if fps_amostragem:
+            fps_video = LeitorFrames(self.video_path).info_video()['fps']
+
+        return calcula_intervalo(fps_video, intervalo_frames, fps_amostragem)
+
+    def resolve_trecho(self, inicio=None, fim=None, unidade='segundos') -> tuple:
+        """
+        Converte inicio/fim (segundos ou frames, inclusivos) em (frame_inicio, frame_fim)
+        numerados a partir de 1; (None, None) quando a busca é no vídeo inteiro
+        """
+        if inicio is None and fim is None:
+            return None, None
+        if unidade not in UNIDADES_TRECHO:
+            raise ValueError(f"Unidade inválida: {unidade} (use {', '.join(UNIDADES_TRECHO)})")
+
+        if unidade == 'frames':
+            frame_inicio = int(inicio) if inicio is not None else 1
+            frame_fim = int(fim) if fim is not None else None
+        else:
+            fps = LeitorFrames(self.video_path).info_video()['fps']
+            if not fps:
+                raise ValueError("O vídeo não informa o FPS: use inicio/fim em frames")
+            # O frame n aparece em (n - 1) / fps segundos
+            frame_inicio = int(float(inicio) * fps) + 1 if inicio is not None else 1
+            frame_fim = int(float(fim) * fps) + 1 if fim is not None else None
+
+        if frame_inicio < 1 or (frame_fim is not None and frame_fim < frame_inicio):
+            raise ValueError("Trecho inválido: inicio deve ser >= 0 e menor ou igual a fim")
+        return frame_inicio, frame_fim
+
+    def parametros_indice(self, intervalo=None) -> dict:
+        """Parâmetros que influenciam as leituras gravadas no índice"""
+        regiao = self.regiao_inferencia()
+        return {
+            'intervalo_frames': intervalo or self.intervalo_amostragem(),
+            # Com rastreamento, só parte das aparições de cada moto tem OCR; a confirmação
+            # da placa (confiança e candidatos montados) decide quando a moto para de ser lida
+            'rastreamento': {
+                'reocr_a_cada': self.reocr_a_cada,
+                'confianca_confirmacao': self.confianca_confirmacao,
+                'max_candidatos_placa': self.max_candidatos_placa
+            } if self.rastrear_motos else None,
+            # Frames parados repetem as leituras do frame anterior
+            'limiar_movimento': self.limiar_movimento,
+            # O OCR roda só na região da placa
+            'localizar_placa': self.localizador is not None,
+            # Backends diferentes podem achar caixas ligeiramente diferentes
+            'backend_deteccao': nome_backend(self.backend_deteccao),
+            # Resolução e ROI mudam quais motos o YOLO encontra
+            'regiao_inferencia': regiao.descricao() if regiao is not None else None
+        }
+
+    def extrai_leituras_ocr(self, resultados_ocr) -> list:
+        """Filtra as leituras do OCR com boa confiança e guarda o texto limpo"""
+        leituras_ocr = []
+        for bbox, texto, conf_ocr in resultados_ocr:
+            if conf_ocr > 0.3:
+                texto_limpo = self.limpa_texto_placa(texto)
+                if len(texto_limpo) >= 2:
+                    leituras_ocr.append({
+                        'bbox': [[int(x), int(y)] for x, y in bbox],
+                        'texto': texto,
+                        'texto_limpo': texto_limpo,
+                        'confianca': float(conf_ocr)
+                    })
+        return leituras_ocr
+
+    def gera_textos_para_testar(self, leituras_ocr: list) -> list:
+        """
+        Monta os textos de placa possíveis pela posição de cada texto no recorte (linhas, ordem
+        da esquerda para a direita e placa de duas linhas), já filtrados pelo formato AAA#A##
+        Retorna lista de (texto_limpo, texto_original, confianca)
+        """
+        return monta_candidatos(leituras_ocr, self.max_candidatos_placa)
+
+    def regiao_inferencia(self):
+        """Resolução e ROI do YOLO para este vídeo (None: frame inteiro)"""
+        return self.regioes.para_video(self.video_path) if self.regioes is not None else None
+
+    def detecta_motos_lote(self, frames: list) -> list:
+        """
+        Roda o YOLO uma única vez para um lote de frames
+        Com região de inferência, o YOLO vê só a ROI reduzida e as caixas voltam
+        para as coordenadas do frame original
+        Retorna, para cada frame (na mesma ordem), a lista de boxes de motos
+        """
+        if not frames:
+            return []
+
+        modelo = self.model
+        regiao = self.regiao_inferencia()
+        with self.metricas.mede('deteccao'):
+            if regiao is None:
+                entradas = frames
+                deteccoes_por_frame = modelo.detecta(frames)
+            else:
+                entradas = [regiao.prepara(frame) for frame in frames]
+                # Frames do mesmo vídeo têm o mesmo tamanho e, portanto, a mesma entrada
+                tamanho = regiao.geometria(*frames[0].shape[:2])['entrada']
+                deteccoes_por_frame = [regiao.volta(deteccoes, *frame.shape[:2])
+                                       for frame, deteccoes in zip(frames, modelo.detecta(entradas, tamanho))]
+
+        motos_por_frame = []
+        for deteccoes in deteccoes_por_frame:
+            # Moto (classe 3 do COCO) com boa confiança
+            motos_por_frame.append([box for box, cls, conf in deteccoes if cls == 3 and conf > 0.5])
+
+        self.metricas.incrementa('frames_inferidos', len(frames))
+        self.metricas.incrementa('pixels_inferidos', sum(entrada.shape[0] * entrada.shape[1] for entrada in entradas))
+        self.metricas.incrementa('motos_detectadas', sum(len(motos) for motos in motos_por_frame))
+        return motos_por_frame
+
+    def le_frames(self, leitor):
+        """Itera (frame_num, frame) do leitor medindo a decodificação de cada frame amostrado"""
+        frames = iter(leitor)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                item = next(frames, None)
+                if item is None:
+                    return
+                self.metricas.observa('decodificacao', time.perf_counter() - inicio)
+                self.metricas.incrementa('frames_decodificados')
+                yield item
+        finally:
+            # Libera o VideoCapture mesmo se a varredura for interrompida
+            if hasattr(frames, 'close'):
+                frames.close()
+
+    def novo_filtro_movimento(self):
+        """Filtro de movimento para uma varredura (None se limiar_movimento não foi configurado)"""
+        if self.limiar_movimento is None:
+            return None
+        return FiltroMovimento(self.limiar_movimento)
+
+    def detecta_motos_filtrado(self, filtro, frames: list) -> list:
+        """
+        Roda o YOLO só nos frames que mudaram em relação ao último frame processado
+        Frames parados recebem None no lugar das motos e reaproveitam as leituras anteriores
+        """
+        if filtro is None:
+            return self.detecta_motos_lote(frames)
+
+        mudaram = [filtro.mudou(frame) for frame in frames]
+        motos = iter(self.detecta_motos_lote([frame for frame, mudou in zip(frames, mudaram) if mudou]))
+        return [next(motos) if mudou else None for mudou in mudaram]
+
+    def reaproveita_leituras(self, leituras_anteriores: list, frame_num: int) -> list:
+        """Copia as leituras do frame anterior para um frame sem mudança"""
+        return [dict(leitura, frame=frame_num) for leitura in leituras_anteriores]
+
+    def novo_rastreador(self, historico=True, trecho=None):
+        """
+        Rastreador de motos para uma varredura (None se o rastreamento estiver desligado)
+        historico guarda as trilhas encerradas (último frame visto de cada moto)
+        trecho (inicio, fim) deixa de fora as motos que aparecem antes/depois dele (modo processos)
+        """
+        if not self.rastrear_motos:
+            return None
+        return RastreadorMotos(reocr_a_cada=self.reocr_a_cada, guarda_historico=historico, trecho=trecho)
+
+    def seleciona_motos(self, rastreador, frame_num: int, motos: list, parar=None, desde=None) -> tuple:
+        """
+        Escolhe as motos do frame que vão para o OCR
+        parar/desde fazem esperar as leituras pendentes das mesmas motos (ver RastreadorMotos.atualiza)
+        Retorna (motos, trilhas); sem rastreador todas vão e trilhas é None
+        """
+        if rastreador is None or motos is None:
+            return motos, None
+        return rastreador.atualiza(frame_num, motos, parar, desde)
+
+    def leitura_confiavel(self, leitura: dict) -> bool:
+        """A leitura tem algum texto (ou par de textos) no formato de placa com boa confiança"""
+        return any(PADRAO_PLACA.match(texto) and conf >= self.confianca_confirmacao
+                   for texto, _, conf in self.gera_textos_para_testar(leitura['ocr']))
+
+    def roda_ocr(self, imagem) -> list:
+        """Chamada do EasyOCR propriamente dita (sem cache), medida nas métricas"""
+        reader = self.reader
+        with self.metricas.mede('ocr'):
+            resultados = reader.readtext(imagem, detail=1)
+        self.metricas.incrementa('chamadas_ocr')
+        self.metricas.incrementa('recortes_ocr')
+        return resultados
+
+    def roda_ocr_lote(self, imagens: list) -> list:
+        """
+        Uma chamada do readtext_batched do EasyOCR para vários recortes (sem cache)
+        Os recortes são levados a um tamanho comum e os bboxes voltam para o tamanho de cada um
+        """
+        reader = self.reader
+        telas, escalas, (altura, largura) = padroniza_lote(imagens)
+        with self.metricas.mede('ocr'):
+            resultados = reader.readtext_batched(telas, n_width=largura, n_height=altura,
+                                                 batch_size=len(telas), detail=1)
+        self.metricas.incrementa('chamadas_ocr')
+        self.metricas.incrementa('recortes_ocr', len(imagens))
+        return [desfaz_escala(r, escala) for r, escala in zip(resultados, escalas)]
+
+    def le_texto(self, imagem) -> list:
+        """Roda o EasyOCR no recorte, consultando antes o cache de OCR"""
+        if self.cache_ocr is None:
+            return self.roda_ocr(imagem)
+
+        altura, largura = imagem.shape[:2]
+        chave = chave_perceptual(imagem)
+        resultados = self.cache_ocr.obtem(chave)
+        if resultados is None:
+            resultados = normaliza_resultados(self.roda_ocr(imagem), largura, altura)
+            self.cache_ocr.guarda(chave, resultados)
+        return escala_resultados(resultados, largura, altura)
+
+    def le_texto_placa(self, moto_img) -> list:
+        """
+        OCR só na região da placa quando o localizador está ligado
+        Os bboxes voltam em coordenadas do recorte da moto
+        """
+        if self.localizador is None:
+            return self.le_texto(moto_img)
+
+        with self.metricas.mede('localizacao'):
+            placa, deslocamento, escala = self.localizador.recorta(moto_img)
+        return volta_para_recorte(self.le_texto(placa), deslocamento, escala)
+
+    def le_textos(self, imagens: list) -> list:
+        """
+        OCR de vários recortes de moto, como le_texto_placa em cada um (localizador e cache incluídos)
+        Com tamanho_lote_ocr > 1 os recortes fora do cache vão juntos para o EasyOCR
+        Retorna os resultados na mesma ordem; None nos recortes em que o OCR falhou
+        """
+        if self.tamanho_lote_ocr <= 1:
+            resultados = []
+            for imagem in imagens:
+                try:
+                    resultados.append(self.le_texto_placa(imagem))
+                except Exception as e:
+                    print(f"Erro no OCR: {e}")
+                    resultados.append(None)
+            return resultados
+
+        # Região da placa (ou o recorte inteiro), deslocamento e escala para voltar ao recorte da moto
+        regioes = []
+        for imagem in imagens:
+            if self.localizador is None:
+                regioes.append((imagem, (0, 0), 1.0))
+            else:
+                with self.metricas.mede('localizacao'):
+                    regioes.append(self.localizador.recorta(imagem))
+
+        resultados = [None] * len(imagens)
+        chaves = [None] * len(imagens)
+        faltando = []
+        for i, (placa, _, _) in enumerate(regioes):
+            if self.cache_ocr is not None:
+                chaves[i] = chave_perceptual(placa)
+                guardado = self.cache_ocr.obtem(chaves[i])
+                if guardado is not None:
+                    resultados[i] = escala_resultados(guardado, placa.shape[1], placa.shape[0])
+                    continue
+            faltando.append(i)
+
+        # Tamanhos parecidos no mesmo lote: menos borda para o EasyOCR processar
+        faltando = [faltando[j] for j in ordena_por_tamanho([regioes[i][0] for i in faltando])]
+        for inicio in range(0, len(faltando), self.tamanho_lote_ocr):
+            indices = faltando[inicio:inicio + self.tamanho_lote_ocr]
+            try:
+                lidos = self.roda_ocr_lote([regioes[i][0] for i in indices])
+            except Exception as e:
+                print(f"Erro no OCR: {e}")
+                continue
+            for i, resultados_ocr in zip(indices, lidos):
+                placa = regioes[i][0]
+                if self.cache_ocr is not None:
+                    self.cache_ocr.guarda(chaves[i], normaliza_resultados(resultados_ocr, placa.shape[1], placa.shape[0]))
+                resultados[i] = resultados_ocr
+
+        if self.localizador is None:
+            return resultados
+        return [volta_para_recorte(r, deslocamento, escala) if r is not None else None
+                for r, (_, deslocamento, escala) in zip(resultados, regioes)]
+
+    def le_motos_frames(self, itens: list, rastreador=None) -> list:
+        """
+        Roda o OCR nas motos de vários frames de uma vez
+        itens: [(frame_num, frame, motos, trilhas)]; trilhas (ou None) vai para o rastreador
+        Retorna, para cada item, uma leitura por moto: {'frame', 'box', 'ocr'} (+ 'trilha')
+        """
+        recortes = []
+        for n, (frame_num, frame, motos, trilhas) in enumerate(itens):
+            for i, (x1, y1, x2, y2) in enumerate(motos):
+                moto_img = frame[y1:y2, x1:x2]
+                if moto_img.size > 0:
+                    recortes.append((n, i, moto_img))
+                elif trilhas is not None:
+                    rastreador.descarta_leitura(trilhas[i], frame_num)
+
+        leituras = [[] for _ in itens]
+        for (n, i, _), resultados_ocr in zip(recortes, self.le_textos([r[2] for r in recortes])):
+            frame_num, _, motos, trilhas = itens[n]
+            if resultados_ocr is None:
+                if trilhas is not None:
+                    rastreador.descarta_leitura(trilhas[i], frame_num)
+                continue
+
+            leitura = {
+                'frame': frame_num,
+                'box': list(motos[i]),
+                'ocr': self.extrai_leituras_ocr(resultados_ocr)
+            }
+            if trilhas is not None:
+                leitura['trilha'] = trilhas[i]
+                rastreador.registra_leitura(trilhas[i], self.leitura_confiavel(leitura), frame_num)
+            leituras[n].append(leitura)
+
+        return leituras
+
+    def le_motos(self, frame_num: int, frame, motos: list, trilhas=None, rastreador=None) -> list:
+        """
+        Roda o OCR em cada moto detectada no frame
+        trilhas (opcional) traz o id da trilha de cada moto, informado ao rastreador
+        Retorna uma leitura por moto: {'frame', 'box', 'ocr'} (+ 'trilha')
+        """
+        return self.le_motos_frames([(frame_num, frame, motos, trilhas)], rastreador)[0]
+
+    def le_lote(self, lote: list, motos_por_frame: list, rastreador=None, leituras_anteriores=()) -> list:
+        """
+        Seleção das motos e OCR dos frames de um lote do YOLO, na ordem dos frames
+        Frames parados (motos None) repetem as leituras do frame anterior
+        Com tamanho_lote_ocr > 1 os recortes do lote inteiro vão juntos para o OCR;
+        sem lote, cada frame é lido antes da seleção do próximo, como no loop original
+        Retorna as leituras de cada frame
+        """
+        passo = len(lote) if self.tamanho_lote_ocr > 1 else 1
+        leituras_por_frame = []
+        leituras_frame = list(leituras_anteriores)
+        for inicio in range(0, len(lote), passo):
+            grupo = list(zip(lote[inicio:inicio + passo], motos_por_frame[inicio:inicio + passo]))
+            selecionadas = [self.seleciona_motos(rastreador, frame_num, motos) for (frame_num, _), motos in grupo]
+            lidas = iter(self.le_motos_frames(
+                [(frame_num, frame, motos, trilhas)
+                 for ((frame_num, frame), _), (motos, trilhas) in zip(grupo, selecionadas) if motos is not None],
+                rastreador))
+
+            for ((frame_num, _), _), (motos, _) in zip(grupo, selecionadas):
+                if motos is None:
+                    leituras_frame = self.reaproveita_leituras(leituras_frame, frame_num)
+                else:
+                    leituras_frame = next(lidas)
+                leituras_por_frame.append(leituras_frame)
+
+        return leituras_por_frame
+
+    def processa_frame(self, frame_num: int, frame) -> list:
+        """Roda YOLO e OCR em um único frame"""
+        return self.le_motos(frame_num, frame, self.detecta_motos_lote([frame])[0])
+
+    def normaliza_placas(self, placa_alvo) -> tuple:
+        """
+        Aceita uma placa ou uma lista de placas e devolve as placas limpas, sem repetição
+        Levanta ValueError para placas fora do formato AAA9999/AAA9A99: só textos nesse formato
+        chegam à comparação (ver montagem_placa), então elas nunca seriam encontradas
+        """
+        placas = [placa_alvo] if isinstance(placa_alvo, str) else placa_alvo
+        limpas = tuple(dict.fromkeys(p for p in (limpa_texto(p) for p in placas) if p))
+        invalidas = [placa for placa in limpas if not PADRAO_PLACA.match(placa)]
+        if invalidas:
+            raise ValueError(f"Placa fora do formato AAA9999 ou AAA9A99: {', '.join(invalidas)}")
+        return limpas
+
+    def comparador(self, placa_alvo, threshold=1.0) -> ListaPlacas:
+        """Comparador das placas alvo, montado uma única vez por lista/threshold"""
+        chave = (self.normaliza_placas(placa_alvo), threshold)
+        with self._trava_comparadores:
+            comparador = self._comparadores.get(chave)
+            if comparador is None:
+                if len(self._comparadores) >= 32:
+                    self._comparadores.clear()
+                comparador = ListaPlacas({placa: self.gera_variacoes_placa(placa) for placa in chave[0]}, threshold)
+                self._comparadores[chave] = comparador
+        return comparador
+
+    def avalia_leitura(self, leitura: dict, placa_alvo, threshold=1.0) -> list:
+        """
+        Compara os textos de uma leitura com a placa alvo (ou com uma lista de placas)
+        Retorna lista de (texto_limpo, texto_original, confianca, similaridade, variacao, placa)
+        """
+        matches = []
+        with self.metricas.mede('montagem'):
+            textos_para_testar = self.gera_textos_para_testar(leitura['ocr'])
+        self.metricas.incrementa('candidatos_placa', len(textos_para_testar))
+        if not textos_para_testar:
+            return matches
+
+        # Todos os textos da leitura são comparados com todas as placas numa única chamada
+        with self.metricas.mede('comparacao'):
+            resultados, comparacoes = self.comparador(placa_alvo, threshold).compara_lote(
+                [t[0] for t in textos_para_testar])
+        with self._trava_comparacoes:
+            self._comparacoes['total'] += comparacoes
+        for (texto_limpo, texto_original, conf_ocr), encontrados in zip(textos_para_testar, resultados):
+            for placa, similaridade, variacao in encontrados:
+                matches.append((texto_limpo, texto_original, conf_ocr, similaridade, variacao, placa))
+
+        if matches:
+            self.metricas.incrementa('matches', len(matches))
+        return matches
+
+    def salva_deteccao(self, frame, leitura: dict, match: tuple, substitui=None) -> dict:
+        """
+        Marca o frame, salva as imagens e monta o dicionário da detecção
+        substitui (opcional) é a detecção anterior da mesma moto: as imagens novas são gravadas
+        por cima das dela, com os mesmos nomes (as URLs já enviadas continuam valendo)
+        """
+        texto_limpo, texto_original, conf_ocr, similaridade, variacao, placa_alvo = match
+        frame_num = leitura['frame']
+        x1, y1, x2, y2 = leitura['box']
+        moto_img = frame[y1:y2, x1:x2]
+
+        print(f"✅ MATCH encontrado! Frame {frame_num}")
+        print(f"   Texto: '{texto_original}' -> '{texto_limpo}'")
+        print(f"   Similaridade: {similaridade:.3f}")
+
+        # Salva detecção
+        frame_marcado = frame.copy()
+        cv2.rectangle(frame_marcado, (x1, y1), (x2, y2), (0, 255, 0), 5)
+        cv2.putText(frame_marcado, f"MATCH: {texto_limpo}", (x1, y1 - 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        cv2.putText(frame_marcado, f"ALVO: {placa_alvo}", (x1, y1 - 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        cv2.putText(frame_marcado, f"SIM: {similaridade:.0%}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+        # Nomes dos arquivos
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_base = f"match_{texto_limpo}_frame{frame_num}_{timestamp}"
+
+        nomes = {'arquivo_frame': f"{nome_base}_frame.jpg", 'arquivo_moto': f"{nome_base}_moto.jpg",
+                 'miniatura_frame': f"{nome_base}_frame_mini.jpg", 'miniatura_moto': f"{nome_base}_moto_mini.jpg"}
+        if substitui is not None:
+            nomes = {campo: os.path.basename(substitui[campo]) for campo in nomes}
+
+        # Salva imagens e miniaturas (a API envia URLs em vez de base64)
+        arquivo_frame = self.grava_jpeg(frame_marcado, nomes['arquivo_frame'])
+        arquivo_moto = self.grava_jpeg(moto_img, nomes['arquivo_moto'])
+        miniatura_frame = self.grava_jpeg(self.miniatura(frame_marcado), nomes['miniatura_frame'])
+        miniatura_moto = self.grava_jpeg(self.miniatura(moto_img), nomes['miniatura_moto'])
+
+        return {
+            'frame': frame_num,
+            'placa': placa_alvo,
+            'box': [int(v) for v in leitura['box']],
+            'texto_ocr': texto_original,
+            'texto_limpo': texto_limpo,
+            'variacao_alvo': variacao,
+            'similaridade': similaridade,
+            'confianca': conf_ocr,
+            'arquivo_frame': arquivo_frame,
+            'arquivo_moto': arquivo_moto,
+            'miniatura_frame': miniatura_frame,
+            'miniatura_moto': miniatura_moto,
+            'timestamp': timestamp
+        }
+
+    def varre_video(self, placa_alvo=None, threshold=1.0, intervalo=None, tamanho_lote=None,
+                    modo_execucao=None, acompanhamento=None, trecho=(None, None), primeiro_match=False,
+                    frames=None):
+        """
+        Percorre o vídeo inteiro rodando YOLO (em lotes) + OCR nos frames amostrados
+        Se placa_alvo (uma placa ou lista de placas) for informada, já salva as detecções encontradas
+        modo_execucao: 'sequencial' (uma thread), 'pipeline' (etapas em paralelo)
+        ou 'processos' (trechos do vídeo em vários processos)
+        acompanhamento recebe progresso/detecções e pode cancelar a varredura
+        trecho (frame_inicio, frame_fim) limita a varredura, com seek direto para o início
+        primeiro_match encerra a varredura na primeira detecção (nos modos sequencial e pipeline)
+        frames (opcional) lê só os frames dessa lista no lugar dos múltiplos do intervalo
+        Retorna (leituras, deteccoes, estatisticas)
+        """
+        leitor = LeitorFrames(self.video_path, intervalo or self.intervalo_amostragem(),
+                              inicio=trecho[0], fim=trecho[1], frames=frames)
+        tamanho_lote = tamanho_lote or self.tamanho_lote
+        modo_execucao = modo_execucao or self.modo_execucao
+        acompanhamento = acompanhamento or Acompanhamento()
+        inicio = time.perf_counter()
+        cache_antes = self.cache_ocr.contadores() if self.cache_ocr else None
+
+        if modo_execucao not in MODOS_EXECUCAO:
+            raise ValueError(f"Modo de execução inválido: {modo_execucao}")
+
+        acompanhamento.inicia(leitor.frames_previstos())
+
+        if modo_execucao == 'pipeline':
+            pipeline = PipelineBusca(self, self.workers_ocr, self.tamanho_fila)
+            leituras, deteccoes_encontradas, estatisticas = pipeline.executa(
+                leitor, tamanho_lote, placa_alvo, threshold, acompanhamento, primeiro_match)
+        elif modo_execucao == 'processos':
+            leituras, estatisticas = self.pool_processos().executa(
+                self.video_path, leitor.intervalo, tamanho_lote, acompanhamento=acompanhamento,
+                inicio=leitor.inicio, fim=leitor.fim, frames=leitor.frames, rastrear=self.rastrear_motos)
+            # Métricas medidas nos workers entram nas métricas deste processo
+            self.metricas.acumula(estatisticas.pop('metricas'))
+            deteccoes_encontradas = []
+            if placa_alvo is not None:
+                # Os trechos rodam juntos: o primeiro match só corta as imagens, não a varredura
+                deteccoes_encontradas = self.busca_nas_leituras(leituras, placa_alvo, threshold, acompanhamento,
+                                                                primeiro_match)
+        else:
+            leituras, deteccoes_encontradas, estatisticas = self.varre_sequencial(
+                leitor, tamanho_lote, placa_alvo, threshold, acompanhamento, primeiro_match)
+
+        # No modo processos o cache de cada worker é somado pelo pool
+        if self.cache_ocr is not None and 'cache_ocr' not in estatisticas:
+            estatisticas['cache_ocr'] = self.cache_ocr.resumo(cache_antes)
+
+        estatisticas['tempo_total_s'] = time.perf_counter() - inicio
+        estatisticas['frames_por_seg'] = (estatisticas['frames_processados'] / estatisticas['tempo_total_s']
+                                          if estatisticas['tempo_total_s'] > 0 else 0.0)
+
+        print(f"⏱️  {estatisticas['frames_processados']} frames em {estatisticas['tempo_total_s']:.1f}s "
+              f"({estatisticas['frames_por_seg']:.2f} frames/s, {modo_execucao}, lote={tamanho_lote}, "
+              f"YOLO {estatisticas['tempo_deteccao_s']:.1f}s, OCR {estatisticas['tempo_ocr_s']:.1f}s)")
+
+        return leituras, deteccoes_encontradas, estatisticas
+
+    def varre_adaptativo(self, placa_alvo=None, threshold=1.0, tamanho_lote=None, modo_execucao=None,
+                         acompanhamento=None, trecho=(None, None), primeiro_match=False):
+        """
+        Varredura do grosso para o fino (self.amostragem): uma passada a cada passo_grosso frames
+        e, em volta das motos sem placa confirmada e dos textos que ficaram perto do threshold,
+        passadas com o passo caindo pela metade até passo_fino. As detecções saem das leituras
+        de todas as passadas juntas
+        primeiro_match só fica com a primeira detecção (as passadas rodam até o fim)
+        Retorna (leituras, deteccoes, estatisticas), como varre_video
+        """
+        amostragem = self.amostragem
+        acompanhamento = acompanhamento or Acompanhamento()
+        # O progresso das passadas se soma num só (inicia só na passada grossa)
+        passadas_acompanhadas = AcompanhamentoPassadas(acompanhamento)
+        # Com frames tão espaçados o rastreador juntaria motos diferentes na mesma trilha
+        sem_rastreio = self.para_video(self.video_path, self.save_dir)
+        sem_rastreio.rastrear_motos = False
+
+        leituras, _, grossa = sem_rastreio.varre_video(None, threshold, amostragem.passo_grosso, tamanho_lote,
+                                                       modo_execucao, passadas_acompanhadas, trecho)
+        passadas = [grossa]
+        gatilhos = amostragem.gatilhos(self, leituras, placa_alvo, threshold)
+        total_gatilhos = len(gatilhos)
+        lidos = set()
+        passo = amostragem.passo_grosso
+
+        while gatilhos and amostragem.proximo_passo(passo):
+            passo, raio = amostragem.proximo_passo(passo)
+            frames = amostragem.frames_refino(gatilhos, passo, raio, lidos, trecho[0], trecho[1])
+            if not frames:
+                break
+            lidos.update(frames)
+            novas, _, passada = sem_rastreio.varre_video(None, threshold, passo, tamanho_lote, modo_execucao,
+                                                         passadas_acompanhadas, trecho, frames=frames)
+            passada['passo'] = passo
+            passadas.append(passada)
+            leituras.extend(novas)
+            gatilhos = amostragem.gatilhos(self, novas, placa_alvo, threshold)
+            total_gatilhos += len(gatilhos)
+
+        leituras.sort(key=lambda leitura: leitura['frame'])
         deteccoes_encontradas = []
+        if placa_alvo is not None:
+            deteccoes_encontradas = self.busca_nas_leituras(leituras, placa_alvo, threshold, acompanhamento,
+                                                            primeiro_match)
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
+        estatisticas = {
+            'frames_processados': sum(p['frames_processados'] for p in passadas),
+            'tamanho_lote': grossa['tamanho_lote'],
+            'modo_execucao': grossa['modo_execucao'],
+            'tempo_deteccao_s': sum(p['tempo_deteccao_s'] for p in passadas),
+            'tempo_ocr_s': sum(p['tempo_ocr_s'] for p in passadas),
+            'amostragem': dict(amostragem.descricao(),
+                               frames_grossos=grossa['frames_processados'],
+                               gatilhos=total_gatilhos,
+                               frames_refinados=sum(p['frames_processados'] for p in passadas[1:])),
+            'passadas': passadas
+        }
+        return leituras, deteccoes_encontradas, estatisticas
+
+    def opcoes_processamento(self) -> dict:
+        """Argumentos para recriar este detector nos processos do pool"""
+        return {
+            'save_dir': self.save_dir,
+            'index_dir': self.indice.index_dir,
+            'rastrear_motos': self.rastrear_motos,
+            'reocr_a_cada': self.reocr_a_cada,
+            'confianca_confirmacao': self.confianca_confirmacao,
+            'limiar_movimento': self.limiar_movimento,
+            'tamanho_cache_ocr': self.cache_ocr.tamanho_max if self.cache_ocr else 0,
+            'arquivo_cache_ocr': self.cache_ocr.arquivo if self.cache_ocr else None,
+            'localizar_placa': self.localizador is not None,
+            'backend_deteccao': self.backend_deteccao,
+            'modelo_deteccao': self.modelo_deteccao,
+            'leitor_ocr': self.leitor_ocr,
+            'regioes_inferencia': self.regioes.config if self.regioes else None,
+            'tamanho_lote_ocr': self.tamanho_lote_ocr,
+            'max_candidatos_placa': self.max_candidatos_placa
+        }
+
+    def pool_processos(self) -> PoolProcessos:
+        """Cria o pool de processos na primeira vez e o mantém aquecido (um só, com as cópias)"""
+        origem = self._origem or self
+        with origem._trava_pool:
+            if origem._pool_processos is None:
+                print("🧩 Iniciando pool de processos (cada worker carrega os modelos uma vez)")
+                origem._pool_processos = PoolProcessos(origem.workers_processos, origem.opcoes_processamento())
+        return origem._pool_processos
+
+    def fecha_pool(self):
+        """Encerra os processos do pool, se existirem"""
+        origem = self._origem or self
+        if origem._pool_processos is not None:
+            origem._pool_processos.fecha()
+            origem._pool_processos = None
+
+    def varre_sequencial(self, leitor, tamanho_lote: int, placa_alvo=None, threshold=1.0, acompanhamento=None,
+                         primeiro_match=False):
+        """
+        Executa decodificação, YOLO, OCR e escrita em sequência numa única thread
+        primeiro_match para a leitura assim que a primeira detecção é registrada
+        """
+        acompanhamento = acompanhamento or Acompanhamento()
+        rastreador = self.novo_rastreador()
+        filtro = self.novo_filtro_movimento()
+        leituras = []
+        leituras_frame = []
+        deteccoes = DeteccoesPorTrilha(self, acompanhamento)
+        estatisticas = {
+            'frames_processados': 0,
+            'tamanho_lote': tamanho_lote,
+            'modo_execucao': 'sequencial',
+            'tempo_deteccao_s': 0.0,
+            'tempo_ocr_s': 0.0
+        }
+
+        # Só os frames amostrados são decodificados por completo
+        frames = self.le_frames(leitor)
+        for lote in agrupa_em_lotes(frames, tamanho_lote):
+            acompanhamento.verifica_cancelamento()
+
+            t0 = time.perf_counter()
+            motos_por_frame = self.detecta_motos_filtrado(filtro, [frame for _, frame in lote])
+            estatisticas['tempo_deteccao_s'] += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            leituras_por_frame = self.le_lote(lote, motos_por_frame, rastreador, leituras_frame)
+            estatisticas['tempo_ocr_s'] += time.perf_counter() - t0
+
+            # Comparação e gravação na ordem original dos frames
+            for (frame_num, frame), leituras_frame in zip(lote, leituras_por_frame):
+                estatisticas['frames_processados'] += 1
+
+                for leitura in leituras_frame:
+                    leituras.append(leitura)
+
+                    if placa_alvo is None:
+                        continue
+
+                    for match in self.avalia_leitura(leitura, placa_alvo, threshold):
+                        deteccoes.registra(frame, leitura, match)
+
+                acompanhamento.progresso(estatisticas['frames_processados'])
+
+                if primeiro_match and deteccoes.deteccoes:
+                    estatisticas['parou_no_frame'] = frame_num
+                    break
+            if 'parou_no_frame' in estatisticas:
                 break
-            frame_num += 1
+        frames.close()
 
-            # Processa a cada 15 frames para melhor performance
-            if frame_num % 15 != 0:
-                continue
+        if rastreador is not None:
+            rastreador.marca_visto_ate(leituras)
+            deteccoes.finaliza(rastreador)
+            estatisticas['rastreamento'] = rastreador.resumo()
+        if filtro is not None:
+            estatisticas['movimento'] = filtro.resumo()
 
-            results = self.model(frame)[0]
-            
-            if results.boxes is not None:
-                for i, (box, cls, conf) in enumerate(zip(results.boxes.xyxy, results.boxes.cls, results.boxes.conf)):
-                    if int(cls) == 3 and float(conf) > 0.5:  # Moto com boa confiança
-                        x1, y1, x2, y2 = map(int, box)
-                        moto_img = frame[y1:y2, x1:x2]
-                        
-                        if moto_img.size == 0:
-                            continue
-                        
-                        try:
-                            resultados_ocr = self.reader.readtext(moto_img, detail=1)
-                            
-                            # Coleta todos os textos com boa confiança
-                            textos_detectados = []
-                            for bbox, texto, conf_ocr in resultados_ocr:
-                                if conf_ocr > 0.3:
-                                    texto_limpo = self.limpa_texto_placa(texto)
-                                    if len(texto_limpo) >= 2:
-                                        textos_detectados.append((texto_limpo, conf_ocr, texto))
-                            
-                            # Testa textos individuais e combinados
-                            textos_para_testar = [(t[0], t[2], t[1]) for t in textos_detectados]
-                            
-                            # Adiciona combinações de textos
-                            if len(textos_detectados) >= 2:
-                                for j in range(len(textos_detectados)):
-                                    for k in range(j+1, len(textos_detectados)):
-                                        t1, c1, orig1 = textos_detectados[j]
-                                        t2, c2, orig2 = textos_detectados[k]
-                                        
-                                        combinacoes = [
-                                            (f"{t1}{t2}", f"{orig1}+{orig2}", min(c1, c2)),
-                                            (f"{t2}{t1}", f"{orig2}+{orig1}", min(c1, c2))
-                                        ]
-                                        textos_para_testar.extend(combinacoes)
-                            
-                            # Testa todos os textos
-                            for texto_limpo, texto_original, conf_ocr in textos_para_testar:
-                                is_match, similaridade, variacao = self.is_placa_brasileira_alvo(texto_limpo, placa_alvo, threshold)
-                                
-                                if is_match:
-                                    print(f"✅ MATCH encontrado! Frame {frame_num}")
-                                    print(f"   Texto: '{texto_original}' -> '{texto_limpo}'")
-                                    print(f"   Similaridade: {similaridade:.3f}")
-                                    
-                                    # Salva detecção
-                                    frame_marcado = frame.copy()
-                                    cv2.rectangle(frame_marcado, (x1, y1), (x2, y2), (0, 255, 0), 5)
-                                    cv2.putText(frame_marcado, f"MATCH: {texto_limpo}", (x1, y1 - 60),
-                                                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                                    cv2.putText(frame_marcado, f"ALVO: {placa_alvo}", (x1, y1 - 35),
-                                                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                                    cv2.putText(frame_marcado, f"SIM: {similaridade:.0%}", (x1, y1 - 10),
-                                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                                    
-                                    # Nomes dos arquivos
-                                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                    nome_base = f"match_{texto_limpo}_frame{frame_num}_{timestamp}"
-                                    
-                                    arquivo_frame = os.path.join(self.save_dir, f"{nome_base}_frame.jpg")
-                                    arquivo_moto = os.path.join(self.save_dir, f"{nome_base}_moto.jpg")
-                                    
-                                    # Salva imagens
-                                    cv2.imwrite(arquivo_frame, frame_marcado)
-                                    cv2.imwrite(arquivo_moto, moto_img)
-                                    
-                                    # Converte para base64
-                                    frame_b64 = self.image_to_base64(arquivo_frame)
-                                    moto_b64 = self.image_to_base64(arquivo_moto)
-                                    
-                                    deteccao = {
-                                        'frame': frame_num,
-                                        'texto_ocr': texto_original,
-                                        'texto_limpo': texto_limpo,
-                                        'variacao_alvo': variacao,
-                                        'similaridade': similaridade,
-                                        'confianca': conf_ocr,
-                                        'arquivo_frame': arquivo_frame,
-                                        'arquivo_moto': arquivo_moto,
-                                        'frame_base64': frame_b64,
-                                        'moto_base64': moto_b64,
-                                        'timestamp': timestamp
-                                    }
-                                    
-                                    deteccoes_encontradas.append(deteccao)
-                        
-                        except Exception as e:
-                            print(f"Erro no OCR: {e}")
-                            continue
+        return leituras, deteccoes.deteccoes, estatisticas
+
+    def indexar_video(self, forcar=False, intervalo_frames=None, fps_amostragem=None) -> dict:
+        """
+        Processa o vídeo uma única vez e grava todas as leituras de OCR no índice
+        As buscas seguintes respondem direto do índice, sem rodar YOLO/OCR
+        """
+        intervalo = self.intervalo_amostragem(intervalo_frames, fps_amostragem)
+        parametros = self.parametros_indice(intervalo)
+        indice = None if forcar else self.indice.carrega(self.video_path, parametros)
+
+        if indice is None:
+            print(f"🗂️  Indexando vídeo: {self.video_path} (1 a cada {intervalo} frames)")
+            leituras, _, estatisticas = self.varre_video(intervalo=intervalo)
+            caminho = self.indice.salva(self.video_path, leituras, parametros, estatisticas['frames_processados'])
+            print(f"✅ Índice salvo em {caminho} ({len(leituras)} leituras)")
+            indice = self.indice.carrega(self.video_path, parametros)
+
+        return {
+            'video_hash': indice['video_hash'],
+            'intervalo_frames': intervalo,
+            'frames_processados': indice['frames_processados'],
+            'total_leituras': indice['total_leituras'],
+            'criado_em': indice['criado_em']
+        }
+
+    def busca_nas_leituras(self, leituras: list, placa_alvo, threshold=1.0, acompanhamento=None,
+                           primeiro_match=False) -> list:
+        """
+        Avalia leituras já feitas (índice ou workers) e só abre o vídeo nos frames com match
+        primeiro_match fica só com a moto/placa que apareceu primeiro
+        O último frame de cada moto rastreada vem de 'visto_ate' das leituras, quando existe
+        """
+        acompanhamento = acompanhamento or Acompanhamento()
+
+        # Com trilhas, só o melhor match de cada moto/placa vira imagem
+        melhores = {}
+        for leitura in leituras:
+            for match in self.avalia_leitura(leitura, placa_alvo, threshold):
+                trilha = leitura.get('trilha')
+                chave = (trilha, match[5]) if trilha is not None else len(melhores)
+                if chave not in melhores:
+                    melhores[chave] = {'leitura': leitura, 'match': match, 'trilha': trilha,
+                                       'primeiro_frame': leitura['frame'], 'frames_com_match': 0}
+                melhor = melhores[chave]
+                melhor['ultimo_frame'] = max(melhor.get('ultimo_frame', 0), leitura.get('visto_ate', leitura['frame']))
+                melhor['frames_com_match'] += 1
+                if (match[3], match[2]) > (melhor['match'][3], melhor['match'][2]):
+                    melhor['leitura'], melhor['match'] = leitura, match
 
+        if primeiro_match and melhores:
+            primeira = min(melhores, key=lambda chave: melhores[chave]['primeiro_frame'])
+            melhores = {primeira: melhores[primeira]}
+
+        matches_por_frame = {}
+        for melhor in melhores.values():
+            matches_por_frame.setdefault(melhor['leitura']['frame'], []).append(melhor)
+
+        deteccoes_encontradas = []
+        if not matches_por_frame:
+            return deteccoes_encontradas
+
+        cap = cv2.VideoCapture(self.video_path)
+        for frame_num in sorted(matches_por_frame):
+            acompanhamento.verifica_cancelamento()
+
+            # Frames são numerados a partir de 1
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num - 1)
+            ret, frame = cap.read()
+            if not ret:
+                print(f"⚠️  Não foi possível ler o frame {frame_num}")
+                continue
+
+            for melhor in matches_por_frame[frame_num]:
+                deteccao = self.salva_deteccao(frame, melhor['leitura'], melhor['match'])
+                deteccao.update({campo: melhor[campo] for campo in
+                                 ('trilha', 'primeiro_frame', 'ultimo_frame', 'frames_com_match')})
+                deteccoes_encontradas.append(deteccao)
+                acompanhamento.nova_deteccao(deteccao)
         cap.release()
-        
+
+        return deteccoes_encontradas
+
+    def executa_busca(self, placa_alvo, threshold=1.0, usar_indice=True,
+                      intervalo_frames=None, fps_amostragem=None, tamanho_lote=None,
+                      modo_execucao=None, acompanhamento=None, inicio=None, fim=None,
+                      unidade='segundos', primeiro_match=False) -> dict:
+        """
+        Uma única passada pelo vídeo (ou pelo índice) para uma placa ou lista de placas
+        Retorna deteccoes, origem, intervalo_frames, estatisticas, tempos
+        (detalhamento por etapa; inclui o que outras buscas simultâneas fizeram no mesmo período)
+        e pasta_saida (subpasta exclusiva desta busca, apagada depois de ttl_saida)
+        """
+        self.limpa_saidas_antigas()
+        # As imagens vão para uma cópia do detector com pasta própria
+        busca = self.para_video(self.video_path, self.nova_pasta_busca())
+        resultado = busca.varre_ou_consulta_indice(placa_alvo, threshold, usar_indice, intervalo_frames,
+                                                   fps_amostragem, tamanho_lote, modo_execucao, acompanhamento,
+                                                   inicio, fim, unidade, primeiro_match)
+        resultado['pasta_saida'] = busca.save_dir
+        return resultado
+
+    def varre_ou_consulta_indice(self, placa_alvo, threshold=1.0, usar_indice=True,
+                                 intervalo_frames=None, fps_amostragem=None, tamanho_lote=None,
+                                 modo_execucao=None, acompanhamento=None, inicio=None, fim=None,
+                                 unidade='segundos', primeiro_match=False) -> dict:
+        """Corpo de executa_busca, gravando as imagens em self.save_dir"""
+        comeco = time.perf_counter()
+        metricas_antes = self.metricas.instantaneo()
+        # Contador só desta busca (self é a cópia feita por executa_busca)
+        self._comparacoes = {'total': 0}
+        self._trava_comparacoes = threading.Lock()
+        intervalo = self.intervalo_amostragem(intervalo_frames, fps_amostragem)
+        trecho = self.resolve_trecho(inicio, fim, unidade)
+        parametros = self.parametros_indice(intervalo)
+        indice = self.indice.carrega(self.video_path, parametros) if usar_indice else None
+
+        if indice is not None:
+            print(f"⚡ Respondendo pelo índice ({indice['total_leituras']} leituras)")
+            leituras = [leitura for leitura in indice['leituras']
+                        if (trecho[0] is None or leitura['frame'] >= trecho[0])
+                        and (trecho[1] is None or leitura['frame'] <= trecho[1])]
+            deteccoes_encontradas = self.busca_nas_leituras(leituras, placa_alvo, threshold, acompanhamento,
+                                                            primeiro_match)
+            origem = 'indice'
+            estatisticas = {'frames_processados': 0}
+        elif self.amostragem is not None:
+            # As leituras dependem das placas buscadas: não viram índice
+            leituras, deteccoes_encontradas, estatisticas = self.varre_adaptativo(
+                placa_alvo, threshold, tamanho_lote, modo_execucao, acompanhamento, trecho, primeiro_match)
+            origem = 'video'
+        else:
+            leituras, deteccoes_encontradas, estatisticas = self.varre_video(
+                placa_alvo, threshold, intervalo, tamanho_lote, modo_execucao, acompanhamento,
+                trecho, primeiro_match)
+            # Só uma varredura do vídeo inteiro vira índice
+            completa = trecho == (None, None) and 'parou_no_frame' not in estatisticas
+            if completa and os.path.exists(self.video_path):
+                self.indice.salva(self.video_path, leituras, parametros, estatisticas['frames_processados'])
+            origem = 'video'
+        if primeiro_match:
+            deteccoes_encontradas = deteccoes_encontradas[:1]
+        estatisticas['tempo_total_s'] = time.perf_counter() - comeco
+        self.metricas.observa('busca', estatisticas['tempo_total_s'])
+        self.metricas.incrementa('buscas')
+        # Pares texto x variação que passaram pelo índice de n-gramas e foram pontuados
+        estatisticas['comparacoes'] = self._comparacoes['total']
+
+        return {
+            'deteccoes': deteccoes_encontradas,
+            'origem': origem,
+            'intervalo_frames': intervalo,
+            'trecho': {'inicio_frame': trecho[0], 'fim_frame': trecho[1]},
+            'estatisticas': estatisticas,
+            'tempos': self.metricas.resumo(metricas_antes)
+        }
+
+    def buscar_placa(self, placa_alvo: str, threshold=1.0, usar_indice=True,
+                     intervalo_frames=None, fps_amostragem=None, tamanho_lote=None,
+                     modo_execucao=None, acompanhamento=None, inicio=None, fim=None,
+                     unidade='segundos', primeiro_match=False):
+        """
+        Busca uma placa específica no vídeo
+        Usa o índice de leituras quando existir; senão varre o vídeo e cria o índice
+        intervalo_frames / fps_amostragem controlam quantos frames são analisados
+        tamanho_lote define quantos frames vão juntos para o YOLO
+        modo_execucao escolhe entre 'sequencial', 'pipeline' e 'processos'
+        acompanhamento (opcional) recebe o progresso e permite cancelar a busca
+        inicio/fim (em 'segundos' ou 'frames', conforme unidade) limitam a busca a um trecho
+        primeiro_match encerra a busca na primeira detecção
+        Retorna dicionário com resultados encontrados
+        """
+        print(f"🇧🇷 BUSCA PLACA BRASILEIRA: {placa_alvo}")
+
+        busca = self.executa_busca(placa_alvo, threshold, usar_indice, intervalo_frames, fps_amostragem,
+                                   tamanho_lote, modo_execucao, acompanhamento, inicio, fim, unidade, primeiro_match)
+        deteccoes_encontradas = busca['deteccoes']
+
         # Resultado final
         resultado = {
             'placa_pesquisada': placa_alvo,
             'total_deteccoes': len(deteccoes_encontradas),
             'deteccoes': deteccoes_encontradas,
             'variacoes_buscadas': self.gera_variacoes_placa(placa_alvo),
-            'sucesso': len(deteccoes_encontradas) > 0
+            'sucesso': len(deteccoes_encontradas) > 0,
+            'origem': busca['origem'],
+            'intervalo_frames': busca['intervalo_frames'],
+            'trecho': busca['trecho'],
+            'estatisticas': busca['estatisticas'],
+            'tempos': busca['tempos']
         }
-        
+
+        return resultado
+
+    def buscar_placas(self, placas: list, threshold=1.0, usar_indice=True,
+                      intervalo_frames=None, fps_amostragem=None, tamanho_lote=None,
+                      modo_execucao=None, acompanhamento=None, inicio=None, fim=None,
+                      unidade='segundos', primeiro_match=False):
+        """
+        Busca uma lista de placas (watchlist) numa única passada pelo vídeo
+        Aceita os mesmos parâmetros de buscar_placa
+        Retorna as detecções agrupadas por placa
+        """
+        placas = list(self.normaliza_placas(placas))
+        print(f"🇧🇷 BUSCA DE {len(placas)} PLACAS BRASILEIRAS")
+
+        busca = self.executa_busca(placas, threshold, usar_indice, intervalo_frames, fps_amostragem,
+                                   tamanho_lote, modo_execucao, acompanhamento, inicio, fim, unidade, primeiro_match)
+
+        deteccoes_por_placa = {placa: [] for placa in placas}
+        for deteccao in busca['deteccoes']:
+            deteccoes_por_placa[deteccao['placa']].append(deteccao)
+
+        resultado = {
+            'placas_pesquisadas': placas,
+            'total_deteccoes': len(busca['deteccoes']),
+            'placas_encontradas': [placa for placa in placas if deteccoes_por_placa[placa]],
+            'deteccoes_por_placa': deteccoes_por_placa,
+            'sucesso': len(busca['deteccoes']) > 0,
+            'origem': busca['origem'],
+            'intervalo_frames': busca['intervalo_frames'],
+            'trecho': busca['trecho'],
+            'estatisticas': busca['estatisticas'],
+            'tempos': busca['tempos']
+        }
+
         return resultado
 
 # Teste básico
 if __name__ == "__main__":
     detector = PlacaDetector()
     resultado = detector.buscar_placa("TAT9G95", threshold=0.8)
-    print(f"\nResultado: {resultado['total_deteccoes']} detecções encontradas")
\ No newline at end of file
+    print(f"\nResultado: {resultado['total_deteccoes']} detecções encontradas")
@@ -0,0 +1,235 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+
+from acompanhamento import Acompanhamento
+from filtro_movimento import junta_resumos
+from leitor_frames import LeitorFrames, agrupa_em_lotes
+from metricas import Metricas
+from rastreador_motos import soma_resumos
+
+# Detector carregado uma única vez em cada processo do pool
+_detector_worker = None
+
+
+def _inicializa_worker(opcoes_detector: dict, threads_por_worker: int):
+    """Carrega YOLO e EasyOCR no processo do worker e mantém os modelos aquecidos"""
+    global _detector_worker
+
+    # Evita que cada processo tente usar todos os núcleos (torch só existe com o backend ultralytics)
+    cv2.setNumThreads(threads_por_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_por_worker)
+    except ImportError:
+        pass
+
+    from placa_detector import PlacaDetector
+    _detector_worker = PlacaDetector(**opcoes_detector)
+
+
+def _processa_trecho(video_path: str, intervalo: int, inicio: int, fim, tamanho_lote: int, frames=None,
+                     rastrear=True, inicio_busca=None, fim_busca=None) -> dict:
+    """
+    Roda YOLO + OCR em um trecho do vídeo e devolve só as leituras
+    Com rastreamento o trecho fica com as motos que aparecem nele: alguns frames antes de inicio
+    (desde inicio_busca) passam só pelo YOLO e pelo rastreador, para reconhecer as motos que vêm do
+    trecho anterior, e depois de fim (até fim_busca) a varredura segue enquanto alguma moto do trecho
+    continuar em cena. Cada moto é lida pelo trecho onde apareceu, como numa varredura única
+    """
+    inicio_trecho = time.perf_counter()
+    rastreador = _detector_worker.novo_rastreador(trecho=(inicio, fim)) if rastrear else None
+    leitura_inicio, leitura_fim = inicio, fim
+    if rastreador is not None and frames is None:
+        # Aquecimento com um número inteiro de lotes, para os lotes caírem nos frames da varredura única
+        passo = intervalo * tamanho_lote
+        aquecimento = -(-rastreador.alcance(intervalo) // passo) * passo
+        leitura_inicio = max(inicio_busca or 1, inicio - aquecimento)
+        leitura_fim = fim_busca
+    leitor = LeitorFrames(video_path, intervalo, inicio=leitura_inicio, fim=leitura_fim, frames=frames)
+    filtro = _detector_worker.novo_filtro_movimento()
+    cache = _detector_worker.cache_ocr
+    cache_antes = cache.contadores() if cache else None
+    metricas_antes = _detector_worker.metricas.instantaneo()
+    leituras = []
+    # (frame, posição da moto na saída do YOLO) de cada leitura, para o pool intercalar as leituras
+    # dos frames lidos por dois trechos na ordem de uma varredura única
+    ordem = []
+    leituras_frame = []
+    posicoes_frame = []
+    frames_processados = 0
+    tempo_deteccao = 0.0
+    tempo_ocr = 0.0
+
+    for lote in agrupa_em_lotes(_detector_worker.le_frames(leitor), tamanho_lote):
+        if fim is not None and lote[0][0] > fim and not (rastreador and rastreador.trilhas_abertas()):
+            break
+
+        t0 = time.perf_counter()
+        motos_por_frame = _detector_worker.detecta_motos_filtrado(filtro, [frame for _, frame in lote])
+        tempo_deteccao += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        leituras_por_frame = _detector_worker.le_lote(lote, motos_por_frame, rastreador, leituras_frame)
+        tempo_ocr += time.perf_counter() - t0
+
+        for (frame_num, _), motos, leituras_frame in zip(lote, motos_por_frame, leituras_por_frame):
+            if motos is not None:
+                posicoes = {tuple(box): i for i, box in enumerate(motos)}
+                posicoes_frame = [posicoes.get(tuple(leitura['box']), 0) for leitura in leituras_frame]
+            # Frame parado: leituras copiadas do anterior, na mesma ordem (posicoes_frame continua valendo)
+            if frame_num < inicio:
+                continue
+            if fim is None or frame_num <= fim:
+                frames_processados += 1
+            leituras.extend(leituras_frame)
+            ordem.extend((frame_num, posicao) for posicao in posicoes_frame)
+
+    if rastreador is not None:
+        rastreador.marca_visto_ate(leituras)
+
+    return {
+        'inicio': inicio,
+        'fim': fim,
+        'pid': os.getpid(),
+        'leituras': leituras,
+        'ordem_leituras': ordem,
+        'frames_processados': frames_processados,
+        'tempo_deteccao_s': tempo_deteccao,
+        'tempo_ocr_s': tempo_ocr,
+        'rastreamento': rastreador.resumo() if rastreador is not None else None,
+        'movimento': filtro.resumo() if filtro is not None else None,
+        'cache_ocr': ({chave: valor - cache_antes[chave] for chave, valor in cache.contadores().items()}
+                      if cache is not None else None),
+        'metricas': _detector_worker.metricas.diferenca(metricas_antes),
+        'segundos': time.perf_counter() - inicio_trecho
+    }
+
+
+def divide_trechos(total_frames: int, partes: int, inicio=1, fim=None, multiplo=1) -> list:
+    """
+    Divide os frames inicio..fim (padrão: o vídeo inteiro) em trechos contíguos (inicio, fim)
+    O tamanho dos trechos é arredondado para um múltiplo de multiplo
+    """
+    if total_frames <= 0:
+        # Sem contagem de frames no container: um único trecho até o fim pedido
+        return [(inicio, fim)]
+
+    fim = min(fim, total_frames) if fim else total_frames
+    if fim < inicio:
+        return []
+    quantidade = fim - inicio + 1
+    partes = max(1, min(partes, quantidade))
+    tamanho = -(-quantidade // partes)
+    tamanho = -(-tamanho // multiplo) * multiplo
+    return [(comeco, min(comeco + tamanho - 1, fim))
+            for comeco in range(inicio, fim + 1, tamanho)]
+
+
+class PoolProcessos:
+    """
+    Pool de processos que divide o vídeo em trechos de frames.
+    Cada processo carrega seus próprios modelos uma vez e os reaproveita
+    entre buscas; as leituras são juntadas na ordem dos frames.
+    """
+
+    def __init__(self, workers=None, opcoes_detector=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.opcoes_detector = opcoes_detector or {}
+        threads_por_worker = max(1, (os.cpu_count() or 1) // self.workers)
+
+        # spawn evita herdar o estado do PyTorch do processo pai
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializa_worker,
+            initargs=(self.opcoes_detector, threads_por_worker)
+        )
+
+    def executa(self, video_path: str, intervalo: int, tamanho_lote: int, trechos_por_worker=2,
+                acompanhamento=None, inicio=1, fim=None, frames=None, rastrear=True):
+        """
+        Retorna (leituras, estatisticas) com as leituras em ordem de frame
+        inicio/fim (frames, inclusivos) limitam a busca a um trecho do vídeo
+        frames (opcional) lê só esses frames no lugar dos múltiplos do intervalo
+        rastrear=False desliga o rastreamento de motos nos workers nesta busca
+        """
+        acompanhamento = acompanhamento or Acompanhamento()
+        total_frames = LeitorFrames(video_path).info_video()['total_frames']
+        # Trechos com um número inteiro de lotes do YOLO: os lotes (e a seleção das motos para o
+        # OCR em lote) caem nos mesmos frames de uma varredura única
+        trechos = divide_trechos(total_frames, self.workers * trechos_por_worker, inicio or 1, fim,
+                                 intervalo * tamanho_lote)
+
+        if frames is not None:
+            # Cada trecho recebe só os frames da lista que caem nele
+            trechos = [(comeco, final) for comeco, final in trechos
+                       if any(comeco <= f and (final is None or f <= final) for f in frames)]
+        futuros = [
+            self.executor.submit(_processa_trecho, video_path, intervalo, comeco, final, tamanho_lote,
+                                 [f for f in frames if comeco <= f and (final is None or f <= final)]
+                                 if frames is not None else None, rastrear, inicio or 1, fim)
+            for comeco, final in trechos
+        ]
+
+        # Acompanha os trechos conforme terminam, permitindo cancelar os pendentes
+        pendentes = set(futuros)
+        frames_processados = 0
+        while pendentes:
+            if acompanhamento.cancelado():
+                for futuro in pendentes:
+                    futuro.cancel()
+            acompanhamento.verifica_cancelamento()
+
+            prontos, pendentes = wait(pendentes, timeout=0.5, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                frames_processados += futuro.result()['frames_processados']
+            if prontos:
+                acompanhamento.progresso(frames_processados)
+
+        # Os trechos são contíguos e foram submetidos em ordem
+        resultados = [futuro.result() for futuro in futuros]
+
+        # Ids de trilha únicos no vídeo inteiro: cada trecho numera as suas a partir de 1, na ordem
+        # em que apareceram, então basta somar as trilhas dos trechos anteriores
+        ordenadas = []
+        metricas = Metricas()
+        trilhas_anteriores = 0
+        for resultado in resultados:
+            for leitura in resultado['leituras']:
+                if leitura.get('trilha') is not None:
+                    leitura['trilha'] += trilhas_anteriores
+            if resultado['rastreamento'] is not None:
+                trilhas_anteriores += resultado['rastreamento']['trilhas']
+            ordenadas.extend(zip(resultado.pop('ordem_leituras'), resultado.pop('leituras')))
+            metricas.acumula(resultado.pop('metricas'))
+        # Um trecho segue as suas motos depois do fim dele: os frames lidos por dois trechos intercalam
+        ordenadas.sort(key=lambda par: par[0])
+        leituras = [leitura for _, leitura in ordenadas]
+
+        estatisticas = {
+            'frames_processados': sum(r['frames_processados'] for r in resultados),
+            'tamanho_lote': tamanho_lote,
+            'modo_execucao': 'processos',
+            'workers_processos': self.workers,
+            # Tempos somados entre todos os processos
+            'tempo_deteccao_s': sum(r['tempo_deteccao_s'] for r in resultados),
+            'tempo_ocr_s': sum(r['tempo_ocr_s'] for r in resultados),
+            'trechos': resultados,
+            # Soma das métricas dos workers, repassada às métricas do detector
+            'metricas': metricas.instantaneo()
+        }
+        if resultados and resultados[0]['rastreamento'] is not None:
+            estatisticas['rastreamento'] = soma_resumos([r['rastreamento'] for r in resultados])
+        if resultados and resultados[0]['cache_ocr'] is not None:
+            estatisticas['cache_ocr'] = soma_resumos([r['cache_ocr'] for r in resultados])
+        if resultados and resultados[0]['movimento'] is not None:
+            estatisticas['movimento'] = junta_resumos([r['movimento'] for r in resultados])
+
+        return leituras, estatisticas
+
+    def fecha(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,300 @@
+import re
+import threading
+
+# Placa completa: antiga (AAA9999) ou Mercosul (AAA9A99)
+PADRAO_PLACA = re.compile(r'^[A-Z]{3}[0-9][A-Z0-9][0-9]{2}$')
+
+
+def iou(a, b) -> float:
+    """Interseção sobre união de dois boxes (x1, y1, x2, y2)"""
+    largura = min(a[2], b[2]) - max(a[0], b[0])
+    altura = min(a[3], b[3]) - max(a[1], b[1])
+    if largura <= 0 or altura <= 0:
+        return 0.0
+
+    intersecao = largura * altura
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return intersecao / float(area_a + area_b - intersecao)
+
+
+def distancia_centros(a, b) -> float:
+    """Distância entre os centros dos boxes, relativa à diagonal do primeiro"""
+    dx = (a[0] + a[2] - b[0] - b[2]) / 2.0
+    dy = (a[1] + a[3] - b[1] - b[3]) / 2.0
+    diagonal = max(1.0, ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5)
+    return (dx * dx + dy * dy) ** 0.5 / diagonal
+
+
+def associa_boxes(anteriores: list, atuais: list, iou_minimo=0.3, distancia_maxima=0.5) -> dict:
+    """
+    Associa gulosamente cada box atual ao box anterior mais parecido (IoU, depois distância dos centros)
+    Retorna {índice do box atual: índice do box anterior}
+    """
+    pares = []
+    for j, anterior in enumerate(anteriores):
+        for i, box in enumerate(atuais):
+            sobreposicao = iou(anterior, box)
+            distancia = distancia_centros(anterior, box)
+            if sobreposicao >= iou_minimo or distancia <= distancia_maxima:
+                pares.append((sobreposicao, -distancia, i, j))
+
+    associacoes = {}
+    usados = set()
+    for _, _, i, j in sorted(pares, key=lambda p: (p[0], p[1]), reverse=True):
+        if i in associacoes or j in usados:
+            continue
+        associacoes[i] = j
+        usados.add(j)
+    return associacoes
+
+
+class Trilha:
+    """Uma moto acompanhada ao longo dos frames amostrados"""
+
+    def __init__(self, trilha_id: int, frame_num: int, box, alheia=False):
+        self.id = trilha_id
+        self.box = box
+        self.alheia = alheia
+        self.primeiro_frame = frame_num
+        self.ultimo_frame = frame_num
+        self.perdida = 0
+        self.leituras_ocr = 0
+        self.desde_ultimo_ocr = 0
+        self.confirmada = False
+        # Frames com OCR selecionado cuja leitura ainda não foi registrada
+        self.pendentes = set()
+
+
+class RastreadorMotos:
+    """
+    Rastreador leve (IoU + distância dos centros, só CPU) sobre os boxes de motos do YOLO.
+    Cada moto ganha um id de trilha e o OCR só roda até a trilha ter uma leitura
+    confiável (ou estourar max_tentativas); depois disso roda 1 vez a cada reocr_a_cada aparições.
+    atualiza() precisa receber os frames em ordem; registra_leitura() pode vir de outras threads.
+    Com guarda_historico as trilhas encerradas continuam consultáveis (último frame visto),
+    o que as varreduras de vídeo usam; o monitor ao vivo não precisa.
+    Com trecho (inicio, fim), as motos que aparecem fora dele são de outro trecho (modo processos):
+    as trilhas delas só servem para a associação, sem OCR, sem id público e fora das contagens.
+    """
+
+    def __init__(self, iou_minimo=0.3, distancia_maxima=0.5, max_perdida=3,
+                 max_tentativas=6, reocr_a_cada=10, guarda_historico=False, trecho=None):
+        self.iou_minimo = iou_minimo
+        self.distancia_maxima = distancia_maxima
+        self.max_perdida = max_perdida
+        self.max_tentativas = max_tentativas
+        self.reocr_a_cada = reocr_a_cada
+        self.trilhas = {}
+        self.historico = {} if guarda_historico else None
+        self.trecho = trecho
+        self.proximo_id = 1
+        # Trilhas de outro trecho ganham ids negativos, que nunca chegam às leituras
+        self.proximo_id_alheio = -1
+        self.total_trilhas = 0
+        self.motos_detectadas = 0
+        self.ocr_executados = 0
+        self.ocr_pulados = 0
+        self._trava = threading.Lock()
+        self._leitura_registrada = threading.Condition(self._trava)
+
+    def _associa(self, motos: list) -> dict:
+        """Associa gulosamente cada box à trilha mais parecida; retorna {índice do box: trilha}"""
+        trilhas = list(self.trilhas.values())
+        pares = associa_boxes([trilha.box for trilha in trilhas], motos, self.iou_minimo, self.distancia_maxima)
+        return {i: trilhas[j] for i, j in pares.items()}
+
+    def _precisa_ocr(self, trilha: Trilha) -> bool:
+        if not trilha.confirmada and trilha.leituras_ocr < self.max_tentativas:
+            return True
+        return bool(self.reocr_a_cada) and trilha.desde_ultimo_ocr >= self.reocr_a_cada
+
+    def _fora_do_trecho(self, frame_num: int) -> bool:
+        if self.trecho is None:
+            return False
+        inicio, fim = self.trecho
+        return frame_num < inicio or (fim is not None and frame_num > fim)
+
+    def _nova_trilha(self, frame_num: int, box) -> Trilha:
+        if self._fora_do_trecho(frame_num):
+            trilha = Trilha(self.proximo_id_alheio, frame_num, box, alheia=True)
+            self.proximo_id_alheio -= 1
+        else:
+            trilha = Trilha(self.proximo_id, frame_num, box)
+            self.proximo_id += 1
+            self.total_trilhas += 1
+            if self.historico is not None:
+                self.historico[trilha.id] = trilha
+        self.trilhas[trilha.id] = trilha
+        return trilha
+
+    def alcance(self, intervalo: int) -> int:
+        """Por quantos frames uma trilha sem aparecer continua aberta (max_perdida amostras)"""
+        return (self.max_perdida + 1) * intervalo
+
+    def trilhas_abertas(self) -> int:
+        """Trilhas do trecho que ainda não foram encerradas"""
+        with self._trava:
+            return sum(1 for trilha in self.trilhas.values() if not trilha.alheia)
+
+    def _espera_pendentes(self, trilhas: list, antes_de: int, parar):
+        """Espera as leituras das trilhas selecionadas em frames anteriores a antes_de (ou parar)"""
+        while not parar.is_set() and any(frame < antes_de for trilha in trilhas for frame in trilha.pendentes):
+            self._leitura_registrada.wait(0.1)
+
+    def atualiza(self, frame_num: int, motos: list, parar=None, desde=None) -> tuple:
+        """
+        Atualiza as trilhas com as motos de um frame
+        Com parar (threading.Event), antes de decidir o OCR espera as leituras das mesmas trilhas
+        selecionadas em frames anteriores a desde (padrão: este frame), para decidir como uma
+        varredura sequencial mesmo com o OCR rodando em outras threads
+        Retorna (motos, trilhas): só os boxes que precisam de OCR e o id da trilha de cada um
+        """
+        with self._trava:
+            associacoes = self._associa(motos)
+            if parar is not None:
+                self._espera_pendentes(list(associacoes.values()), frame_num if desde is None else desde, parar)
+
+            vistas = set()
+            selecionadas, ids = [], []
+            proprias = 0
+            for i, box in enumerate(motos):
+                trilha = associacoes.get(i)
+                if trilha is None:
+                    trilha = self._nova_trilha(frame_num, box)
+
+                trilha.box = box
+                trilha.ultimo_frame = frame_num
+                trilha.perdida = 0
+                vistas.add(trilha.id)
+                if trilha.alheia:
+                    continue
+                proprias += 1
+                trilha.desde_ultimo_ocr += 1
+
+                if self._precisa_ocr(trilha):
+                    trilha.desde_ultimo_ocr = 0
+                    trilha.pendentes.add(frame_num)
+                    selecionadas.append(box)
+                    ids.append(trilha.id)
+
+            # Trilhas que sumiram por mais de max_perdida frames amostrados são encerradas
+            for trilha_id in [t for t in self.trilhas if t not in vistas]:
+                self.trilhas[trilha_id].perdida += 1
+                if self.trilhas[trilha_id].perdida > self.max_perdida:
+                    del self.trilhas[trilha_id]
+
+            self.motos_detectadas += proprias
+            self.ocr_executados += len(selecionadas)
+            self.ocr_pulados += proprias - len(selecionadas)
+
+        return selecionadas, ids
+
+    def _trilha(self, trilha_id: int):
+        trilha = self.trilhas.get(trilha_id)
+        if trilha is None and self.historico is not None:
+            trilha = self.historico.get(trilha_id)
+        return trilha
+
+    def registra_leitura(self, trilha_id: int, confiavel: bool, frame_num=None):
+        """Conta uma leitura de OCR da trilha e marca se ela já tem uma placa confiável"""
+        with self._trava:
+            trilha = self.trilhas.get(trilha_id)
+            if trilha is None:
+                return
+            trilha.leituras_ocr += 1
+            trilha.confirmada = trilha.confirmada or confiavel
+            trilha.pendentes.discard(frame_num)
+            self._leitura_registrada.notify_all()
+
+    def descarta_leitura(self, trilha_id: int, frame_num: int):
+        """OCR selecionado que não produziu leitura (recorte vazio ou erro): só deixa de ser pendente"""
+        with self._trava:
+            trilha = self.trilhas.get(trilha_id)
+            if trilha is not None:
+                trilha.pendentes.discard(frame_num)
+            self._leitura_registrada.notify_all()
+
+    def visto_ate(self, trilha_id: int):
+        """Último frame em que a moto da trilha foi vista (None se a trilha não é conhecida)"""
+        with self._trava:
+            trilha = self._trilha(trilha_id)
+            return trilha.ultimo_frame if trilha is not None else None
+
+    def marca_visto_ate(self, leituras: list):
+        """Grava em cada leitura com trilha o último frame em que a moto foi vista ('visto_ate')"""
+        for leitura in leituras:
+            if leitura.get('trilha') is not None:
+                visto_ate = self.visto_ate(leitura['trilha'])
+                if visto_ate is not None:
+                    leitura['visto_ate'] = visto_ate
+
+    def resumo(self) -> dict:
+        return {
+            'trilhas': self.total_trilhas,
+            'motos_detectadas': self.motos_detectadas,
+            'ocr_executados': self.ocr_executados,
+            'ocr_pulados': self.ocr_pulados
+        }
+
+
+def soma_resumos(resumos: list) -> dict:
+    """Junta os resumos de vários rastreadores (ex.: um por trecho do vídeo)"""
+    total = {}
+    for resumo in resumos:
+        for chave, valor in resumo.items():
+            total[chave] = total.get(chave, 0) + valor
+    return total
+
+
+class DeteccoesPorTrilha:
+    """
+    Junta os matches de uma mesma moto (trilha) e placa numa única detecção
+    com primeiro/último frame; as imagens só são regravadas (por cima das
+    anteriores) quando aparece um match melhor. Leituras sem trilha continuam gerando uma detecção por match.
+    O último frame vem do rastreador (a moto continua visível depois da última leitura
+    com OCR), atualizado em finaliza() ao fim da varredura.
+    """
+
+    def __init__(self, detector, acompanhamento):
+        self.detector = detector
+        self.acompanhamento = acompanhamento
+        self.deteccoes = []
+        self.por_chave = {}
+
+    def registra(self, frame, leitura: dict, match: tuple):
+        trilha = leitura.get('trilha')
+        placa = match[5]
+        chave = (trilha, placa)
+        frame_num = leitura['frame']
+
+        if trilha is None or chave not in self.por_chave:
+            deteccao = self.detector.salva_deteccao(frame, leitura, match)
+            deteccao.update({'trilha': trilha, 'primeiro_frame': frame_num,
+                             'ultimo_frame': frame_num, 'frames_com_match': 1})
+            self.deteccoes.append(deteccao)
+            self.por_chave[chave] = deteccao
+            self.acompanhamento.nova_deteccao(deteccao)
+            return
+
+        deteccao = self.por_chave[chave]
+        deteccao['ultimo_frame'] = frame_num
+        deteccao['frames_com_match'] += 1
+
+        # Melhor recorte da moto: maior similaridade, depois maior confiança do OCR
+        if (match[3], match[2]) > (deteccao['similaridade'], deteccao['confianca']):
+            melhor = self.detector.salva_deteccao(frame, leitura, match, substitui=deteccao)
+            for campo in ('trilha', 'primeiro_frame', 'ultimo_frame', 'frames_com_match'):
+                melhor[campo] = deteccao[campo]
+            deteccao.update(melhor)
+
+    def finaliza(self, rastreador):
+        """Estende o último frame de cada detecção até o último frame em que o rastreador viu a moto"""
+        if rastreador is None:
+            return
+        for deteccao in self.deteccoes:
+            if deteccao['trilha'] is None:
+                continue
+            visto_ate = rastreador.visto_ate(deteccao['trilha'])
+            if visto_ate is not None:
+                deteccao['ultimo_frame'] = max(deteccao['ultimo_frame'], visto_ate)
@@ -0,0 +1,135 @@
+import json
+import math
+import os
+
+import cv2
+import numpy as np
+
+# Lado da entrada do YOLO precisa ser múltiplo do maior stride do modelo
+MULTIPLO_ENTRADA = 32
+
+
+class RegiaoInferencia:
+    """
+    Resolução de inferência e polígonos de interesse (ROI) de um vídeo ou câmera.
+    Os polígonos usam coordenadas normalizadas (0 a 1, fração da largura/altura), então valem
+    para qualquer resolução do vídeo. O YOLO recebe só o retângulo que envolve os polígonos,
+    com o resto pintado de preto e reduzido para caber em `resolucao`; as caixas voltam
+    para as coordenadas do frame original, e o recorte do OCR continua em resolução cheia.
+    """
+
+    def __init__(self, resolucao=None, rois=None):
+        self.resolucao = int(resolucao) if resolucao else None
+        self.rois = [np.asarray(poligono, dtype=np.float32).reshape(-1, 2) for poligono in (rois or [])]
+        # (altura, largura) do frame -> geometria já calculada
+        self._geometrias = {}
+
+    def descricao(self) -> dict:
+        """Configuração serializável (entra nos parâmetros do índice)"""
+        return {'resolucao': self.resolucao, 'rois': [poligono.tolist() for poligono in self.rois]}
+
+    def geometria(self, altura: int, largura: int) -> dict:
+        """Polígonos em pixels, retângulo envolvente, máscara e escala para frames deste tamanho"""
+        chave = (altura, largura)
+        if chave in self._geometrias:
+            return self._geometrias[chave]
+
+        poligonos = [np.round(poligono * (largura, altura)).astype(np.int32) for poligono in self.rois]
+        if poligonos:
+            x, y, w, h = cv2.boundingRect(np.concatenate(poligonos))
+            x0, y0, x1, y1 = max(0, x), max(0, y), min(largura, x + w), min(altura, y + h)
+        else:
+            x0, y0, x1, y1 = 0, 0, largura, altura
+
+        mascara = None
+        if poligonos:
+            mascara = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv2.fillPoly(mascara, [poligono - (x0, y0) for poligono in poligonos], 255)
+            # Polígono retangular: o recorte já basta
+            if cv2.countNonZero(mascara) == mascara.size:
+                mascara = None
+
+        escala = 1.0
+        if self.resolucao and max(x1 - x0, y1 - y0) > self.resolucao:
+            escala = self.resolucao / float(max(x1 - x0, y1 - y0))
+        tamanho = (max(1, round((x1 - x0) * escala)), max(1, round((y1 - y0) * escala)))
+
+        geometria = {
+            'poligonos': poligonos,
+            'retangulo': (x0, y0, x1, y1),
+            'mascara': mascara,
+            'escala': escala,
+            'tamanho': tamanho,
+            # Entrada do YOLO do tamanho da imagem reduzida (sem ampliar de volta para 640)
+            'entrada': math.ceil(max(tamanho) / MULTIPLO_ENTRADA) * MULTIPLO_ENTRADA if self.resolucao else None
+        }
+        self._geometrias[chave] = geometria
+        return geometria
+
+    def prepara(self, frame):
+        """Imagem que vai para o YOLO: recorte da ROI, mascarado e reduzido"""
+        g = self.geometria(*frame.shape[:2])
+        x0, y0, x1, y1 = g['retangulo']
+        imagem = frame[y0:y1, x0:x1]
+        if g['mascara'] is not None:
+            imagem = cv2.bitwise_and(imagem, imagem, mask=g['mascara'])
+        if g['escala'] < 1.0:
+            imagem = cv2.resize(imagem, g['tamanho'], interpolation=cv2.INTER_AREA)
+        return imagem
+
+    def volta(self, deteccoes: list, altura: int, largura: int) -> list:
+        """
+        Caixas da imagem preparada -> coordenadas do frame original
+        Descarta as caixas cujo centro fica fora de todos os polígonos
+        """
+        g = self.geometria(altura, largura)
+        x0, y0 = g['retangulo'][:2]
+        escala = g['escala']
+
+        convertidas = []
+        for (x1, y1, x2, y2), cls, conf in deteccoes:
+            box = (int(min(largura, max(0, x0 + x1 / escala))), int(min(altura, max(0, y0 + y1 / escala))),
+                   int(min(largura, max(0, x0 + x2 / escala))), int(min(altura, max(0, y0 + y2 / escala))))
+            centro = ((box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0)
+            if g['poligonos'] and not any(cv2.pointPolygonTest(p, centro, False) >= 0 for p in g['poligonos']):
+                continue
+            convertidas.append((box, cls, conf))
+        return convertidas
+
+
+class RegioesInferencia:
+    """
+    Configuração de inferência por vídeo e por câmera, num dicionário ou arquivo JSON:
+    {"padrao": {"resolucao": 960},
+     "cameras": {"camera1": {"resolucao": 640, "rois": [[[0, 0.4], [1, 0.4], [1, 1], [0, 1]]]}},
+     "videos": {"teste.mp4": {"rois": [...]}}}
+    Um vídeo usa a entrada dele (caminho completo ou nome do arquivo), senão a da câmera
+    (nome da pasta do vídeo), senão "padrao"; sem nenhuma, o frame inteiro vai para o YOLO.
+    """
+
+    def __init__(self, config=None, resolucao_padrao=None):
+        if isinstance(config, str):
+            with open(config, "r", encoding="utf-8") as arquivo:
+                config = json.load(arquivo)
+        self.config = dict(config or {})
+        if resolucao_padrao and 'padrao' not in self.config:
+            self.config['padrao'] = {'resolucao': resolucao_padrao}
+        self._regioes = {}
+
+    def _entrada(self, video_path: str):
+        videos = self.config.get('videos', {})
+        cameras = self.config.get('cameras', {})
+        camera = os.path.basename(os.path.dirname(os.path.abspath(video_path)))
+        for entrada in (videos.get(video_path), videos.get(os.path.abspath(video_path)),
+                        videos.get(os.path.basename(video_path)), cameras.get(camera), self.config.get('padrao')):
+            if entrada:
+                return entrada
+        return None
+
+    def para_video(self, video_path: str):
+        """RegiaoInferencia do vídeo (None quando o frame inteiro vai para o YOLO)"""
+        if video_path not in self._regioes:
+            entrada = self._entrada(video_path)
+            self._regioes[video_path] = (RegiaoInferencia(entrada.get('resolucao'), entrada.get('rois'))
+                                         if entrada else None)
+        return self._regioes[video_path]
@@ -14,6 +14,14 @@ const apiStatusSpan = document.getElementById('apiStatus');
 const imageModal = document.getElementById('imageModal');
 const modalImage = document.getElementById('modalImage');
 const modalInfo = document.getElementById('modalInfo');
+const loadingText = document.getElementById('loadingText');
+const progressBar = document.getElementById('progressBar');
+const cancelBtn = document.getElementById('cancelBtn');
+
+// Job de busca em andamento
+let currentJobId = null;
+let currentEvents = null;
+let liveDetections = [];
 
 // Inicialização
 document.addEventListener('DOMContentLoaded', function() {
@@ -38,6 +46,9 @@ function setupEventListeners() {
     // Slider de threshold
     thresholdSlider.addEventListener('input', updateThresholdDisplay);
     
+    // Cancelamento da busca
+    cancelBtn.addEventListener('click', cancelSearch);
+    
     // Input de placa - formatação automática
     placaInput.addEventListener('input', formatPlacaInput);
     
@@ -117,7 +128,8 @@ async function handleSearch(event) {
     try {
         console.log(`🔍 Iniciando busca: ${placa} (threshold: ${threshold})`);
         
-        const response = await fetch('/api/buscar-placa', {
+        // Cria o job e acompanha o progresso sem bloquear a requisição
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -130,20 +142,101 @@ async function handleSearch(event) {
         
         const data = await response.json();
         
+        if (!response.ok) {
+            throw new Error(data.erro || 'Erro na busca');
+        }
+        
+        currentJobId = data.job_id;
+        liveDetections = [];
+        followJob(data);
+        
+    } catch (error) {
         hideLoading();
+        console.error('❌ Erro na busca:', error);
+        showError(`Erro na busca: ${error.message}`);
+    }
+}
+
+function followJob(job) {
+    currentEvents = new EventSource(job.eventos);
+    
+    currentEvents.addEventListener('progresso', function(event) {
+        updateProgress(JSON.parse(event.data));
+    });
+    
+    // Cada detecção aparece assim que é encontrada
+    currentEvents.addEventListener('deteccao', function(event) {
+        liveDetections.push(JSON.parse(event.data));
+        summaryDiv.innerHTML = `
+            <i class="fas fa-spinner fa-spin"></i>
+            <strong>${liveDetections.length}</strong> detecção(ões) até agora...
+        `;
+        displayDetections(liveDetections);
+        resultsDiv.classList.remove('hidden');
+    });
+    
+    currentEvents.addEventListener('fim', function() {
+        closeEvents();
+        finishJob(job.job_id);
+    });
+    
+    // Sem streaming (proxy, conexão caiu): volta para polling
+    currentEvents.onerror = function() {
+        closeEvents();
+        pollJob(job.job_id);
+    };
+}
+
+function closeEvents() {
+    if (currentEvents) {
+        currentEvents.close();
+        currentEvents = null;
+    }
+}
+
+async function pollJob(jobId) {
+    try {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const data = await response.json();
         
-        if (response.ok) {
-            if (data.sucesso) {
-                displayResults(data);
-                console.log(`✅ Busca concluída: ${data.total_deteccoes} detecções encontradas`);
+        if (!response.ok) {
+            throw new Error(data.erro || 'Erro ao consultar a busca');
+        }
+        
+        updateProgress(data);
+        
+        if (['concluido', 'cancelado', 'erro'].includes(data.status)) {
+            finishJob(jobId);
+        } else {
+            setTimeout(() => pollJob(jobId), 2000);
+        }
+    } catch (error) {
+        hideLoading();
+        showError(`Erro na busca: ${error.message}`);
+    }
+}
+
+async function finishJob(jobId) {
+    try {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const data = await response.json();
+        
+        hideLoading();
+        currentJobId = null;
+        
+        if (data.status === 'concluido') {
+            if (data.resultado.sucesso) {
+                displayResults(data.resultado);
+                console.log(`✅ Busca concluída: ${data.resultado.total_deteccoes} detecções encontradas`);
             } else {
-                displayNoResults(data);
+                displayNoResults(data.resultado);
                 console.log('❌ Nenhuma detecção encontrada');
             }
+        } else if (data.status === 'cancelado') {
+            showError(`Busca cancelada (${data.total_deteccoes} detecção(ões) encontradas até o cancelamento).`);
         } else {
             throw new Error(data.erro || 'Erro na busca');
         }
-        
     } catch (error) {
         hideLoading();
         console.error('❌ Erro na busca:', error);
@@ -151,6 +244,31 @@ async function handleSearch(event) {
     }
 }
 
+function updateProgress(progresso) {
+    const percentual = Math.round(progresso.percentual * 100);
+    progressBar.style.width = `${percentual}%`;
+    
+    let texto = `Analisando vídeo... ${progresso.frames_processados}/${progresso.frames_previstos} frames (${percentual}%)`;
+    if (progresso.eta_s !== null && progresso.eta_s !== undefined) {
+        texto += ` - faltam ~${Math.ceil(progresso.eta_s)}s`;
+    }
+    loadingText.textContent = texto;
+}
+
+async function cancelSearch() {
+    if (!currentJobId) {
+        return;
+    }
+    
+    cancelBtn.disabled = true;
+    try {
+        await fetch(`/api/jobs/${currentJobId}`, { method: 'DELETE' });
+        console.log(`🛑 Cancelamento solicitado: ${currentJobId}`);
+    } catch (error) {
+        console.error('❌ Erro ao cancelar:', error);
+    }
+}
+
 function displayResults(data) {
     // Atualiza sumário
     summaryDiv.innerHTML = `
@@ -213,12 +331,12 @@ function displayDetections(deteccoes) {
             </div>
             
             <div class="detection-images">
-                <div class="image-container" onclick="openModal('${deteccao.frame_base64}', 'Frame Completo', ${JSON.stringify(deteccao).replace(/"/g, '&quot;')})">
-                    <img src="data:image/jpeg;base64,${deteccao.frame_base64}" alt="Frame ${deteccao.frame}">
+                <div class="image-container" onclick="openModal('${deteccao.frame_url}', 'Frame Completo', ${JSON.stringify(deteccao).replace(/"/g, '&quot;')})">
+                    <img src="${deteccao.miniatura_frame_url}" loading="lazy" alt="Frame ${deteccao.frame}">
                     <div class="image-label">Frame Completo</div>
                 </div>
-                <div class="image-container" onclick="openModal('${deteccao.moto_base64}', 'Moto Detectada', ${JSON.stringify(deteccao).replace(/"/g, '&quot;')})">
-                    <img src="data:image/jpeg;base64,${deteccao.moto_base64}" alt="Moto Frame ${deteccao.frame}">
+                <div class="image-container" onclick="openModal('${deteccao.moto_url}', 'Moto Detectada', ${JSON.stringify(deteccao).replace(/"/g, '&quot;')})">
+                    <img src="${deteccao.miniatura_moto_url}" loading="lazy" alt="Moto Frame ${deteccao.frame}">
                     <div class="image-label">Moto Detectada</div>
                 </div>
             </div>
@@ -251,16 +369,18 @@ function displayDetections(deteccoes) {
     detectionsDiv.innerHTML = detectionsHTML;
 }
 
-function openModal(base64Image, title, detectionData) {
+function openModal(imageUrl, title, detectionData) {
     const detection = typeof detectionData === 'string' ? JSON.parse(detectionData) : detectionData;
     
-    modalImage.src = `data:image/jpeg;base64,${base64Image}`;
+    // Imagem em resolução completa só é carregada ao ampliar
+    modalImage.src = imageUrl;
     modalImage.alt = title;
     
     modalInfo.innerHTML = `
         <h3>${title}</h3>
         <div class="modal-details">
             <p><strong>Frame:</strong> ${detection.frame}</p>
+            <p><strong>Visível:</strong> frames ${detection.primeiro_frame} a ${detection.ultimo_frame} (${detection.frames_com_match} com match)</p>
             <p><strong>Texto OCR:</strong> ${detection.texto_ocr}</p>
             <p><strong>Texto Limpo:</strong> ${detection.texto_limpo}</p>
             <p><strong>Similaridade:</strong> ${Math.round(detection.similaridade * 100)}%</p>
@@ -279,6 +399,9 @@ function closeModal() {
 
 function showLoading() {
     loadingDiv.classList.remove('hidden');
+    loadingText.textContent = 'Analisando vídeo... Isso pode levar alguns minutos.';
+    progressBar.style.width = '0%';
+    cancelBtn.disabled = false;
     
     // Desabilita botão de busca
     const submitBtn = searchForm.querySelector('button[type="submit"]');
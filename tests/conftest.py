@@ -0,0 +1,59 @@
+import functools
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_sintetico import BackendSintetico, gera_video, monta_cenario  # noqa: E402
+from oraculo_ocr import LeitorOraculo  # noqa: E402
+from placa_detector import PlacaDetector  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def cenario():
+    """20 s a 30 fps com 4 motos atravessando o frame, uma de cada vez"""
+    return monta_cenario(640, 360, 30.0, 20.0, 4, False, 42)
+
+
+@pytest.fixture(scope='session')
+def video_sintetico(cenario, tmp_path_factory):
+    return gera_video(str(tmp_path_factory.mktemp('video') / 'sintetico.mp4'), cenario, 4, 0, 42)
+
+
+@pytest.fixture
+def novo_detector(cenario, video_sintetico, tmp_path):
+    """Fábrica de PlacaDetector com o backend sintético e o oráculo de OCR (o pool é fechado no fim)"""
+    detectores = []
+
+    def cria(**opcoes):
+        opcoes.setdefault('save_dir', str(tmp_path / 'prints'))
+        opcoes.setdefault('index_dir', str(tmp_path / 'indices'))
+        detector = PlacaDetector(video_sintetico, backend_deteccao=BackendSintetico,
+                                 leitor_ocr=functools.partial(LeitorOraculo, [m['placa'] for m in cenario['motos']]),
+                                 **opcoes)
+        detectores.append(detector)
+        return detector
+
+    yield cria
+    for detector in detectores:
+        detector.fecha_pool()
+
+
+@pytest.fixture(scope='session')
+def app_teste(tmp_path_factory):
+    """
+    Módulo app importado com uma vaga de busca e fila zero, para o 429 sair na hora
+    Os modelos só carregariam no primeiro uso; os testes trocam o detector quando precisam dele
+    """
+    pasta = tmp_path_factory.mktemp('app')
+    with pytest.MonkeyPatch.context() as ambiente:
+        ambiente.setenv('CARREGAMENTO_MODELOS', 'sob_demanda')
+        ambiente.setenv('MAX_BUSCAS_SIMULTANEAS', '1')
+        ambiente.setenv('MAX_FILA_BUSCAS', '0')
+        ambiente.setenv('RAIZ_BIBLIOTECA', str(pasta / 'videos'))
+        ambiente.chdir(pasta)
+        import app
+    return app
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+
+def renderiza_placa(texto: str, largura: int, altura: int, duas_linhas: bool):
+    """Placa branca com o texto desenhado como no benchmark_sintetico, no tamanho pedido"""
+    imagem = np.full((altura, largura), 255, np.uint8)
+    fonte = cv2.FONT_HERSHEY_SIMPLEX
+
+    def escreve(parte, y1, y2):
+        espessura = max(1, (y2 - y1) // 12)
+        (w, h), _ = cv2.getTextSize(parte, fonte, 1.0, espessura)
+        escala = min(0.9 * largura / w, 0.7 * (y2 - y1) / h)
+        (w, h), _ = cv2.getTextSize(parte, fonte, escala, espessura)
+        cv2.putText(imagem, parte, ((largura - w) // 2, y1 + (y2 - y1 + h) // 2), fonte, escala, 0,
+                    espessura, cv2.LINE_AA)
+
+    if duas_linhas:
+        escreve(texto[:3], 0, altura // 2)
+        escreve(texto[3:], altura // 2, altura)
+    else:
+        escreve(texto, 0, altura)
+    return imagem
+
+
+class LeitorOraculo:
+    """
+    Leitor de OCR para os testes, no formato do easyocr.Reader: acha a placa branca do recorte
+    e devolve a placa conhecida mais parecida (template matching). Placa cortada pela borda do
+    recorte sai incompleta e com confiança baixa, como o OCR faria
+    """
+
+    def __init__(self, placas):
+        self.placas = list(placas)
+
+    def readtext(self, imagem, detail=1):
+        cinza = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY) if imagem.ndim == 3 else imagem
+        _, mascara = cv2.threshold(cv2.GaussianBlur(cinza, (3, 3), 0), 170, 255, cv2.THRESH_BINARY)
+        contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contornos:
+            return []
+        x, y, w, h = cv2.boundingRect(max(contornos, key=cv2.contourArea))
+        if w < 12 or h < 6:
+            return []
+
+        placa = cinza[y:y + h, x:x + w]
+        duas_linhas = h / float(w) > 0.5
+        melhor, correlacao = None, -1.0
+        for texto in self.placas:
+            c = float(cv2.matchTemplate(placa, renderiza_placa(texto, w, h, duas_linhas), cv2.TM_CCOEFF_NORMED)[0][0])
+            if c > correlacao:
+                melhor, correlacao = texto, c
+        if melhor is None:
+            return []
+
+        bbox = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+        if x <= 1 or x + w >= cinza.shape[1] - 1:
+            return [(bbox, melhor[:4], 0.35)]
+        return [(bbox, melhor, max(0.0, min(1.0, correlacao)))]
+
+    def readtext_batched(self, imagens, n_width=None, n_height=None, batch_size=1, detail=1):
+        return [self.readtext(imagem) for imagem in imagens]
@@ -0,0 +1,83 @@
+from acompanhamento import Acompanhamento, AcompanhamentoPassadas
+from amostragem_adaptativa import AmostragemAdaptativa
+
+
+class AcompanhamentoRegistrado(Acompanhamento):
+    def __init__(self):
+        super().__init__()
+        self.inicios = []
+        self.progressos = []
+        self.deteccoes = []
+
+    def inicia(self, frames_previstos: int):
+        self.inicios.append(frames_previstos)
+
+    def progresso(self, frames_processados: int):
+        self.progressos.append(frames_processados)
+
+    def nova_deteccao(self, deteccao: dict):
+        self.deteccoes.append(deteccao)
+
+
+def test_passo_cai_pela_metade_ate_o_fino():
+    amostragem = AmostragemAdaptativa(passo_grosso=60, passo_fino=5, raio_refino=30)
+    passos = []
+    passo = amostragem.passo_grosso
+    while amostragem.proximo_passo(passo):
+        passo, raio = amostragem.proximo_passo(passo)
+        passos.append((passo, raio))
+    assert passos == [(30, 30), (15, 30), (7, 15), (5, 7)]
+
+
+def test_frames_refino_em_volta_dos_gatilhos():
+    amostragem = AmostragemAdaptativa(passo_grosso=60, passo_fino=5, raio_refino=30)
+    assert amostragem.frames_refino([120], 30, 30) == [90, 150]
+    # Múltiplos do passo grosso e frames já lidos ficam de fora
+    assert amostragem.frames_refino([120], 15, 30, lidos={105}) == [90, 135, 150]
+    # Limitados ao trecho da busca
+    assert amostragem.frames_refino([60], 15, 30, inicio=40, fim=80) == [45, 75]
+
+
+def test_parametros_fora_do_limite():
+    amostragem = AmostragemAdaptativa(passo_grosso=0, passo_fino=10, raio_refino=-3)
+    assert (amostragem.passo_grosso, amostragem.passo_fino, amostragem.raio_refino) == (1, 1, 0)
+
+
+def test_progresso_das_passadas_nunca_volta():
+    externo = AcompanhamentoRegistrado()
+    passadas = AcompanhamentoPassadas(externo)
+    passadas.inicia(10)
+    for frames in (4, 10):
+        passadas.progresso(frames)
+    passadas.inicia(6)
+    for frames in (3, 6):
+        passadas.progresso(frames)
+    passadas.nova_deteccao({'placa': 'ARG8N37'})
+
+    assert externo.inicios == [10]
+    assert externo.progressos == [4, 10, 13, 16]
+    assert externo.deteccoes == [{'placa': 'ARG8N37'}]
+    externo.cancela()
+    assert passadas.cancelado()
+
+
+def test_adaptativa_acha_as_placas_com_menos_frames(novo_detector, cenario):
+    placas = [moto['placa'] for moto in cenario['motos']]
+    fixa = novo_detector(modo_execucao='sequencial', tamanho_cache_ocr=0)
+    resultado_fixo = fixa.buscar_placas(placas, threshold=0.8, usar_indice=False, intervalo_frames=5)
+
+    adaptativa = novo_detector(modo_execucao='sequencial', tamanho_cache_ocr=0, amostragem_adaptativa=True,
+                               passo_grosso=30, passo_fino=5, raio_refino=30)
+    acompanhamento = AcompanhamentoRegistrado()
+    resultado = adaptativa.buscar_placas(placas, threshold=0.8, usar_indice=False, acompanhamento=acompanhamento)
+
+    assert resultado['placas_encontradas'] == resultado_fixo['placas_encontradas'] == placas
+    frames_fixos = resultado_fixo['estatisticas']['frames_processados']
+    frames_adaptativos = resultado['estatisticas']['frames_processados']
+    assert frames_adaptativos < frames_fixos
+    assert resultado['estatisticas']['amostragem']['frames_refinados'] > 0
+
+    # Um único inicia e progresso crescente ao longo de todas as passadas
+    assert len(acompanhamento.inicios) == 1
+    assert acompanhamento.progressos == sorted(acompanhamento.progressos)
+    assert acompanhamento.progressos[-1] == frames_adaptativos
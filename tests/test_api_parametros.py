@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize('rota', ['/api/buscar-placa', '/api/jobs', '/api/biblioteca/buscar'])
+@pytest.mark.parametrize('campo, valor', [
+    ('threshold', 'alto'),
+    ('threshold', 1.5),
+    ('intervalo_frames', 'x'),
+    ('fps_amostragem', [2]),
+    ('tamanho_lote', -1),
+    ('inicio', 'meio'),
+])
+def test_numero_malformado_responde_400_com_o_campo(app_teste, rota, campo, valor):
+    cliente = app_teste.app.test_client()
+    resposta = cliente.post(rota, json={'placa': 'TAT9G95', campo: valor})
+
+    assert resposta.status_code == 400
+    assert campo in resposta.get_json()['erro']
+
+
+def test_lista_de_placas_e_trecho_em_frames(app_teste):
+    cliente = app_teste.app.test_client()
+    resposta = cliente.post('/api/buscar-placas', json={'placas': ['TAT9G95'], 'unidade': 'frames', 'fim': 2.5})
+    assert resposta.status_code == 400
+    assert 'fim' in resposta.get_json()['erro']
+
+
+def test_corpo_que_nao_e_objeto_json_responde_400(app_teste):
+    cliente = app_teste.app.test_client()
+    assert cliente.post('/api/buscar-placa', data='placa=TAT9G95').status_code == 400
+    assert cliente.post('/api/jobs', json=['TAT9G95']).status_code == 400
+
+
+def test_biblioteca_ao_vivo_e_indice_validam_numeros(app_teste, video_sintetico, monkeypatch):
+    monkeypatch.setattr(app_teste, 'cameras_ao_vivo', {'entrada': video_sintetico})
+    monkeypatch.setattr(app_teste.detector, 'video_path', video_sintetico)
+    cliente = app_teste.app.test_client()
+    pedidos = [
+        ('/api/biblioteca', {'padrao': '*.mp4', 'prioridade': 'alta'}, 'prioridade'),
+        ('/api/ao-vivo', {'fonte': 'entrada', 'threshold': 'baixo'}, 'threshold'),
+        ('/api/indexar', {'fps_amostragem': 'rapido'}, 'fps_amostragem'),
+    ]
+    for rota, corpo, campo in pedidos:
+        resposta = cliente.post(rota, json=corpo)
+        assert resposta.status_code == 400
+        assert campo in resposta.get_json()['erro']
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import backends_deteccao
+from backends_deteccao import (BACKENDS_DETECCAO, TAMANHO_ENTRADA, BackendOnnx, cria_backend, letterbox,
+                               nome_backend, pos_processa)
+from benchmark_sintetico import BackendSintetico, backend_benchmark
+from placa_detector import PlacaDetector
+
+
+def test_backend_sintetico_so_existe_no_benchmark():
+    assert 'sintetico' not in BACKENDS_DETECCAO
+    with pytest.raises(ValueError):
+        cria_backend('sintetico')
+
+    assert backend_benchmark('sintetico') is BackendSintetico
+    assert backend_benchmark('onnx') == 'onnx'
+    # Injetado como classe, ele passa por cria_backend
+    assert isinstance(cria_backend(BackendSintetico), BackendSintetico)
+    assert nome_backend(BackendSintetico) == nome_backend('sintetico') == 'sintetico'
+
+
+def test_letterbox_mantem_a_proporcao():
+    entrada, escala, (esquerda, topo) = letterbox(np.zeros((360, 640, 3), np.uint8))
+    assert entrada.shape[:2] == (TAMANHO_ENTRADA, TAMANHO_ENTRADA)
+    assert (escala, esquerda, topo) == (1.0, 0, 140)
+    # Faixas de cinza em cima e embaixo
+    assert entrada[0, 0, 0] == entrada[-1, -1, 0] == 114 and entrada[320, 320, 0] == 0
+
+
+@pytest.mark.parametrize('nome, classe', [('ultralytics', 'BackendUltralytics'), ('onnx', 'BackendOnnx'),
+                                          ('onnx_int8', 'BackendOnnxInt8')])
+def test_cria_backend_pelo_nome(monkeypatch, nome, classe):
+    # Sem carregar pesos: cada classe é trocada por uma que só anota o arquivo pedido
+    criados = []
+    monkeypatch.setattr(backends_deteccao, classe, lambda arquivo=None: criados.append((classe, arquivo)))
+    cria_backend(nome, 'modelo.bin')
+    assert criados == [(classe, 'modelo.bin')]
+
+
+def test_backend_desconhecido(tmp_path, video_sintetico):
+    with pytest.raises(ValueError) as erro:
+        cria_backend('tensorrt')
+    assert 'tensorrt' in str(erro.value) and 'onnx_int8' in str(erro.value)
+
+    # O detector recusa o nome antes de tentar carregar qualquer modelo
+    with pytest.raises(ValueError):
+        PlacaDetector(video_sintetico, save_dir=str(tmp_path), index_dir=str(tmp_path / 'indices'),
+                      carregamento='sob_demanda', backend_deteccao='tensorrt')
+
+
+def test_modelo_padrao_de_cada_backend(tmp_path, video_sintetico):
+    for nome, arquivo in BACKENDS_DETECCAO.items():
+        detector = PlacaDetector(video_sintetico, save_dir=str(tmp_path), index_dir=str(tmp_path / 'indices'),
+                                 carregamento='sob_demanda', backend_deteccao=nome)
+        assert detector.modelo_deteccao == arquivo
+        assert detector.estado()['backend_deteccao'] == nome
+
+
+def saida_yolo(caixas: list, total=20) -> np.ndarray:
+    """Saída do YOLOv8 (84 x total) com as caixas (cx, cy, w, h, classe, confianca) pedidas"""
+    saida = np.zeros((84, total), np.float32)
+    for i, (cx, cy, w, h, classe, confianca) in enumerate(caixas):
+        saida[:4, i] = (cx, cy, w, h)
+        saida[4 + classe, i] = confianca
+    return saida
+
+
+def test_pos_processa_desfaz_o_letterbox_e_aplica_nms():
+    _, escala, deslocamento = letterbox(np.zeros((360, 640, 3), np.uint8))
+    saida = saida_yolo([(320, 320, 100, 60, 3, 0.9),
+                        (322, 321, 100, 60, 3, 0.6),   # quase a mesma caixa: some no NMS
+                        (100, 200, 40, 40, 0, 0.8),    # outra classe
+                        (500, 400, 40, 40, 3, 0.1)])   # abaixo da confiança mínima
+    deteccoes = pos_processa(saida, (escala, deslocamento, 640, 360))
+
+    assert sorted(deteccoes, key=lambda d: d[1]) == [((80, 40, 120, 80), 0, pytest.approx(0.8)),
+                                                      ((270, 150, 370, 210), 3, pytest.approx(0.9))]
+    assert pos_processa(saida_yolo([]), (escala, deslocamento, 640, 360)) == []
+
+
+class SessaoFalsa:
+    """Sessão do ONNX Runtime que devolve uma moto no centro de cada imagem do lote"""
+
+    def __init__(self):
+        self.lotes = []
+
+    def run(self, saidas, entradas):
+        tensor, = entradas.values()
+        self.lotes.append(len(tensor))
+        return [np.stack([saida_yolo([(320, 320, 100, 60, 3, 0.9)]) for _ in tensor])]
+
+
+@pytest.mark.parametrize('lote_fixo, lotes', [(None, [5]), (1, [1, 1, 1, 1, 1]), (2, [2, 2, 1])])
+def test_onnx_respeita_o_lote_do_modelo(lote_fixo, lotes):
+    backend = BackendOnnx.__new__(BackendOnnx)
+    backend.sessao, backend.nome_entrada = SessaoFalsa(), 'images'
+    backend.tamanho, backend.tamanho_dinamico, backend.lote_fixo = TAMANHO_ENTRADA, False, lote_fixo
+
+    deteccoes = backend.detecta([np.zeros((360, 640, 3), np.uint8)] * 5)
+
+    assert backend.sessao.lotes == lotes
+    assert deteccoes == [[((270, 150, 370, 210), 3, pytest.approx(0.9))]] * 5
+    assert backend.detecta([]) == []
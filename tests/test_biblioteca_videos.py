@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from biblioteca_videos import BibliotecaVideos, dentro_da_pasta
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    """Raiz da biblioteca com duas câmeras e uma pasta de fora com um vídeo"""
+    raiz = tmp_path / 'videos'
+    for camera in ('camera1', 'camera2'):
+        (raiz / camera).mkdir(parents=True)
+        (raiz / camera / 'clipe.mp4').write_bytes(b'0')
+    (raiz / 'camera1' / 'notas.txt').write_text('sem vídeo')
+    fora = tmp_path / 'fora'
+    fora.mkdir()
+    (fora / 'segredo.mp4').write_bytes(b'0')
+    return raiz, fora
+
+
+def test_dentro_da_pasta(tmp_path):
+    pasta = os.path.realpath(tmp_path / 'videos')
+    assert dentro_da_pasta(os.path.join(pasta, 'a.mp4'), pasta)
+    assert dentro_da_pasta(pasta, pasta)
+    # Mesmo prefixo, outra pasta
+    assert not dentro_da_pasta(pasta + '2', pasta)
+
+
+def test_padroes_relativos_e_absolutos_dentro_da_raiz(pastas):
+    raiz, _ = pastas
+    biblioteca = BibliotecaVideos(str(raiz))
+    assert biblioteca.registra('camera1') == 1
+    assert biblioteca.registra(str(raiz / '*' / '*.mp4')) == 2
+    assert biblioteca.normaliza('camera2/../camera1') == os.path.join(biblioteca.raiz, 'camera1')
+    # camera1/clipe.mp4 casa com os dois padrões e aparece uma vez só
+    assert sorted(video['camera'] for video in biblioteca.lista()) == ['camera1', 'camera2']
+
+
+@pytest.mark.parametrize('padrao', ['/etc', '../fora', 'camera1/../../fora/*.mp4', '/*/*.mp4', '~'])
+def test_padrao_fora_da_raiz(pastas, padrao):
+    raiz, _ = pastas
+    biblioteca = BibliotecaVideos(str(raiz))
+    with pytest.raises(ValueError):
+        biblioteca.registra(padrao)
+    assert biblioteca.fontes == []
+    assert biblioteca.remove(padrao) is False
+
+
+def test_link_simbolico_nao_escapa_da_raiz(pastas):
+    raiz, fora = pastas
+    os.symlink(fora, raiz / 'atalho')
+    os.symlink(fora / 'segredo.mp4', raiz / 'camera2' / 'segredo.mp4')
+    biblioteca = BibliotecaVideos(str(raiz))
+
+    # A parte fixa do padrão resolve para fora da raiz
+    with pytest.raises(ValueError):
+        biblioteca.registra('atalho')
+    # Curingas que passariam pelos links não trazem os vídeos de fora
+    biblioteca.registra('**/*.mp4')
+    caminhos = [video['caminho'] for video in biblioteca.lista()]
+    assert len(caminhos) == 2
+    assert not any('segredo' in caminho for caminho in caminhos)
+
+
+def test_raiz_que_e_link_simbolico(pastas, tmp_path):
+    raiz, _ = pastas
+    os.symlink(raiz, tmp_path / 'apelido')
+    biblioteca = BibliotecaVideos(str(tmp_path / 'apelido'))
+    assert biblioteca.raiz == os.path.realpath(raiz)
+    assert biblioteca.registra(str(raiz / 'camera1')) == 1
+
+
+def test_api_recusa_padrao_fora_da_raiz(app_teste):
+    cliente = app_teste.app.test_client()
+    for padrao in ('/etc', '../..', ''):
+        resposta = cliente.post('/api/biblioteca', json={'padrao': padrao})
+        assert resposta.status_code == 400
+        assert resposta.get_json()['sucesso'] is False
+    assert app_teste.biblioteca.fontes == []
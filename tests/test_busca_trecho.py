@@ -0,0 +1,65 @@
+import pytest
+
+from leitor_frames import LeitorFrames
+
+
+def placas_do_cenario(cenario) -> list:
+    return [moto['placa'] for moto in cenario['motos']]
+
+
+def test_leitor_mantem_a_numeracao_no_trecho(video_sintetico):
+    leitor = LeitorFrames(video_sintetico, 5, inicio=97, fim=121)
+    assert [frame_num for frame_num, _ in leitor] == [100, 105, 110, 115, 120]
+    assert leitor.frames_previstos() == 5
+
+
+def test_resolve_trecho(novo_detector):
+    detector = novo_detector()
+    assert detector.resolve_trecho() == (None, None)
+    assert detector.resolve_trecho(100, 200, 'frames') == (100, 200)
+    # Frame n aparece em (n - 1) / fps segundos (30 fps)
+    assert detector.resolve_trecho(1.0, 2.0) == (31, 61)
+    with pytest.raises(ValueError):
+        detector.resolve_trecho(200, 100, 'frames')
+    with pytest.raises(ValueError):
+        detector.resolve_trecho(1, 2, 'minutos')
+
+
+@pytest.mark.parametrize('modo', ['sequencial', 'pipeline', 'processos'])
+def test_busca_so_no_trecho(novo_detector, cenario, modo):
+    segunda = cenario['motos'][1]
+    detector = novo_detector(modo_execucao=modo, workers_processos=3)
+    resultado = detector.buscar_placas(placas_do_cenario(cenario), threshold=0.8, usar_indice=False,
+                                       intervalo_frames=5, inicio=segunda['inicio'], fim=segunda['fim'],
+                                       unidade='frames')
+
+    assert resultado['placas_encontradas'] == [segunda['placa']]
+    assert resultado['trecho'] == {'inicio_frame': segunda['inicio'], 'fim_frame': segunda['fim']}
+    deteccao = resultado['deteccoes_por_placa'][segunda['placa']][0]
+    assert segunda['inicio'] <= deteccao['primeiro_frame'] <= deteccao['ultimo_frame'] <= segunda['fim']
+
+
+def test_trecho_filtra_o_indice(novo_detector, cenario):
+    detector = novo_detector(modo_execucao='sequencial')
+    placas = placas_do_cenario(cenario)
+    completa = detector.buscar_placas(placas, threshold=0.8, intervalo_frames=5)
+    assert completa['origem'] == 'video'
+
+    terceira = cenario['motos'][2]
+    resultado = detector.buscar_placas(placas, threshold=0.8, intervalo_frames=5,
+                                       inicio=terceira['inicio'], fim=terceira['fim'], unidade='frames')
+    assert resultado['origem'] == 'indice'
+    assert resultado['placas_encontradas'] == [terceira['placa']]
+
+
+@pytest.mark.parametrize('modo', ['sequencial', 'pipeline', 'processos'])
+def test_primeiro_match(novo_detector, cenario, modo):
+    detector = novo_detector(modo_execucao=modo, workers_processos=3)
+    resultado = detector.buscar_placas(placas_do_cenario(cenario), threshold=0.8, usar_indice=False,
+                                       intervalo_frames=5, primeiro_match=True)
+
+    assert resultado['total_deteccoes'] == 1
+    assert resultado['placas_encontradas'] == [cenario['motos'][0]['placa']]
+    if modo != 'processos':
+        # Nos modos sequencial e pipeline a varredura para ali
+        assert resultado['estatisticas']['parou_no_frame'] < cenario['motos'][1]['inicio']
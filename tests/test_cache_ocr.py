@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+
+from cache_ocr import (BITS_BLOCO, DISTANCIA_MAXIMA, CacheOCR, blocos_hash, chave_perceptual, distancia_hamming,
+                       hash_perceptual)
+
+RESULTADOS = [([[0.1, 0.6], [0.9, 0.6], [0.9, 0.9], [0.1, 0.9]], 'ARG8N37', 0.93)]
+
+
+def recorte_moto(placa: str, semente=0, ruido=0.0):
+    """Recorte 200 x 150 de uma moto sintética com a placa, com ruído gaussiano opcional"""
+    imagem = np.full((200, 150, 3), 90, np.uint8)
+    cv2.rectangle(imagem, (15, 10), (135, 190), (160, 40, 170), -1)
+    cv2.rectangle(imagem, (25, 140), (125, 180), (255, 255, 255), -1)
+    cv2.putText(imagem, placa, (28, 168), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 0, 0), 2, cv2.LINE_AA)
+    if ruido:
+        gerador = np.random.default_rng(semente)
+        imagem = np.clip(imagem + gerador.normal(0, ruido, imagem.shape), 0, 255).astype(np.uint8)
+    return imagem
+
+
+def test_hash_tem_64_bits_e_blocos_cobrem_o_raio():
+    valor = hash_perceptual(recorte_moto('ARG8N37'))
+    assert 0 <= valor < 2 ** 64
+    blocos = blocos_hash(valor)
+    assert len(blocos) == DISTANCIA_MAXIMA + 1
+    # Dois hashes a até DISTANCIA_MAXIMA bits de distância têm pelo menos um bloco igual
+    vizinho = valor ^ sum(1 << (i * BITS_BLOCO) for i in range(DISTANCIA_MAXIMA))
+    assert distancia_hamming(valor, vizinho) == DISTANCIA_MAXIMA
+    assert any(a == b for a, b in zip(blocos, blocos_hash(vizinho)))
+
+
+def test_repeticao_com_ruido_acerta_e_outra_placa_falha():
+    cache = CacheOCR(tamanho_max=16)
+    cache.guarda(chave_perceptual(recorte_moto('ARG8N37', semente=0, ruido=4)), RESULTADOS)
+
+    for semente in range(1, 11):
+        assert cache.obtem(chave_perceptual(recorte_moto('ARG8N37', semente=semente, ruido=4))) == RESULTADOS
+    assert cache.obtem(chave_perceptual(recorte_moto('BAC3H89', semente=1, ruido=4))) is None
+    assert cache.contadores() == {'acertos': 10, 'acertos_disco': 0, 'falhas': 1}
+
+
+def test_enquadramento_diferente_nao_acerta():
+    cache = CacheOCR(tamanho_max=16)
+    recorte = recorte_moto('ARG8N37')
+    cache.guarda(chave_perceptual(recorte), RESULTADOS)
+    assert cache.obtem(chave_perceptual(cv2.resize(recorte, (300, 200)))) is None
+
+
+def test_lru_descarta_o_mais_antigo():
+    cache = CacheOCR(tamanho_max=2)
+    placas = ['ARG8N37', 'BAC3H89', 'UDA4H32']
+    for placa in placas:
+        cache.guarda(chave_perceptual(recorte_moto(placa)), [([[0, 0], [1, 0], [1, 1], [0, 1]], placa, 0.9)])
+
+    assert cache.obtem(chave_perceptual(recorte_moto('ARG8N37'))) is None
+    assert cache.obtem(chave_perceptual(recorte_moto('UDA4H32')))[0][1] == 'UDA4H32'
+    # Os baldes da entrada descartada também saem
+    assert all(len(ids) <= 2 for ids in cache.baldes.values())
+
+
+def test_acerto_no_disco_entre_execucoes(tmp_path):
+    arquivo = str(tmp_path / 'cache.sqlite')
+    cache = CacheOCR(tamanho_max=16, arquivo=arquivo)
+    cache.guarda(chave_perceptual(recorte_moto('ARG8N37', semente=0, ruido=4)), RESULTADOS)
+    cache.fecha()
+
+    reaberto = CacheOCR(tamanho_max=16, arquivo=arquivo)
+    resultados = reaberto.obtem(chave_perceptual(recorte_moto('ARG8N37', semente=5, ruido=4)))
+    assert [tuple(r) for r in resultados] == [tuple(r) for r in RESULTADOS]
+    assert reaberto.contadores()['acertos_disco'] == 1
+    reaberto.fecha()
+
+
+def test_segunda_varredura_sai_do_cache(novo_detector):
+    detector = novo_detector(modo_execucao='sequencial')
+    detector.varre_video(None, intervalo=5)
+    antes = detector.metricas.instantaneo()
+    _, _, estatisticas = detector.varre_video(None, intervalo=5)
+
+    assert detector.metricas.diferenca(antes)['contadores'].get('recortes_ocr', 0) == 0
+    assert estatisticas['cache_ocr']['acertos'] == estatisticas['rastreamento']['ocr_executados']
+
+
+def test_arquivo_guarda_so_as_linhas_mais_novas(tmp_path):
+    arquivo = str(tmp_path / 'cache.sqlite')
+    cache = CacheOCR(tamanho_max=1, arquivo=arquivo, max_linhas_disco=2)
+    placas = ['ARG8N37', 'BAC3H89', 'UDA4H32']
+    for placa in placas:
+        cache.guarda(chave_perceptual(recorte_moto(placa)), [([[0, 0], [1, 0], [1, 1], [0, 1]], placa, 0.9)])
+    assert cache._conexao.execute("SELECT COUNT(*) FROM ocr_perceptual").fetchone()[0] == 2
+    cache.fecha()
+
+    reaberto = CacheOCR(tamanho_max=16, arquivo=arquivo, max_linhas_disco=2)
+    assert reaberto.obtem(chave_perceptual(recorte_moto('ARG8N37'))) is None
+    assert reaberto.obtem(chave_perceptual(recorte_moto('BAC3H89')))[0][1] == 'BAC3H89'
+    assert reaberto.obtem(chave_perceptual(recorte_moto('UDA4H32')))[0][1] == 'UDA4H32'
+    reaberto.fecha()
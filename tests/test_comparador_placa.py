@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from comparador_placa import (CUSTO_CONFUSAO, CUSTO_CONFUSAO_FORTE, CUSTO_EDICAO, FORMATO_PLACA, ComparadorPlaca,
+                              custo_substituicao, limpa_texto)
+
+
+def distancia_referencia(texto: str, variacao: str) -> float:
+    """Distância de edição ponderada calculada célula a célula, para conferir a versão vetorizada"""
+    formato = FORMATO_PLACA if len(variacao) == len(FORMATO_PLACA) else 'X' * len(variacao)
+    anterior = [j * CUSTO_EDICAO for j in range(len(variacao) + 1)]
+    for i, char in enumerate(texto, 1):
+        atual = [i * CUSTO_EDICAO]
+        for j, alvo in enumerate(variacao, 1):
+            atual.append(min(anterior[j] + CUSTO_EDICAO, atual[j - 1] + CUSTO_EDICAO,
+                             anterior[j - 1] + custo_substituicao(char, alvo, formato[j - 1])))
+        anterior = atual
+    return anterior[-1]
+
+
+def test_limpa_texto():
+    assert limpa_texto(' tat-9g95 ') == 'TAT9G95'
+
+
+def test_custos_de_substituicao():
+    assert custo_substituicao('A', 'A', 'L') == 0.0
+    assert custo_substituicao('K', 'A', 'L') == CUSTO_EDICAO
+    # Dígito onde só cabe letra: quase certamente erro de leitura
+    assert custo_substituicao('0', 'O', 'L') == CUSTO_CONFUSAO_FORTE
+    # Posição que aceita letra ou dígito: a troca é plausível, mas custa mais
+    assert custo_substituicao('0', 'O', 'X') == CUSTO_CONFUSAO
+
+
+def test_match_exato_e_confusao():
+    comparador = ComparadorPlaca(['TAT9G95'], threshold=0.9)
+    assert comparador.compara('tat 9g95') == (True, 1.0, 'TAT9G95')
+
+    e_match, similaridade, variacao = comparador.compara('TA79G95')
+    assert e_match and variacao == 'TAT9G95'
+    assert similaridade == pytest.approx(1 - CUSTO_CONFUSAO_FORTE / 7)
+
+    assert comparador.compara('KKK1K11')[0] is False
+
+
+def test_threshold_e_lote_vazio():
+    comparador = ComparadorPlaca(['TAT9G95'], threshold=1 - 1.0 / 7)
+    assert comparador.compara('TAT9G9')[0]
+    assert not comparador.compara('TAT9')[0]
+    assert comparador.compara_lote([]) == []
+    assert ComparadorPlaca([]).compara('TAT9G95') == (False, 0.0, 'TAT9G95')
+
+
+def test_distancias_vetorizadas_iguais_a_referencia():
+    aleatorio = random.Random(3)
+    alfabeto = 'ABCDGOQ0123568TZS'
+    variacoes = ['TAT9G95', 'ABC1D23', 'OQ0', 'GGG6G66']
+    textos = [''.join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(1, 9))) for _ in range(60)]
+
+    distancias = ComparadorPlaca(variacoes).distancias(textos)
+    for b, texto in enumerate(textos):
+        for r, variacao in enumerate(variacoes):
+            assert distancias[b, r] == pytest.approx(distancia_referencia(texto, variacao))
+
+
+def test_refs_restringe_as_variacoes():
+    comparador = ComparadorPlaca(['TAT9G95', 'ABC1D23'])
+    todas = comparador.similaridades(['ABC1D23'])
+    so_segunda = comparador.similaridades(['ABC1D23'], refs=[1])
+    assert so_segunda.shape == (1, 1)
+    assert so_segunda[0, 0] == todas[0, 1] == 1.0
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from controle_admissao import ControleAdmissao, Sobrecarga
+
+
+def test_fila_cheia_recusa_na_hora():
+    admissao = ControleAdmissao(max_simultaneas=1, max_fila=0)
+    with admissao.vaga():
+        with pytest.raises(Sobrecarga) as erro:
+            with admissao.vaga():
+                pass
+    assert erro.value.retry_after >= 1
+    assert admissao.estado()['recusadas'] == 1
+    assert admissao.estado()['executando'] == 0
+
+
+def test_espera_na_fila_ate_abrir_vaga():
+    admissao = ControleAdmissao(max_simultaneas=1, max_fila=1, espera_max_s=5)
+    ocupada = threading.Event()
+    liberar = threading.Event()
+
+    def ocupa():
+        with admissao.vaga():
+            ocupada.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=ocupa)
+    thread.start()
+    ocupada.wait(5)
+    threading.Timer(0.2, liberar.set).start()
+    with admissao.vaga():
+        assert admissao.estado()['executando'] == 1
+    thread.join()
+    assert admissao.estado()['aceitas'] == 2
+
+
+def test_espera_longa_demais_vira_sobrecarga():
+    admissao = ControleAdmissao(max_simultaneas=1, max_fila=4, espera_max_s=0.1)
+    with admissao.vaga():
+        with pytest.raises(Sobrecarga):
+            with admissao.vaga():
+                pass
+    assert admissao.estado()['na_fila'] == 0
+
+
+def test_api_responde_429_com_retry_after(app_teste):
+    cliente = app_teste.app.test_client()
+    app_teste.admissao.ocupa()
+    try:
+        resposta = cliente.post('/api/buscar-placa', json={'placa': 'TAT9G95'})
+    finally:
+        app_teste.admissao.libera()
+
+    assert resposta.status_code == 429
+    assert int(resposta.headers['Retry-After']) >= 1
+    assert resposta.get_json()['sucesso'] is False
+    assert cliente.get('/api/status').get_json()['admissao']['recusadas'] >= 1
+
+
+def test_busca_com_varias_vagas_espera_todas():
+    admissao = ControleAdmissao(max_simultaneas=2, max_fila=0, espera_max_s=5)
+    assert admissao.vagas_para(8) == 2
+    liberar = threading.Event()
+    ocupada = threading.Event()
+
+    def ocupa():
+        with admissao.vaga():
+            ocupada.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=ocupa)
+    thread.start()
+    ocupada.wait(5)
+    # Uma vaga livre não basta: sem fila, a busca de duas vagas é recusada na hora
+    with pytest.raises(Sobrecarga):
+        with admissao.vaga(vagas=2):
+            pass
+    # Pela fila dos jobs ela espera a outra vaga abrir
+    threading.Timer(0.2, liberar.set).start()
+    with admissao.vaga(limitar_fila=False, vagas=2):
+        assert admissao.estado()['executando'] == 2
+    thread.join()
+    assert admissao.estado()['executando'] == 0
+
+
+def test_biblioteca_ocupa_uma_vaga_por_video(app_teste, monkeypatch):
+    # A vaga é reservada antes de listar a biblioteca, então a biblioteca vazia basta
+    monkeypatch.setattr(app_teste, 'admissao', ControleAdmissao(max_simultaneas=3, max_fila=0))
+    monkeypatch.setattr(app_teste.busca_biblioteca, 'max_videos_simultaneos', 2)
+    vistos = []
+    monkeypatch.setattr(app_teste.busca_biblioteca, 'executa',
+                        lambda *args, **kwargs: vistos.append(app_teste.admissao.estado()['executando']))
+    monkeypatch.setattr(app_teste, 'formata_resultado_biblioteca', lambda resultado, inline=False: {})
+    cliente = app_teste.app.test_client()
+
+    app_teste.admissao.ocupa()
+    app_teste.admissao.ocupa()
+    # Sobrou uma vaga, mas a busca roda dois vídeos de cada vez
+    assert cliente.post('/api/biblioteca/buscar', json={'placa': 'TAT9G95'}).status_code == 429
+    app_teste.admissao.libera()
+    assert cliente.post('/api/biblioteca/buscar', json={'placa': 'TAT9G95'}).status_code == 200
+    assert vistos == [3]
+    app_teste.admissao.libera()
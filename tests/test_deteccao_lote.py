@@ -0,0 +1,49 @@
+import pytest
+
+from leitor_frames import LeitorFrames
+
+
+def conta_chamadas(detector) -> list:
+    """Troca detecta() do backend por uma versão que anota o tamanho de cada lote"""
+    modelo = detector.model
+    lotes = []
+    detecta = modelo.detecta
+
+    def detecta_contando(frames, tamanho=None):
+        lotes.append(len(frames))
+        return detecta(frames, tamanho)
+
+    modelo.detecta = detecta_contando
+    return lotes
+
+
+def test_lote_da_as_mesmas_motos_que_frame_a_frame(novo_detector, video_sintetico):
+    detector = novo_detector()
+    lotes = conta_chamadas(detector)
+    frames = [frame for _, frame in LeitorFrames(video_sintetico, 10)]
+
+    em_lote = []
+    for i in range(0, len(frames), 8):
+        em_lote.extend(detector.detecta_motos_lote(frames[i:i + 8]))
+    uma_por_vez = [detector.detecta_motos_lote([frame])[0] for frame in frames]
+
+    assert em_lote == uma_por_vez
+    assert sum(len(motos) for motos in em_lote) > 0
+    assert lotes[:len(frames) // 8] == [8] * (len(frames) // 8)
+    assert detector.detecta_motos_lote([]) == []
+
+
+@pytest.mark.parametrize('modo', ['sequencial', 'pipeline'])
+def test_tamanho_do_lote_nao_muda_as_leituras(novo_detector, modo):
+    resultados = {}
+    for tamanho_lote in (1, 8):
+        detector = novo_detector(modo_execucao=modo, tamanho_cache_ocr=0)
+        lotes = conta_chamadas(detector)
+        leituras, _, estatisticas = detector.varre_video(None, intervalo=10, tamanho_lote=tamanho_lote)
+        resultados[tamanho_lote] = [(leitura['frame'], list(leitura['box']), leitura.get('trilha'))
+                                    for leitura in leituras]
+        assert estatisticas['tamanho_lote'] == tamanho_lote
+        assert max(lotes) == tamanho_lote
+        assert sum(lotes) == estatisticas['frames_processados']
+
+    assert resultados[1] and resultados[8] == resultados[1]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from filtro_movimento import FiltroMovimento, junta_resumos
+from leitor_frames import LeitorFrames
+
+
+def frame_com_quadrado(x: int, tamanho=60):
+    frame = np.full((360, 640, 3), 40, np.uint8)
+    frame[100:100 + tamanho, x:x + tamanho] = 220
+    return frame
+
+
+def test_frame_parado_e_pulado_e_mudanca_grande_passa():
+    filtro = FiltroMovimento(limiar=0.02)
+    assert filtro.mudou(frame_com_quadrado(100))
+    assert not filtro.mudou(frame_com_quadrado(100))
+    # Ruído leve não conta como mudança
+    ruido = np.random.default_rng(0).integers(-5, 6, (360, 640, 3))
+    assert not filtro.mudou(np.clip(frame_com_quadrado(100) + ruido, 0, 255).astype(np.uint8))
+    assert filtro.mudou(frame_com_quadrado(300))
+    assert filtro.resumo() == {'limiar': 0.02, 'frames_processados': 2, 'frames_pulados': 2, 'fracao_pulada': 0.5}
+
+
+def test_mudanca_lenta_compara_com_o_ultimo_processado():
+    filtro = FiltroMovimento(limiar=0.02)
+    filtro.mudou(frame_com_quadrado(100))
+    # Cada passo é pequeno, mas a diferença para a referência vai crescendo
+    resultados = [filtro.mudou(frame_com_quadrado(100 + 2 * passo)) for passo in range(1, 15)]
+    assert not resultados[0]
+    assert any(resultados)
+
+
+def test_max_pulados_forca_inferencia():
+    filtro = FiltroMovimento(max_pulados=3)
+    frame = frame_com_quadrado(100)
+    assert [filtro.mudou(frame) for _ in range(9)] == [True, False, False, False, True, False, False, False, True]
+
+
+def test_junta_resumos():
+    resumos = [{'limiar': 0.02, 'frames_processados': 3, 'frames_pulados': 1},
+               {'limiar': 0.02, 'frames_processados': 1, 'frames_pulados': 3}]
+    assert junta_resumos(resumos) == {'limiar': 0.02, 'frames_processados': 4, 'frames_pulados': 4,
+                                      'fracao_pulada': 0.5}
+    assert junta_resumos([])['fracao_pulada'] == 0.0
+
+
+def test_frames_parados_nao_vao_para_o_yolo(novo_detector):
+    detector = novo_detector(limiar_movimento=0.02)
+    lotes = []
+    detecta = detector.model.detecta
+
+    def detecta_contando(frames, tamanho=None):
+        lotes.append(len(frames))
+        return detecta(frames, tamanho)
+
+    detector.model.detecta = detecta_contando
+    parado, andou = frame_com_quadrado(100), frame_com_quadrado(400)
+
+    motos = detector.detecta_motos_filtrado(detector.novo_filtro_movimento(), [parado, parado.copy(), andou])
+    assert motos[0] == [] and motos[1] is None and motos[2] == []
+    assert lotes == [2]
+
+    # Frame parado copia as leituras do anterior com o próprio número
+    anteriores = [{'frame': 10, 'box': [1, 2, 3, 4], 'ocr': []}]
+    assert detector.reaproveita_leituras(anteriores, 15) == [{'frame': 15, 'box': [1, 2, 3, 4], 'ocr': []}]
+
+
+def test_varredura_com_filtro_acha_as_mesmas_placas(novo_detector, cenario, video_sintetico):
+    placas = [moto['placa'] for moto in cenario['motos']]
+    encontradas = {}
+    for limiar in (None, 0.02):
+        detector = novo_detector(limiar_movimento=limiar, tamanho_cache_ocr=0)
+        resultado = detector.buscar_placas(placas, threshold=0.8, usar_indice=False, intervalo_frames=5)
+        encontradas[limiar] = {placa for placa, deteccoes in resultado['deteccoes_por_placa'].items() if deteccoes}
+        if limiar is not None:
+            movimento = resultado['estatisticas']['movimento']
+
+    assert encontradas[0.02] == encontradas[None] == set(placas)
+    # Os trechos sem moto do cenário são pulados
+    assert movimento['frames_pulados'] > 0
+    total = LeitorFrames(video_sintetico, 5).frames_previstos()
+    assert movimento['frames_processados'] + movimento['frames_pulados'] == total
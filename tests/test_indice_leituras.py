@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from indice_leituras import IndiceLeituras
+
+LEITURAS = [{'frame': 5, 'box': [0, 0, 10, 10], 'ocr': []}]
+
+
+def video_falso(tmp_path, nome='clipe.mp4', conteudo=b'video'):
+    caminho = tmp_path / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def test_parametros_diferentes_convivem(tmp_path):
+    video = video_falso(tmp_path)
+    indice = IndiceLeituras(str(tmp_path / 'indices'))
+    indice.salva(video, LEITURAS, {'intervalo_frames': 5}, 10)
+    indice.salva(video, LEITURAS * 2, {'intervalo_frames': 15}, 4)
+
+    assert indice.carrega(video, {'intervalo_frames': 5})['total_leituras'] == 1
+    assert indice.carrega(video, {'intervalo_frames': 15})['total_leituras'] == 2
+    assert indice.carrega(video, {'intervalo_frames': 30}) is None
+    assert indice.caminho_indice(video, {'a': 1, 'b': 2}) == indice.caminho_indice(video, {'b': 2, 'a': 1})
+
+
+def test_gravacoes_simultaneas_do_mesmo_indice(tmp_path):
+    video = video_falso(tmp_path)
+    indice = IndiceLeituras(str(tmp_path / 'indices'))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        caminhos = set(executor.map(lambda _: indice.salva(video, LEITURAS, {'intervalo_frames': 5}, 10), range(32)))
+
+    assert len(caminhos) == 1
+    assert not [nome for nome in os.listdir(tmp_path / 'indices') if nome.endswith('.tmp')]
+    assert indice.carrega(video, {'intervalo_frames': 5}) is not None
+
+
+def test_indices_em_memoria_sao_limitados(tmp_path):
+    indice = IndiceLeituras(str(tmp_path / 'indices'), max_carregados=2)
+    videos = [video_falso(tmp_path, f'clipe{i}.mp4', bytes([i])) for i in range(4)]
+    for video in videos:
+        indice.salva(video, LEITURAS, {'intervalo_frames': 5}, 10)
+        assert indice.carrega(video, {'intervalo_frames': 5}) is not None
+
+    assert list(indice._carregados) == [indice.caminho_indice(v, {'intervalo_frames': 5}) for v in videos[2:]]
+
+
+def test_confirmacao_entra_nos_parametros(novo_detector):
+    padrao = novo_detector().parametros_indice(5)
+    assert novo_detector(confianca_confirmacao=0.9).parametros_indice(5) != padrao
+    assert novo_detector(max_candidatos_placa=2).parametros_indice(5) != padrao
+    # Sem rastreamento nenhuma das duas muda as leituras
+    assert (novo_detector(rastrear_motos=False, confianca_confirmacao=0.9).parametros_indice(5)
+            == novo_detector(rastrear_motos=False).parametros_indice(5))
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from benchmark_sintetico import BackendSintetico
+from oraculo_ocr import LeitorOraculo
+from placa_detector import PlacaDetector
+
+
+class BackendLento(BackendSintetico):
+    """Só termina de carregar quando o teste libera"""
+
+    liberar = threading.Event()
+
+    def __init__(self, arquivo=None):
+        super().__init__(arquivo)
+        self.liberar.wait(5)
+
+
+class BackendQuebrado(BackendSintetico):
+    def __init__(self, arquivo=None):
+        raise RuntimeError('pesos corrompidos')
+
+
+def cria_detector(video_sintetico, tmp_path, backend, carregamento):
+    return PlacaDetector(video_sintetico, save_dir=str(tmp_path / 'prints'), index_dir=str(tmp_path / 'indices'),
+                         carregamento=carregamento, backend_deteccao=backend,
+                         leitor_ocr=lambda: LeitorOraculo(['TAT9G95']))
+
+
+def test_sob_demanda_carrega_no_primeiro_uso(video_sintetico, tmp_path):
+    detector = cria_detector(video_sintetico, tmp_path, BackendSintetico, 'sob_demanda')
+    assert detector.estado()['estado'] == 'nao_carregado' and not detector.estado()['pronto']
+
+    assert detector.model is not None
+    estado = detector.estado()
+    assert estado['estado'] == 'pronto' and estado['pronto'] and estado['erro'] is None
+    assert set(estado['tempos']) == {'carregamento_s', 'aquecimento_s'}
+
+
+def test_segundo_plano_passa_por_carregando(video_sintetico, tmp_path):
+    BackendLento.liberar.clear()
+    detector = cria_detector(video_sintetico, tmp_path, BackendLento, 'sob_demanda')
+    thread = detector.inicia_carregamento()
+    try:
+        for _ in range(100):
+            if detector.estado()['estado'] == 'carregando':
+                break
+            time.sleep(0.01)
+        assert detector.estado()['estado'] == 'carregando' and not detector.estado()['pronto']
+    finally:
+        BackendLento.liberar.set()
+    thread.join(5)
+    assert detector.estado()['estado'] == 'pronto'
+
+
+def test_erro_no_carregamento_fica_no_estado(video_sintetico, tmp_path):
+    detector = cria_detector(video_sintetico, tmp_path, BackendQuebrado, 'sob_demanda')
+    # Em segundo plano o erro não derruba a thread: fica registrado no estado
+    detector.inicia_carregamento().join(5)
+    assert detector.estado()['estado'] == 'erro'
+    assert 'pesos corrompidos' in detector.estado()['erro']
+    with pytest.raises(RuntimeError):
+        detector.model
+
+
+def test_api_status_mostra_o_estado_dos_modelos(app_teste, video_sintetico, tmp_path, monkeypatch):
+    cliente = app_teste.app.test_client()
+    for backend, esperado, carregado in ((BackendSintetico, 'nao_carregado', False),
+                                         (BackendQuebrado, 'erro', False),
+                                         (BackendSintetico, 'pronto', True)):
+        detector = cria_detector(video_sintetico, tmp_path, backend, 'sob_demanda')
+        if esperado != 'nao_carregado':
+            detector.inicia_carregamento().join(5)
+        monkeypatch.setattr(app_teste, 'detector', detector)
+
+        status = cliente.get('/api/status').get_json()
+        assert status['modelos']['estado'] == esperado
+        assert status['modelo_carregado'] is carregado
+        assert status['modelos']['backend_deteccao'] == 'sintetico'
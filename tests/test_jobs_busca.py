@@ -0,0 +1,55 @@
+import threading
+
+from controle_admissao import ControleAdmissao
+from jobs_busca import GerenciadorJobs, JobBusca
+
+
+def espera_fim(job, timeout=60.0):
+    posicao = 0
+    while not job.finalizado():
+        posicao += len(job.eventos_desde(posicao, timeout))
+    return job
+
+
+def test_fim_e_publicado_junto_com_o_status():
+    job = JobBusca('TAT9G95', {})
+    assert job.comeca()
+    assert not job.comeca()
+    job.finaliza('concluido')
+    job.finaliza('erro')
+    job.finaliza('cancelado', se_status='na_fila')
+
+    assert job.status == 'concluido'
+    assert [evento['tipo'] for evento in job.eventos] == ['fim']
+    assert job.eventos[-1]['dados']['status'] == 'concluido'
+
+
+def test_cancelado_na_fila_nem_ocupa_vaga():
+    admissao = ControleAdmissao(max_simultaneas=1, max_fila=0)
+    jobs = GerenciadorJobs(None, max_simultaneos=1, admissao=admissao)
+    liberar = threading.Event()
+    rodou = []
+
+    primeiro = jobs.submete('TAT9G95', executa=lambda job: liberar.wait(10))
+    segundo = jobs.submete('ABC1D23', executa=lambda job: rodou.append(job))
+    assert jobs.cancela(segundo.id).status == 'cancelado'
+    liberar.set()
+    espera_fim(primeiro)
+    jobs.executor.shutdown(wait=True)
+
+    assert primeiro.status == 'concluido'
+    assert rodou == []
+    assert [evento['tipo'] for evento in segundo.eventos] == ['fim']
+    assert admissao.estado()['aceitas'] == 1
+
+
+def test_job_de_busca_publica_deteccoes_e_fim(novo_detector, cenario):
+    placa = cenario['motos'][0]['placa']
+    jobs = GerenciadorJobs(novo_detector(modo_execucao='sequencial'), admissao=ControleAdmissao(1, 0))
+    job = espera_fim(jobs.submete(placa, threshold=0.8, intervalo_frames=5))
+
+    tipos = [evento['tipo'] for evento in job.eventos]
+    assert job.status == 'concluido'
+    assert tipos[-1] == 'fim' and tipos.count('fim') == 1
+    assert 'deteccao' in tipos
+    assert job.frames_processados == job.frames_previstos > 0
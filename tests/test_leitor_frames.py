@@ -0,0 +1,59 @@
+import hashlib
+
+import cv2
+import pytest
+
+from leitor_frames import LeitorFrames, agrupa_em_lotes, calcula_intervalo
+
+
+@pytest.fixture(scope='module')
+def decodificados(video_sintetico):
+    """Hash de cada frame lido em sequência com read(), numerado a partir de 1"""
+    cap = cv2.VideoCapture(video_sintetico)
+    hashes = {}
+    ret, frame = cap.read()
+    while ret:
+        hashes[len(hashes) + 1] = hashlib.sha1(frame.tobytes()).hexdigest()
+        ret, frame = cap.read()
+    cap.release()
+    return hashes
+
+
+def test_calcula_intervalo():
+    assert calcula_intervalo(30.0) == 15
+    assert calcula_intervalo(30.0, intervalo_frames=4) == 4
+    # fps_amostragem tem prioridade; sem FPS no container assume 30
+    assert calcula_intervalo(30.0, intervalo_frames=4, fps_amostragem=2) == 15
+    assert calcula_intervalo(0, fps_amostragem=3) == 10
+    assert calcula_intervalo(30.0, fps_amostragem=100) == 1
+
+
+def test_agrupa_em_lotes():
+    assert [len(lote) for lote in agrupa_em_lotes(range(10), 4)] == [4, 4, 2]
+    assert list(agrupa_em_lotes([], 4)) == []
+
+
+@pytest.mark.parametrize('intervalo, limiar_seek', [(1, None), (7, None), (45, 30), (150, 2)])
+def test_grab_e_seek_entregam_os_frames_da_leitura_sequencial(video_sintetico, decodificados, intervalo, limiar_seek):
+    leitor = LeitorFrames(video_sintetico, intervalo, limiar_seek=limiar_seek)
+    entregues = {frame_num: hashlib.sha1(frame.tobytes()).hexdigest() for frame_num, frame in leitor}
+
+    esperados = [frame_num for frame_num in decodificados if frame_num % intervalo == 0]
+    assert list(entregues) == esperados
+    assert entregues == {frame_num: decodificados[frame_num] for frame_num in esperados}
+    assert leitor.frames_entregues == leitor.frames_previstos() == len(esperados)
+    if limiar_seek is None:
+        # Só com grab() todos os frames passam pelo decoder
+        assert leitor.frames_lidos == len(decodificados)
+    else:
+        assert leitor.frames_lidos < esperados[-1]
+
+
+def test_lista_de_frames_escolhidos(video_sintetico, decodificados):
+    frames = [3, 3, 200, 40, 599]
+    leitor = LeitorFrames(video_sintetico, limiar_seek=50, frames=frames)
+    entregues = {frame_num: hashlib.sha1(frame.tobytes()).hexdigest() for frame_num, frame in leitor}
+
+    assert list(entregues) == [3, 40, 200, 599]
+    assert entregues == {frame_num: decodificados[frame_num] for frame_num in entregues}
+    assert leitor.frames_previstos() == 4
@@ -0,0 +1,53 @@
+import os
+import time
+
+import placa_detector
+from monitor_ao_vivo import MonitorAoVivo
+
+
+def arquivo_antigo(pasta, nome='antiga.jpg', idade=7200):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, nome)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(b'0')
+    antigo = time.time() - idade
+    os.utime(caminho, (antigo, antigo))
+    os.utime(pasta, (antigo, antigo))
+    return caminho
+
+
+def espera(condicao, timeout=30.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, 'condição não foi atingida a tempo'
+        time.sleep(0.05)
+
+
+def test_limpeza_apaga_vencidas_e_pastas_vazias(novo_detector):
+    detector = novo_detector()
+    velha = arquivo_antigo(os.path.join(detector.save_dir, 'ao_vivo_parado'))
+    recente = os.path.join(detector.save_dir, 'recente.jpg')
+    open(recente, 'wb').close()
+
+    detector.limpa_saidas_antigas(forcar=True)
+    assert not os.path.exists(velha)
+    assert not os.path.exists(os.path.dirname(velha))
+    assert os.path.exists(recente)
+
+
+def test_limpeza_periodica_sem_buscas(novo_detector, monkeypatch):
+    monkeypatch.setattr(placa_detector, 'INTERVALO_LIMPEZA_S', 0.05)
+    detector = novo_detector()
+    velha = arquivo_antigo(os.path.join(detector.save_dir, 'busca_antiga'))
+    detector.inicia_limpeza_periodica()
+    espera(lambda: not os.path.exists(velha))
+
+
+def test_alerta_ao_vivo_tambem_limpa(novo_detector, cenario, video_sintetico):
+    detector = novo_detector()
+    velha = arquivo_antigo(os.path.join(detector.save_dir, 'busca_antiga'))
+    # O monitor não passa por executa_busca: quem limpa é o alerta
+    monitor = MonitorAoVivo(detector, video_sintetico, [cenario['motos'][0]['placa']], repetir=False).inicia()
+    espera(lambda: monitor.total_alertas)
+    monitor.para()
+    assert not os.path.exists(velha)
@@ -0,0 +1,59 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from benchmark_comparador import placas_aleatorias, textos_sinteticos
+from lista_placas import ListaPlacas
+
+
+def test_compara_lote_conta_so_a_chamada():
+    lista = ListaPlacas({'TAT9G95': ['TAT9G95'], 'ABC1D23': ['ABC1D23']}, threshold=0.8)
+    resultados, comparacoes = lista.compara_lote(['TAT9G95', '', 'XYZ'])
+    assert resultados[0] == [('TAT9G95', 1.0, 'TAT9G95')]
+    assert resultados[1:] == [[], []]
+    assert comparacoes >= 1
+    assert lista.compara_lote(['TAT9G95'])[1] == lista.compara_lote(['TAT9G95'])[1]
+    assert lista.compara_lote([]) == ([], 0)
+
+
+def test_buscas_simultaneas_nao_somam_comparacoes(novo_detector, cenario):
+    placas = [moto['placa'] for moto in cenario['motos']]
+    detector = novo_detector(modo_execucao='sequencial')
+    referencia = detector.buscar_placas(placas, threshold=0.8, intervalo_frames=5)['estatisticas']['comparacoes']
+    assert referencia > 0
+
+    # Pelo índice: oito buscas ao mesmo tempo com o mesmo comparador compartilhado
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(
+            lambda _: detector.buscar_placas(placas, threshold=0.8, intervalo_frames=5), range(8)))
+    assert all(r['origem'] == 'indice' for r in resultados)
+    assert [r['estatisticas']['comparacoes'] for r in resultados] == [referencia] * 8
+    assert len(detector._comparadores) == 1
+
+
+@pytest.mark.parametrize('semente, threshold', [(7, 0.8), (11, 0.7), (13, 0.9)])
+def test_indice_de_ngramas_acha_o_mesmo_que_todas_as_variacoes(novo_detector, semente, threshold):
+    detector = novo_detector()
+    placas = placas_aleatorias(200, semente)
+    lista = ListaPlacas({placa: detector.gera_variacoes_placa(placa) for placa in placas}, threshold)
+    aleatorio = random.Random(semente)
+    textos = []
+    for i in range(20):
+        textos.extend(textos_sinteticos(aleatorio.choice(placas), 40, semente * 100 + i))
+
+    resultados, _ = lista.compara_lote(textos)
+
+    # Referência: a mesma distância contra todas as variações de todas as placas
+    similaridades = lista.comparador.similaridades(textos)
+    for b, texto in enumerate(textos):
+        esperado = {}
+        if texto in lista.exatas:
+            esperado = {placa: 1.0 for placa in lista.donos[lista.exatas[texto]]}
+        for r in np.flatnonzero(similaridades[b] >= threshold):
+            for placa in lista.donos[r]:
+                esperado[placa] = max(esperado.get(placa, 0.0), float(similaridades[b, r]))
+        obtido = {placa: similaridade for placa, similaridade, _ in resultados[b]}
+        assert obtido == pytest.approx(esperado), texto
+    assert sum(map(len, resultados)) > 0
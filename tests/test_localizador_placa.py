@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from benchmark_sintetico import desenha_moto
+from localizador_placa import LocalizadorPlaca, volta_para_recorte
+
+PLACA = 'TAT9G95'
+
+
+def recorte_de_moto(placa=PLACA, duas_linhas=False):
+    """Recorte de uma moto sintética (com rodas e margem) e o retângulo da placa dentro dele"""
+    imagem = np.full((260, 200, 3), 90, np.uint8)
+    x1, y1, x2, y2 = 20, 20, 180, 220
+    desenha_moto(imagem, {'placa': placa}, (x1, y1, x2, y2), duas_linhas)
+    largura_placa = int((x2 - x1) * 0.8)
+    altura_placa = int(largura_placa * (0.75 if duas_linhas else 0.32))
+    px1 = x1 + (x2 - x1 - largura_placa) // 2
+    py1 = y1 + int((y2 - y1) * 0.92) - altura_placa
+    return imagem, (px1, py1, px1 + largura_placa, py1 + altura_placa)
+
+
+@pytest.mark.parametrize('duas_linhas', [False, True])
+def test_acha_a_placa_e_volta_para_o_recorte(duas_linhas):
+    localizador = LocalizadorPlaca(altura_saida=128)
+    imagem, (px1, py1, px2, py2) = recorte_de_moto(duas_linhas=duas_linhas)
+
+    placa, (x0, y0), escala = localizador.recorta(imagem)
+
+    assert placa.shape[0] == 128
+    # A região devolvida, de volta na escala do recorte, está centrada dentro da placa
+    centro_x = x0 + placa.shape[1] / escala / 2
+    centro_y = y0 + placa.shape[0] / escala / 2
+    assert px1 <= centro_x <= px2 and py1 <= centro_y <= py2
+    assert localizador.resumo()['localizadas'] == 1
+
+
+def test_sem_candidato_usa_o_recorte_inteiro():
+    localizador = LocalizadorPlaca()
+    vazio = np.full((200, 160, 3), 90, np.uint8)
+
+    placa, deslocamento, escala = localizador.recorta(vazio)
+
+    assert placa is vazio and deslocamento == (0, 0) and escala == 1.0
+    assert localizador.resumo() == {'localizadas': 0, 'sem_placa': 1, 'fracao_localizada': 0.0}
+
+
+def test_volta_para_recorte():
+    resultados = [([[0, 0], [64, 0], [64, 32], [0, 32]], PLACA, 0.9)]
+    assert volta_para_recorte(resultados, (10, 20), 2.0) == [
+        ([[10.0, 20.0], [42.0, 20.0], [42.0, 36.0], [10.0, 36.0]], PLACA, 0.9)]
+
+
+def test_detector_le_a_placa_com_e_sem_localizacao(novo_detector, cenario, monkeypatch):
+    # O oráculo de OCR só conhece as placas do cenário
+    placa = cenario['motos'][0]['placa']
+    imagem, (px1, py1, px2, py2) = recorte_de_moto(placa)
+    inteiro = novo_detector(localizar_placa=False, tamanho_cache_ocr=0).le_texto_placa(imagem)
+    detector = novo_detector(localizar_placa=True, tamanho_cache_ocr=0)
+    localizado = detector.le_texto_placa(imagem)
+
+    assert [texto for _, texto, _ in localizado] == [texto for _, texto, _ in inteiro] == [placa]
+    # O bbox lido na região da placa volta para as coordenadas do recorte da moto
+    (x1, y1), _, (x2, y2), _ = localizado[0][0]
+    assert abs(x1 - px1) <= 4 and abs(y1 - py1) <= 4 and abs(x2 - px2) <= 4 and abs(y2 - py2) <= 4
+
+    # Sem candidato a placa o OCR roda no recorte inteiro, como sem o localizador
+    monkeypatch.setattr(detector.localizador, 'candidatos', lambda moto_img: [])
+    assert detector.le_texto_placa(imagem) == inteiro
+    assert detector.localizador.resumo()['sem_placa'] == 1
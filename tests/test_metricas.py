@@ -0,0 +1,84 @@
+import re
+
+import pytest
+
+from metricas import CONTADORES, Metricas
+
+# Linha de amostra do formato de texto do Prometheus: nome{rótulos} valor
+ROTULO = r'[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"'
+AMOSTRA = re.compile(rf'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{{{ROTULO}(,{ROTULO})*\}})? (\S+)$')
+
+
+def le_exposicao(texto: str) -> dict:
+    """Confere a sintaxe linha a linha e devolve {(nome, rótulos): valor} e os tipos declarados"""
+    assert texto.endswith('\n')
+    amostras, tipos = {}, {}
+    for linha in texto.splitlines():
+        if linha.startswith('# TYPE '):
+            _, _, nome, tipo = linha.split(' ')
+            assert nome not in tipos and tipo in ('counter', 'histogram')
+            tipos[nome] = tipo
+        elif linha.startswith('# HELP '):
+            assert len(linha.split(' ', 3)) == 4
+        else:
+            correspondencia = AMOSTRA.match(linha)
+            assert correspondencia, linha
+            nome, rotulos, _, valor = correspondencia.groups()
+            # Toda amostra pertence a uma métrica com TYPE declarado antes dela
+            assert any(nome == base or nome.startswith(base + '_') for base in tipos), linha
+            amostras[(nome, rotulos or '')] = float(valor)
+    return {'amostras': amostras, 'tipos': tipos}
+
+
+def test_histograma_cumulativo_no_formato_do_prometheus():
+    metricas = Metricas(limites=(0.01, 0.1, 1.0))
+    for segundos in (0.005, 0.05, 0.05, 5.0):
+        metricas.observa('ocr', segundos)
+    metricas.incrementa('buscas', 3)
+
+    exposicao = le_exposicao(metricas.formato_prometheus())
+    amostras = exposicao['amostras']
+
+    assert exposicao['tipos']['mottu_etapa_segundos'] == 'histogram'
+    assert exposicao['tipos']['mottu_buscas_total'] == 'counter'
+    buckets = [amostras[('mottu_etapa_segundos_bucket', f'{{etapa="ocr",le="{le}"}}')]
+               for le in ('0.01', '0.1', '1.0', '+Inf')]
+    assert buckets == [1, 3, 3, 4]
+    assert amostras[('mottu_etapa_segundos_count', '{etapa="ocr"}')] == 4
+    assert amostras[('mottu_etapa_segundos_sum', '{etapa="ocr"}')] == pytest.approx(5.105)
+    assert amostras[('mottu_buscas_total', '')] == 3
+    # Todos os contadores aparecem, mesmo zerados
+    assert all(('mottu_' + nome + '_total', '') in amostras for nome in CONTADORES)
+
+
+def test_resumo_desde_um_instantaneo_e_acumula():
+    metricas = Metricas()
+    metricas.observa('deteccao', 0.2)
+    antes = metricas.instantaneo()
+    metricas.observa('deteccao', 0.4)
+    metricas.incrementa('frames_inferidos', 8)
+
+    resumo = metricas.resumo(antes)
+    assert resumo['etapas'] == {'deteccao': {'chamadas': 1, 'total_s': pytest.approx(0.4),
+                                             'media_ms': pytest.approx(400.0)}}
+    assert resumo['contadores']['frames_inferidos'] == 8
+
+    # O que um worker mediu entra nos totais deste processo
+    outra = Metricas()
+    outra.acumula(metricas.diferenca(antes))
+    assert outra.resumo()['etapas']['deteccao']['chamadas'] == 1
+    assert outra.resumo()['contadores']['frames_inferidos'] == 8
+
+
+def test_api_metrics(app_teste, novo_detector, monkeypatch):
+    detector = novo_detector()
+    detector.varre_video(None, intervalo=30)
+    monkeypatch.setattr(app_teste, 'detector', detector)
+
+    resposta = app_teste.app.test_client().get('/api/metrics')
+
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    amostras = le_exposicao(resposta.get_data(as_text=True))['amostras']
+    assert amostras[('mottu_frames_decodificados_total', '')] == 20
+    assert amostras[('mottu_etapa_segundos_count', '{etapa="deteccao"}')] > 0
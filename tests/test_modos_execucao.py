@@ -0,0 +1,43 @@
+import pytest
+
+MODOS = ('sequencial', 'pipeline', 'processos')
+
+
+def resumo_leituras(leituras: list) -> list:
+    return [(leitura['frame'], leitura.get('trilha'), [float(v) for v in leitura['box']], leitura.get('visto_ate'))
+            for leitura in leituras]
+
+
+def resumo_deteccoes(resultado: dict) -> list:
+    """O que tem que sair igual em qualquer modo: placa, trilha, frames e contagem de matches"""
+    return sorted((d['placa'], d['trilha'], d['primeiro_frame'], d['ultimo_frame'], d['frames_com_match'])
+                  for deteccoes in resultado['deteccoes_por_placa'].values() for d in deteccoes)
+
+
+# Sem cache de OCR: cada processo teria o seu, e um acerto devolve a leitura de um recorte quase igual
+@pytest.mark.parametrize('tamanho_lote_ocr', [1, 4])
+def test_modos_leem_as_mesmas_motos(novo_detector, tamanho_lote_ocr):
+    resultados = {}
+    for modo in MODOS:
+        detector = novo_detector(modo_execucao=modo, tamanho_lote_ocr=tamanho_lote_ocr, workers_processos=3,
+                                 tamanho_cache_ocr=0)
+        leituras, _, estatisticas = detector.varre_video(None, intervalo=5)
+        resultados[modo] = (resumo_leituras(leituras), estatisticas['rastreamento'], estatisticas['frames_processados'])
+
+    assert resultados['pipeline'] == resultados['sequencial']
+    assert resultados['processos'] == resultados['sequencial']
+
+
+def test_modos_dao_as_mesmas_deteccoes(novo_detector, cenario):
+    placas = [moto['placa'] for moto in cenario['motos']]
+    resultados = {}
+    for modo in MODOS:
+        detector = novo_detector(modo_execucao=modo, workers_processos=3, tamanho_cache_ocr=0)
+        resultado = detector.buscar_placas(placas, threshold=0.8, usar_indice=False, intervalo_frames=5)
+        resultados[modo] = resumo_deteccoes(resultado)
+
+    assert {placa for placa, *_ in resultados['sequencial']} == set(placas)
+    # Uma trilha por moto, numeradas na ordem em que entram em cena
+    assert [trilha for _, trilha, *_ in resultados['sequencial']] == [1, 2, 3, 4]
+    assert resultados['pipeline'] == resultados['sequencial']
+    assert resultados['processos'] == resultados['sequencial']
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from controle_admissao import ControleAdmissao, Sobrecarga
+from monitor_ao_vivo import MonitorAoVivo, le_cameras, resolve_fonte
+
+
+def espera(condicao, timeout=30.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            raise AssertionError('condição não foi atingida a tempo')
+        time.sleep(0.05)
+
+
+def test_le_cameras():
+    assert le_cameras('entrada=rtsp://10.0.0.5/stream, patio=0,') == {'entrada': 'rtsp://10.0.0.5/stream',
+                                                                       'patio': '0'}
+    assert le_cameras('') == {}
+    with pytest.raises(ValueError):
+        le_cameras('sem_fonte')
+
+
+def test_resolve_fonte_so_aceita_cameras_e_hosts_liberados():
+    cameras = {'teste': 'videos/patio.mp4', 'patio': '0'}
+    assert resolve_fonte('teste', cameras) == 'videos/patio.mp4'
+    assert resolve_fonte('rtsp://Cam.Local:554/stream', cameras, ['cam.local']) == 'rtsp://Cam.Local:554/stream'
+    for fonte in ('rtsp://outro.host/stream', '/etc/passwd', '0', 'file:///etc/passwd', 'ftp://cam.local/x'):
+        with pytest.raises(ValueError):
+            resolve_fonte(fonte, cameras, ['cam.local'])
+
+
+def test_vaga_ocupada_ate_libera():
+    admissao = ControleAdmissao(max_simultaneas=1, max_fila=0)
+    admissao.ocupa('o monitor')
+    with pytest.raises(Sobrecarga):
+        admissao.ocupa('outro monitor')
+    with pytest.raises(Sobrecarga):
+        with admissao.vaga():
+            pass
+    admissao.libera()
+    with admissao.vaga():
+        pass
+    assert admissao.estado()['ocupadas_fixas'] == 0
+
+
+def test_monitor_avisa_uma_vez_ao_terminar(novo_detector, cenario, video_sintetico):
+    terminados = []
+    monitor = MonitorAoVivo(novo_detector(), video_sintetico, [cenario['motos'][0]['placa']], repetir=False,
+                            ao_terminar=terminados.append).inicia()
+    espera(monitor.finalizado)
+    espera(lambda: terminados)
+    monitor.para()
+
+    assert monitor.status == 'concluido'
+    assert terminados == [monitor]
+    assert monitor.total_alertas == 1
+
+
+@pytest.fixture
+def api_ao_vivo(app_teste, monkeypatch, novo_detector, video_sintetico):
+    monkeypatch.setattr(app_teste, 'detector', novo_detector())
+    monkeypatch.setattr(app_teste, 'cameras_ao_vivo', {'teste': video_sintetico})
+    monkeypatch.setattr(app_teste, 'hosts_ao_vivo', ['cam.local'])
+    yield app_teste
+    for monitor_id in list(app_teste.monitores):
+        app_teste.monitores.pop(monitor_id).para()
+
+
+def test_api_recusa_fonte_fora_da_lista(api_ao_vivo):
+    cliente = api_ao_vivo.app.test_client()
+    for fonte in ('/etc/passwd', '0', 'rtsp://outro.host/stream'):
+        assert cliente.post('/api/ao-vivo', json={'fonte': fonte}).status_code == 400
+    assert api_ao_vivo.admissao.estado()['executando'] == 0
+
+
+def test_api_monitor_ocupa_vaga_ate_parar(api_ao_vivo):
+    cliente = api_ao_vivo.app.test_client()
+    resposta = cliente.post('/api/ao-vivo', json={'fonte': 'teste', 'placas': []})
+    assert resposta.status_code == 202
+    monitor_id = resposta.get_json()['monitor_id']
+    assert api_ao_vivo.admissao.estado()['ocupadas_fixas'] == 1
+
+    # A única vaga está com o monitor: buscas e outro monitor recebem 429
+    assert cliente.post('/api/buscar-placa', json={'placa': 'TAT9G95'}).status_code == 429
+    resposta = cliente.post('/api/ao-vivo', json={'fonte': 'teste'})
+    assert resposta.status_code == 429 and 'Retry-After' in resposta.headers
+
+    assert cliente.delete(f'/api/ao-vivo/{monitor_id}').status_code == 200
+    assert api_ao_vivo.admissao.estado()['executando'] == 0
+
+
+def test_api_limite_de_monitores(api_ao_vivo, monkeypatch):
+    # Vagas de sobra: quem barra o segundo monitor é MAX_MONITORES (1)
+    monkeypatch.setattr(api_ao_vivo, 'admissao', ControleAdmissao(max_simultaneas=4, max_fila=0))
+    cliente = api_ao_vivo.app.test_client()
+    assert cliente.post('/api/ao-vivo', json={'fonte': 'teste'}).status_code == 202
+    resposta = cliente.post('/api/ao-vivo', json={'fonte': 'teste'})
+    assert resposta.status_code == 429
+    assert 'monitor' in resposta.get_json()['erro']
+
+
+def test_monitor_que_termina_sozinho_devolve_a_vaga(api_ao_vivo):
+    cliente = api_ao_vivo.app.test_client()
+    resposta = cliente.post('/api/ao-vivo', json={'fonte': 'teste', 'repetir': False})
+    assert resposta.status_code == 202
+    espera(lambda: api_ao_vivo.admissao.estado()['executando'] == 0)
+    assert api_ao_vivo.monitores[resposta.get_json()['monitor_id']].status == 'concluido'
+
+
+def test_monitores_parados_saem_depois_do_ttl(api_ao_vivo, monkeypatch):
+    cliente = api_ao_vivo.app.test_client()
+    monitor_id = cliente.post('/api/ao-vivo', json={'fonte': 'teste', 'repetir': False}).get_json()['monitor_id']
+    monitor = api_ao_vivo.monitores[monitor_id]
+    espera(lambda: monitor.terminado_em is not None)
+    assert monitor._ultimo is None
+
+    # Ainda dentro do TTL o monitor parado continua consultável
+    assert [m['monitor_id'] for m in cliente.get('/api/ao-vivo').get_json()['monitores']] == [monitor_id]
+    monkeypatch.setattr(api_ao_vivo, 'TTL_MONITORES', 0)
+    monitor.terminado_em -= 1
+    assert cliente.get('/api/ao-vivo').get_json()['monitores'] == []
+    assert cliente.get(f'/api/ao-vivo/{monitor_id}').status_code == 404
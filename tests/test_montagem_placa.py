@@ -0,0 +1,81 @@
+import pytest
+
+from montagem_placa import agrupa_linhas, compativel_com_placa, monta_candidatos
+
+
+def texto_ocr(texto: str, x0: int, y0: int, x1: int, y1: int, confianca=0.9) -> dict:
+    """Texto do OCR no formato de extrai_leituras_ocr"""
+    return {'texto': texto, 'texto_limpo': texto, 'confianca': confianca,
+            'bbox': [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]}
+
+
+def textos(candidatos: list) -> list:
+    return [texto for texto, _, _ in candidatos]
+
+
+def test_formato_da_placa():
+    assert compativel_com_placa('TAT9G95')
+    assert compativel_com_placa('ABC1234')
+    # Trocas comuns do OCR ainda cabem no formato
+    assert compativel_com_placa('TAT9G9S')
+    # Um caractere perdido
+    assert compativel_com_placa('TAT9G9')
+    assert not compativel_com_placa('9999999')
+    assert not compativel_com_placa('TATU')
+    assert not compativel_com_placa('TAT9G955X')
+
+
+def test_agrupa_linhas_de_cima_para_baixo_e_da_esquerda_para_a_direita():
+    baixo = texto_ocr('9G95', 10, 60, 90, 100)
+    direita = texto_ocr('T', 60, 10, 80, 50)
+    esquerda = texto_ocr('TA', 10, 12, 50, 48)
+    assert agrupa_linhas([baixo, direita, esquerda]) == [[esquerda, direita], [baixo]]
+
+
+def test_placa_partida_na_mesma_linha():
+    candidatos = monta_candidatos([texto_ocr('9G95', 70, 10, 140, 40), texto_ocr('TAT', 10, 10, 60, 40)])
+    assert textos(candidatos) == ['TAT9G95']
+    assert candidatos[0][1] == 'TAT+9G95'
+
+
+def test_placa_de_moto_em_duas_linhas():
+    cima = texto_ocr('TAT', 20, 10, 80, 45, confianca=0.8)
+    baixo = texto_ocr('9G95', 15, 50, 85, 85, confianca=0.7)
+    candidatos = monta_candidatos([baixo, cima])
+    assert candidatos[0] == ('TAT9G95', 'TAT/9G95', 0.7)
+
+
+def test_linhas_que_nao_estao_empilhadas_nao_se_juntam():
+    cima = texto_ocr('TAT', 20, 10, 80, 45)
+    # Longe demais e sem sobreposição horizontal
+    baixo = texto_ocr('9G95', 300, 200, 370, 235)
+    assert 'TAT9G95' not in textos(monta_candidatos([cima, baixo]))
+
+
+def test_placa_dentro_de_texto_maior_e_ordem_dos_candidatos():
+    candidatos = monta_candidatos([texto_ocr('XXTAT9G95', 10, 10, 200, 40, confianca=0.6),
+                                   texto_ocr('TAT9G9S', 10, 60, 200, 90, confianca=0.95)])
+    # Os que casam exatamente com o padrão vêm antes, mesmo com confiança menor
+    assert textos(candidatos)[0] == 'TAT9G95'
+    assert 'TAT9G9S' in textos(candidatos)
+
+
+def test_limite_de_candidatos():
+    fragmentos = [texto_ocr(f'AB{i}', 10 + 40 * i, 10, 40 + 40 * i, 40) for i in range(6)]
+    assert len(monta_candidatos(fragmentos, max_candidatos=2)) <= 2
+
+
+def test_placa_buscada_precisa_estar_no_formato(novo_detector):
+    detector = novo_detector()
+    assert detector.normaliza_placas(['tat-9g95', 'ABC 1234', 'TAT9G95']) == ('TAT9G95', 'ABC1234')
+    for placa in ('TAT9G9', 'TAT9G955', '9999999'):
+        with pytest.raises(ValueError):
+            detector.normaliza_placas(placa)
+
+
+def test_api_recusa_placa_fora_do_formato(app_teste):
+    cliente = app_teste.app.test_client()
+    resposta = cliente.post('/api/buscar-placa', json={'placa': 'TAT9G9X'})
+    assert resposta.status_code == 400
+    assert 'TAT9G9X' in resposta.get_json()['erro']
+    assert cliente.post('/api/buscar-placas', json={'placas': ['TAT9G95', 'ABC12']}).status_code == 400
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmark_sintetico import desenha_moto
+from ocr_lote import desfaz_escala, ordena_por_tamanho, padroniza_lote
+
+
+def recortes_de_motos(placas: list) -> list:
+    """Um recorte de moto sintética por placa, de tamanhos diferentes (o último passa de 640 px)"""
+    recortes = []
+    for i, placa in enumerate(placas):
+        largura = 120 + 40 * i
+        imagem = np.full((int(largura * 1.4), largura, 3), 90, np.uint8)
+        desenha_moto(imagem, {'placa': placa}, (10, 10, largura - 10, int(largura * 1.25)), False)
+        recortes.append(imagem)
+    recortes[-1] = cv2.resize(recortes[-1], None, fx=4, fy=4, interpolation=cv2.INTER_CUBIC)
+    return recortes
+
+
+def test_padroniza_lote_completa_e_reduz():
+    pequena = np.full((50, 100, 3), 255, np.uint8)
+    grande = np.full((300, 1280, 3), 255, np.uint8)
+    telas, escalas, (altura, largura) = padroniza_lote([pequena, grande])
+
+    assert (altura, largura) == (150, 640) and escalas == [1.0, 0.5]
+    assert all(tela.shape == (150, 640, 3) for tela in telas)
+    # O recorte fica no canto de cima à esquerda, o resto é borda preta
+    assert telas[0][:50, :100].min() == 255 and telas[0][50:, :].max() == 0 and telas[0][:, 100:].max() == 0
+    assert ordena_por_tamanho([grande, pequena]) == [1, 0]
+
+    resultados = [([[10, 10], [20, 10], [20, 20], [10, 20]], 'ABC1D23', 0.9)]
+    assert desfaz_escala(resultados, 0.5) == [([[20.0, 20.0], [40.0, 20.0], [40.0, 40.0], [20.0, 40.0]],
+                                               'ABC1D23', 0.9)]
+    assert desfaz_escala(resultados, 1.0) == resultados
+
+
+def conta_lotes(detector) -> list:
+    lotes = []
+    reader = detector.reader
+    readtext_batched = reader.readtext_batched
+
+    def contando(imagens, **opcoes):
+        lotes.append(len(imagens))
+        return readtext_batched(imagens, **opcoes)
+
+    reader.readtext_batched = contando
+    return lotes
+
+
+@pytest.mark.parametrize('localizar_placa', [False, True])
+def test_lote_le_o_mesmo_que_um_recorte_por_vez(novo_detector, cenario, localizar_placa):
+    placas = [moto['placa'] for moto in cenario['motos']] * 2
+    recortes = recortes_de_motos(placas)
+    um_por_vez = novo_detector(tamanho_lote_ocr=1, tamanho_cache_ocr=0, localizar_placa=localizar_placa)
+    em_lote = novo_detector(tamanho_lote_ocr=3, tamanho_cache_ocr=0, localizar_placa=localizar_placa)
+    lotes = conta_lotes(em_lote)
+
+    esperados = um_por_vez.le_textos(recortes)
+    obtidos = em_lote.le_textos(recortes)
+
+    assert lotes == [3, 3, 2]
+    assert [[texto for _, texto, _ in r] for r in obtidos] == [[texto for _, texto, _ in r] for r in esperados]
+    if not localizar_placa:
+        assert [[texto for _, texto, _ in r] for r in obtidos] == [[placa] for placa in placas]
+    # Os bboxes voltam para as coordenadas de cada recorte, inclusive o que foi reduzido no lote
+    for resultado, esperado in zip(obtidos, esperados):
+        for (bbox, _, _), (bbox_esperado, _, _) in zip(resultado, esperado):
+            assert np.abs(np.array(bbox) - np.array(bbox_esperado)).max() <= 8
+
+
+def test_lote_com_cache_e_com_erro(novo_detector, cenario, monkeypatch):
+    recortes = recortes_de_motos([moto['placa'] for moto in cenario['motos']])
+    detector = novo_detector(tamanho_lote_ocr=4)
+    lotes = conta_lotes(detector)
+
+    primeira = detector.le_textos(recortes)
+    segunda = detector.le_textos(recortes)
+    # Na segunda vez todos os recortes saem do cache: nenhuma chamada nova do OCR
+    assert lotes == [4]
+    assert [[texto for _, texto, _ in r] for r in segunda] == [[texto for _, texto, _ in r] for r in primeira]
+
+    # Falha no lote: os recortes dele voltam None, sem derrubar a varredura
+    falha = novo_detector(tamanho_lote_ocr=2, tamanho_cache_ocr=0)
+    monkeypatch.setattr(falha, 'roda_ocr_lote', lambda imagens: 1 / 0)
+    assert falha.le_textos(recortes) == [None] * len(recortes)
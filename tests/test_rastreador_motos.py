@@ -0,0 +1,100 @@
+import os
+
+import cv2
+import numpy as np
+
+from acompanhamento import Acompanhamento
+from rastreador_motos import DeteccoesPorTrilha, RastreadorMotos, associa_boxes
+
+
+def anda(box, dx):
+    x1, y1, x2, y2 = box
+    return (x1 + dx, y1, x2 + dx, y2)
+
+
+MOTO_A = (10, 10, 110, 160)
+MOTO_B = (400, 20, 500, 170)
+
+
+def test_associa_boxes_pelo_mais_parecido():
+    assert associa_boxes([MOTO_A, MOTO_B], [anda(MOTO_B, 5), anda(MOTO_A, 5)]) == {0: 1, 1: 0}
+    assert associa_boxes([MOTO_A], [MOTO_B]) == {}
+
+
+def test_mesma_moto_mantem_a_trilha_e_moto_nova_ganha_outra():
+    rastreador = RastreadorMotos()
+    _, ids = rastreador.atualiza(5, [MOTO_A])
+    assert ids == [1]
+    rastreador.registra_leitura(1, confiavel=False, frame_num=5)
+
+    _, ids = rastreador.atualiza(10, [anda(MOTO_A, 10), MOTO_B])
+    assert ids == [1, 2]
+    assert rastreador.resumo()['trilhas'] == 2
+
+
+def test_trilha_confirmada_so_volta_ao_ocr_a_cada_reocr():
+    rastreador = RastreadorMotos(reocr_a_cada=3)
+    box = MOTO_A
+    rastreador.atualiza(1, [box])
+    rastreador.registra_leitura(1, confiavel=True, frame_num=1)
+
+    selecionados = []
+    for frame_num in range(2, 9):
+        box = anda(box, 4)
+        motos, _ = rastreador.atualiza(frame_num, [box])
+        if motos:
+            rastreador.registra_leitura(1, confiavel=True, frame_num=frame_num)
+            selecionados.append(frame_num)
+
+    assert selecionados == [4, 7]
+    assert rastreador.resumo()['ocr_pulados'] == 5
+
+
+def test_trilha_perdida_por_muito_tempo_e_encerrada():
+    rastreador = RastreadorMotos(max_perdida=2, guarda_historico=True)
+    rastreador.atualiza(1, [MOTO_A])
+    for frame_num in (2, 3, 4):
+        rastreador.atualiza(frame_num, [])
+    _, ids = rastreador.atualiza(5, [MOTO_A])
+
+    assert ids == [2]
+    # A trilha encerrada continua no histórico com o último frame em que foi vista
+    assert rastreador.visto_ate(1) == 1
+
+
+def test_motos_de_fora_do_trecho_nao_sao_lidas_nem_contadas():
+    rastreador = RastreadorMotos(trecho=(10, 20))
+    # Antes do trecho: a moto vem do trecho anterior
+    motos, ids = rastreador.atualiza(5, [MOTO_A])
+    assert motos == [] and ids == []
+
+    # No trecho: a moto que já vinha continua de fora, a nova é do trecho
+    motos, ids = rastreador.atualiza(10, [anda(MOTO_A, 5), MOTO_B])
+    assert motos == [MOTO_B] and ids == [1]
+    rastreador.registra_leitura(1, confiavel=False, frame_num=10)
+
+    # Depois do trecho: a moto do trecho continua sendo seguida, uma moto nova não
+    moto_c = (200, 200, 260, 300)
+    motos, ids = rastreador.atualiza(25, [anda(MOTO_B, 5), moto_c])
+    assert ids == [1]
+    assert rastreador.trilhas_abertas() == 1
+    assert rastreador.resumo() == {'trilhas': 1, 'motos_detectadas': 2, 'ocr_executados': 2, 'ocr_pulados': 0}
+
+
+def test_match_melhor_regrava_as_mesmas_imagens(novo_detector):
+    detector = novo_detector()
+    deteccoes = DeteccoesPorTrilha(detector, Acompanhamento())
+    escuro, claro = np.zeros((360, 640, 3), np.uint8), np.full((360, 640, 3), 200, np.uint8)
+
+    deteccoes.registra(escuro, {'frame': 5, 'box': list(MOTO_A), 'trilha': 1},
+                       ('TAT9G9S', 'TAT9G9S', 0.7, 0.86, 'TAT9G95', 'TAT9G95'))
+    arquivos = {campo: deteccoes.deteccoes[0][campo] for campo in ('arquivo_frame', 'arquivo_moto')}
+    deteccoes.registra(claro, {'frame': 10, 'box': list(anda(MOTO_A, 10)), 'trilha': 1},
+                       ('TAT9G95', 'TAT9G95', 0.9, 1.0, 'TAT9G95', 'TAT9G95'))
+
+    deteccao, = deteccoes.deteccoes
+    assert (deteccao['frame'], deteccao['similaridade'], deteccao['frames_com_match']) == (10, 1.0, 2)
+    assert {campo: deteccao[campo] for campo in arquivos} == arquivos
+    # Nenhuma imagem órfã: só as quatro da detecção, já com o recorte novo
+    assert len(os.listdir(detector.save_dir)) == 4
+    assert cv2.imread(deteccao['arquivo_moto']).mean() > 150
@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmark_sintetico import BackendSintetico
+from leitor_frames import LeitorFrames
+from regioes_inferencia import RegiaoInferencia, RegioesInferencia
+
+# Magenta do benchmark sintético (o BackendSintetico acha retângulos dessa cor)
+MAGENTA = (200, 0, 200)
+
+
+def frame_com_motos(caixas: list):
+    frame = np.full((360, 640, 3), 60, np.uint8)
+    for x1, y1, x2, y2 in caixas:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), MAGENTA, -1)
+    return frame
+
+
+def perto(box, esperado, tolerancia):
+    return all(abs(a - b) <= tolerancia for a, b in zip(box, esperado))
+
+
+def test_geometria_do_poligono_em_pixels():
+    # Triângulo na metade de baixo do frame, YOLO limitado a 160 px
+    regiao = RegiaoInferencia(160, [[[0, 0.5], [1, 0.5], [0.5, 1]]])
+    g = regiao.geometria(360, 640)
+
+    assert g['retangulo'] == (0, 180, 640, 360)
+    assert g['escala'] == pytest.approx(160 / 640)
+    assert g['tamanho'] == (160, 45) and g['entrada'] == 160
+    assert g['mascara'].shape == (180, 640) and 0 < cv2.countNonZero(g['mascara']) < g['mascara'].size
+    assert regiao.prepara(np.zeros((360, 640, 3), np.uint8)).shape == (45, 160, 3)
+    # Retângulo que cobre o frame: nem máscara nem redução
+    assert RegiaoInferencia(None, [[[0, 0], [1, 0], [1, 1], [0, 1]]]).geometria(360, 640)['mascara'] is None
+
+
+@pytest.mark.parametrize('resolucao', [None, 320, 200])
+def test_caixas_voltam_para_o_frame_inteiro(resolucao):
+    caixas = [(400, 220, 480, 330), (40, 260, 120, 350)]
+    frame = frame_com_motos(caixas)
+    regiao = RegiaoInferencia(resolucao, [[[0, 0.5], [1, 0.5], [1, 1], [0, 1]]])
+    g = regiao.geometria(360, 640)
+
+    preparada = regiao.prepara(frame)
+    deteccoes = regiao.volta(BackendSintetico().detecta([preparada])[0], 360, 640)
+
+    # Erro de no máximo um pixel da imagem reduzida, de volta na escala do frame
+    tolerancia = 1 / g['escala'] + 1
+    assert len(deteccoes) == 2
+    for esperado in caixas:
+        assert any(perto(box, esperado, tolerancia) for box, _, _ in deteccoes)
+
+
+def test_caixa_com_centro_fora_dos_poligonos_e_descartada():
+    # Triângulo do canto de baixo à esquerda: o retângulo envolvente é o frame todo
+    regiao = RegiaoInferencia(None, [[[0, 0], [0, 1], [1, 1]]])
+    deteccoes = [((20, 300, 80, 350), 3, 0.9), ((560, 10, 620, 60), 3, 0.9)]
+    assert regiao.volta(deteccoes, 360, 640) == [((20, 300, 80, 350), 3, 0.9)]
+
+
+def test_configuracao_por_video_camera_e_padrao(tmp_path):
+    config = {
+        'padrao': {'resolucao': 960},
+        'cameras': {'entrada': {'resolucao': 640}},
+        'videos': {'teste.mp4': {'resolucao': 320}}
+    }
+    regioes = RegioesInferencia(config)
+    assert regioes.para_video(str(tmp_path / 'entrada' / 'teste.mp4')).resolucao == 320
+    assert regioes.para_video(str(tmp_path / 'entrada' / 'outro.mp4')).resolucao == 640
+    assert regioes.para_video(str(tmp_path / 'saida' / 'outro.mp4')).resolucao == 960
+    assert RegioesInferencia({}).para_video('outro.mp4') is None
+    assert RegioesInferencia(None, resolucao_padrao=480).para_video('outro.mp4').resolucao == 480
+
+
+def test_detector_com_roi_acha_as_mesmas_motos(novo_detector, video_sintetico):
+    frames = [frame for frame_num, frame in LeitorFrames(video_sintetico, 15)]
+    detector = novo_detector()
+    inteiro = detector.detecta_motos_lote(frames)
+    detector_roi = novo_detector(regioes_inferencia={'padrao': {'resolucao': 320}})
+    reduzido = detector_roi.detecta_motos_lote(frames)
+
+    assert sum(map(len, inteiro)) > 0
+    assert [len(motos) for motos in reduzido] == [len(motos) for motos in inteiro]
+    for motos_reduzido, motos_inteiro in zip(reduzido, inteiro):
+        for box, esperado in zip(sorted(motos_reduzido), sorted(motos_inteiro)):
+            assert perto(box, esperado, 3)
+    # O YOLO viu um quarto dos pixels
+    pixels = [d.metricas.resumo()['contadores']['pixels_inferidos'] for d in (detector_roi, detector)]
+    assert pixels[0] * 4 == pixels[1]